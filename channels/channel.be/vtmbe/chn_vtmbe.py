@@ -694,10 +694,9 @@ class Channel(chn_class.Channel):
         json = JsonHelper(data)
         json_items = json.get_value("response", "items")
         count = json.get_value("response", "total")
-        for i in range(100, count, 100):
-            url = "%s&from=%s" % (self.mainListUri, i)
-            Logger.debug("Retrieving more items from: %s", url)
-            more_data = UriHandler.open(url)
+        url_format = "%s&from={}" % (self.mainListUri, )
+        Logger.debug("Retrieving more items from: %s", url_format)
+        for more_data in UriHandler.open_pages(url_format, 100, count - 1, step=100):
             more_json = JsonHelper(more_data)
             more_items = more_json.get_value("response", "items")
             if more_items:
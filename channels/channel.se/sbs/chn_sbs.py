@@ -257,11 +257,9 @@ class Channel(chn_class.Channel):
         # extract the images
         self.__update_image_lookup(json)
 
-        for p in range(2, pages + 1, 1):
-            url = url_format.format(p)
-            Logger.debug("Loading: %s", url)
-
-            data = UriHandler.open(url)
+        # the total number of pages is known, so retrieve the others in parallel
+        Logger.debug("Loading pages 2-%s from: %s", pages, url_format)
+        for data in UriHandler.open_pages(url_format, 2, pages):
             json = JsonHelper(data)
             programs += json.get_value("data") or []
 
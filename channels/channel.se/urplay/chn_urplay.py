@@ -658,18 +658,27 @@ class Channel(chn_class.Channel):
         # TODO: Currently the new (none bff API) ignores the "rows" parameters. Even on the website.
         #  This causes a response with 20 results only. So we need to load more pages.
 
+        # The total number of results is unknown, so we retrieve the pages in parallel batches
+        # and stop after the first batch that contains an incomplete page.
+        batch_size = UriHandler.instance().maxWorkers
         results = None
-        for p in range(0, max_iterations):
-            url = url_format.format(results_per_page, p * results_per_page)
-            data = UriHandler.open(url)
-            json_data = JsonHelper(data)
-            result_items = json_data.get_value("results", fallback=[])
-            if results is None:
-                results = json_data
-            else:
-                results.json["results"] += result_items
-
-            if len(result_items) < results_per_page:
-                break
+        for batch_start in range(0, max_iterations, batch_size):
+            batch_end = min(batch_start + batch_size, max_iterations) - 1
+            url_format_page = url_format.format(results_per_page, "{}")
+            pages = UriHandler.open_pages(url_format_page,
+                                          batch_start * results_per_page,
+                                          batch_end * results_per_page,
+                                          step=results_per_page)
+
+            for data in pages:
+                json_data = JsonHelper(data)
+                result_items = json_data.get_value("results", fallback=[])
+                if results is None:
+                    results = json_data
+                else:
+                    results.json["results"] += result_items
+
+                if len(result_items) < results_per_page:
+                    return results
 
         return results or ""
@@ -134,7 +134,10 @@ class ActionParser(object):
         :param ChannelInfo|Channel channel:     The channel object to use for the URL
         :param str action:                      Action to create an url for
         :param MediaItem item:                  The media item to add
-        :param str store_id:                    The ID of the pickle store
+        :param str store_id:                    The ID of the pickle store that contains the
+                                                item. If specified, only the store ID and the
+                                                item guid are added to the URL, otherwise the
+                                                full item is pickled into the URL.
         :param str category:                    The category to use
 
         :return: a complete action url with all keywords and values
@@ -152,27 +155,27 @@ class ActionParser(object):
         if item is None and channel is not None and channel.uses_external_addon:
             return channel.addonUrl
 
-        params = dict()
+        params = []
         if channel:
-            params[keyword.CHANNEL] = channel.url_id
+            params.append((keyword.CHANNEL, channel.url_id))
 
-        params[keyword.ACTION] = action
+        params.append((keyword.ACTION, action))
 
         # it might have an item or not
         if item is not None:
-            params[keyword.PICKLE] = "{}--{}".format(store_id, item.guid)
+            if store_id:
+                # The item is (or will be) in the PickleStore, so a reference is enough.
+                params.append((keyword.PICKLE, "{}--{}".format(store_id, item.guid)))
+            else:
+                params.append((keyword.PICKLE, self.pickler.pickle_media_item(item)))
 
             if action == PLAY_VIDEO and item.isLive:
-                params[keyword.RANDOM_LIVE] = random.randint(10000, 99999)
+                params.append((keyword.RANDOM_LIVE, random.randint(10000, 99999)))
 
         if category:
-            params[keyword.CATEGORY] = category
+            params.append((keyword.CATEGORY, category))
 
-        url = "%s?" % (self.pluginName, )
-        for k in params.keys():
-            url = "%s%s=%s&" % (url, k, params[k])
-
-        url = url.strip('&')
+        url = "{}?{}".format(self.pluginName, "&".join("{}={}".format(k, v) for k, v in params))
         # Logger.Trace("Created url: '%s'", url)
         return url
 
@@ -1,9 +1,7 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from resources.lib.helpers.languagehelper import LanguageHelper
-from resources.lib.chn_class import Channel
 from resources.lib.logger import Logger
-from resources.lib.mediaitem import MediaItem
 from resources.lib.actions.actionparser import ActionParser
 
 
@@ -37,13 +35,14 @@ class AddonAction(object):
     def execute(self):
         raise NotImplementedError
 
-    def _get_context_menu_items(self, channel, item=None):
+    def _get_context_menu_items(self, channel, item=None, store_id=None):
         """ Retrieves the custom context menu items to display.
 
         :param Channel|None channel:    The channel from which to get the context menu items.
                                          The channel might be None in case of some actions that
                                          do not require a channel.
         :param MediaItem|None item:     The item to which the context menu belongs.
+        :param str|None store_id:       The ID of the PickleStore that contains the item.
 
         :return: A list of context menu names and their commands.
         :rtype: list[tuple[str,str]]
@@ -79,20 +78,12 @@ class AddonAction(object):
                 # if menu_item.completeStatus == None or menu_item.completeStatus == item.complete:
 
                 # see if the method is available
-                method_available = False
-
-                for method in possible_methods:
-                    if method == menu_item.functionName:
-                        method_available = True
-                        # break from the method loop
-                        break
-
-                if not method_available:
+                if menu_item.functionName not in possible_methods:
                     Logger.warning("No method for: %s", menu_item)
                     continue
 
                 cmd_url = self.parameter_parser.create_action_url(
-                    channel, action=menu_item.functionName, item=item)
+                    channel, action=menu_item.functionName, item=item, store_id=store_id)
 
                 cmd = "RunPlugin(%s)" % (cmd_url,)
                 title = "Retro: %s" % (menu_item.label,)
@@ -110,14 +101,14 @@ class AddonAction(object):
                                     The channel might be None in case of some actions that
                                     do not require a channel.
 
-        :return: A list of all methods in the channel.
-        :rtype: list[str]
+        :return: A set of all methods in the channel.
+        :rtype: set[str]
 
         """
 
         if channel.guid not in AddonAction.__methodContainer:
             # Not working on all platforms
             # self.methodContainer[channel.guid] = inspect.getmembers(channel)
-            AddonAction.__methodContainer[channel.guid] = dir(channel)
+            AddonAction.__methodContainer[channel.guid] = set(dir(channel))
 
         return AddonAction.__methodContainer[channel.guid]
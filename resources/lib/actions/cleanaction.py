@@ -22,6 +22,7 @@ class CleanAction(AddonAction):
 
         files_to_remove = {
             "channelindex.json": "Cleaning: Channel Index",
+            Config.requestMetricsFile: "Cleaning: HTTP request metrics",
             "xot.session.lock": "Cleaning: Session lock"
         }
         for file_name, log_line in files_to_remove.items():
@@ -50,7 +50,12 @@ class FolderAction(AddonAction):
             # determine the parent guid
             parent_guid = self.parameter_parser.get_parent_guid(self.__channel, selected_item)
 
-            if self.__favorites is None:
+            stream = False
+            if self.__favorites is None and Config.folderStreaming:
+                watcher = StopWatch("Plugin stream_folder_list", Logger.instance())
+                media_items = self.__channel.stream_folder_list(selected_item)
+                stream = True
+            elif self.__favorites is None:
                 watcher = StopWatch("Plugin process_folder_list", Logger.instance())
                 media_items = self.__channel.process_folder_list(selected_item)
                 watcher.lap("Class process_folder_list finished")
@@ -59,51 +64,46 @@ class FolderAction(AddonAction):
                 watcher = StopWatch("Plugin process_folder_list With Items", Logger.instance())
                 media_items = self.__favorites
 
-            if len(media_items) == 0:
-                Logger.warning("process_folder_list returned %s items", len(media_items))
-                ok = self.__show_empty_information(media_items, favs=self.__favorites is not None)
-            else:
-                Logger.debug("process_folder_list returned %s items", len(media_items))
-
+            # When streaming the Kodi items are send in chunks while the items are being parsed.
+            chunk_size = Config.folderChunkSize if stream else 0
+            chunks = 0
             kodi_items = []
+            processed_items = []
 
+            # The settings are only retrieved once for all items
             use_thumbs_as_fanart = AddonSettings.use_thumbs_as_fanart()
+            display_settings = MediaItem.get_display_settings()
             for media_item in media_items:  # type: MediaItem
-                self.__update_artwork(media_item, self.__channel, use_thumbs_as_fanart)
-
-                if media_item.is_folder:
-                    action_value = action.LIST_FOLDER
-                    folder = True
-                elif media_item.is_playable:
-                    action_value = action.PLAY_VIDEO
-                    folder = False
-                else:
-                    Logger.critical("Plugin::process_folder_list: Cannot determine what to add")
+                processed_items.append(media_item)
+                kodi_item = self.__create_kodi_item(
+                    media_item, parent_guid, use_thumbs_as_fanart, display_settings)
+                if kodi_item is None:
                     continue
 
-                # Get the Kodi item
-                kodi_item = media_item.get_kodi_item()
-                self.__set_kodi_properties(kodi_item, media_item, folder,
-                                           is_favourite=self.__favorites is not None)
-
-                # Get the context menu items
-                context_menu_items = self._get_context_menu_items(self.__channel, item=media_item)
-                kodi_item.addContextMenuItems(context_menu_items)
-
-                # Get the action URL
-                url = media_item.actionUrl
-                if url is None:
-                    url = self.parameter_parser.create_action_url(
-                        self.__channel, action=action_value, item=media_item, store_id=parent_guid)
-
                 # Add them to the list of Kodi items
-                kodi_items.append((url, kodi_item, folder))
+                kodi_items.append(kodi_item)
+                if len(kodi_items) == chunk_size:
+                    ok = xbmcplugin.addDirectoryItems(self.handle, kodi_items, len(kodi_items)) and ok
+                    chunks += 1
+                    kodi_items = []
+            media_items = processed_items
+
+            if len(media_items) == 0:
+                Logger.warning("process_folder_list returned %s items", len(media_items))
+                ok = self.__show_empty_information(media_items, favs=self.__favorites is not None)
+                for media_item in media_items:
+                    kodi_item = self.__create_kodi_item(
+                        media_item, parent_guid, use_thumbs_as_fanart, display_settings)
+                    if kodi_item is not None:
+                        kodi_items.append(kodi_item)
+            else:
+                Logger.debug("process_folder_list returned %s items", len(media_items))
 
             watcher.lap("Kodi Items generated")
 
             # add items but if OK was False, keep it like that
             ok = ok and xbmcplugin.addDirectoryItems(self.handle, kodi_items, len(kodi_items))
-            watcher.lap("items send to Kodi")
+            watcher.lap("items send to Kodi in {} calls".format(chunks + 1))
 
             if ok and parent_guid is not None:
                 self.parameter_parser.pickler.store_media_items(parent_guid, selected_item, media_items)
@@ -123,6 +123,48 @@ class FolderAction(AddonAction):
                 XbmcWrapper.Error, 4000)
             xbmcplugin.endOfDirectory(self.handle, False)
 
+    def __create_kodi_item(self, media_item, parent_guid, use_thumbs_as_fanart, display_settings):
+        """ Creates the Kodi directory item for a MediaItem.
+
+        :param MediaItem media_item:                    The item to add.
+        :param str|None parent_guid:                    The guid of the parent item.
+        :param bool use_thumbs_as_fanart:               Use thumbs for artwork.
+        :param tuple[str,bool,bool] display_settings:   The settings for displaying items.
+
+        :return: The url, Kodi item and folder indicator or None if it cannot be added.
+        :rtype: tuple[str,xbmcgui.ListItem,bool]|None
+
+        """
+
+        self.__update_artwork(media_item, self.__channel, use_thumbs_as_fanart)
+
+        if media_item.is_folder:
+            action_value = action.LIST_FOLDER
+            folder = True
+        elif media_item.is_playable:
+            action_value = action.PLAY_VIDEO
+            folder = False
+        else:
+            Logger.critical("Plugin::process_folder_list: Cannot determine what to add")
+            return None
+
+        # Get the Kodi item
+        kodi_item = media_item.get_kodi_item(display_settings=display_settings)
+        self.__set_kodi_properties(kodi_item, media_item, folder,
+                                   is_favourite=self.__favorites is not None)
+
+        # Get the context menu items
+        context_menu_items = self._get_context_menu_items(
+            self.__channel, item=media_item, store_id=parent_guid)
+        kodi_item.addContextMenuItems(context_menu_items)
+
+        # Get the action URL
+        url = media_item.actionUrl
+        if url is None:
+            url = self.parameter_parser.create_action_url(
+                self.__channel, action=action_value, item=media_item, store_id=parent_guid)
+        return url, kodi_item, folder
+
     def __show_empty_information(self, items, favs=False):
         """ Adds an empty item to a list or just shows a message.
         @type favs: boolean
@@ -22,9 +22,10 @@ class LogAction(AddonAction):
         try:
             title = LanguageHelper.get_localized_string(LanguageHelper.LogPostSuccessTitle)
             url_text = LanguageHelper.get_localized_string(LanguageHelper.LogPostLogUrl)
-            files_to_send = [Logger.instance().logFileName,
-                             Logger.instance().logFileName.replace(".log", ".old.log")]
-            paste_url = log_sender.send_file(Config.logFileNameAddon, files_to_send[0])
+            files_to_send = Logger.instance().get_log_files()
+            # make sure all buffered log lines are in the file that is sent.
+            Logger.instance().flush()
+            paste_url = log_sender.send_files(Config.logFileNameAddon, files_to_send)
             XbmcWrapper.show_dialog(title, url_text % (paste_url,))
         except Exception as e:
             Logger.error("Error sending %s", Config.logFileNameAddon, exc_info=True)
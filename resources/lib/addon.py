@@ -4,16 +4,40 @@ import os.path
 import sys
 
 import xbmc
+import xbmcaddon
 
 # setup the paths in Python
 from resources.lib.initializer import Initializer  # nopep8
 Initializer.set_unicode()
 
 
+def is_debug_logging():
+    """ Determines whether debug logging is enabled, without importing the modules of Retrospect.
+
+    :return: True if the log level is Debug or Trace.
+    :rtype: bool
+
+    """
+
+    try:
+        return int(xbmcaddon.Addon().getSetting("log_level") or 2) <= 1
+    except ValueError:
+        return False
+
+
 def run_addon():
     """ Runs Retrospect as a Video Add-On """
 
     log_file = None
+    uri_handler = None
+
+    # measure the import times of all modules that are lazily imported during this run, but only
+    # if they will be reported
+    import_timer = None
+    if is_debug_logging():
+        from resources.lib.helpers.importtimer import ImportTimer
+        import_timer = ImportTimer()
+        import_timer.start()
 
     try:
         from resources.lib.retroconfig import Config
@@ -32,9 +56,12 @@ def run_addon():
         log_file = Logger.create_logger(os.path.join(Config.profileDir, Config.logFileNameAddon),
                                         Config.appName,
                                         append=append_log_file,
-                                        dual_logger=lambda x, y=4: xbmc.log(x, y))
+                                        dual_logger=lambda x, y=4: xbmc.log(x, y),
+                                        max_size=Config.logMaxSize,
+                                        generations=Config.logGenerations)
 
         from resources.lib.urihandler import UriHandler
+        from resources.lib.connectivity.retrypolicy import RetryPolicy
         from resources.lib.addonsettings import AddonSettings
         from resources.lib.textures import TextureHandler
 
@@ -47,18 +74,43 @@ def run_addon():
             cache_dir = Config.cacheDir
 
         ignore_ssl_errors = AddonSettings.ignore_ssl_errors()
-        UriHandler.create_uri_handler(cache_dir=cache_dir,
-                                      cookie_jar=os.path.join(Config.profileDir, "cookiejar.dat"),
-                                      ignore_ssl_errors=ignore_ssl_errors)
+        retry_policy = RetryPolicy(max_attempts=Config.httpMaxAttempts,
+                                   backoff_factor=Config.httpBackoffFactor,
+                                   connect_timeout=Config.httpConnectTimeout,
+                                   read_timeout=Config.httpReadTimeout,
+                                   hedge_after=Config.httpHedgeAfter)
+        uri_handler = UriHandler.create_uri_handler(
+            cache_dir=cache_dir,
+            cookie_jar=os.path.join(Config.profileDir, "cookiejar.dat"),
+            ignore_ssl_errors=ignore_ssl_errors,
+            pool_size=Config.httpPoolSize,
+            idle_timeout=Config.httpIdleTimeout,
+            cache_max_size=Config.httpCacheMaxSize,
+            max_workers=Config.httpMaxWorkers,
+            retry_policy=retry_policy)
 
         # start texture handler
-        TextureHandler.set_texture_handler(Config, Logger.instance(), UriHandler.instance())
+        TextureHandler.set_texture_handler(Config, Logger.instance(), uri_handler)
 
         # run the plugin
         from resources.lib import plugin
         p = plugin.Plugin(sys.argv[0], sys.argv[2], sys.argv[1])
         p.run()
 
+        # store the cookies, http cache index and request metrics. The connections are kept open,
+        # as the UriHandler is reused by the next call in the same interpreter.
+        uri_handler.flush()
+        uri_handler.metrics.store(os.path.join(Config.profileDir, Config.requestMetricsFile),
+                                  new_session=not append_log_file)
+        uri_handler = None
+
+        if import_timer is not None:
+            import_timer.stop()
+            import_timer.log_report(Logger.instance())
+        if Logger.instance().minLogLevel <= Logger.LVL_DEBUG:
+            from resources.lib.regexer import Regexer
+            Regexer.log_report(Logger.instance())
+
         # make sure we leave no references behind
         AddonSettings.clear_cached_addon_settings_object()
         # close the log to prevent locking on next call
@@ -66,7 +118,29 @@ def run_addon():
         log_file = None
 
     except:
+        if import_timer is not None:
+            import_timer.stop()
         if log_file:
             log_file.critical("Error running plugin", exc_info=True)
+
+        # still store the cookies, http cache index and request metrics that were retrieved so far
+        if uri_handler is not None:
+            try:
+                uri_handler.flush()
+                uri_handler.metrics.store(os.path.join(Config.profileDir, Config.requestMetricsFile),
+                                          new_session=not append_log_file)
+            except:
+                if log_file:
+                    log_file.error("Error flushing the UriHandler", exc_info=True)
+
+        # a reused interpreter should not serve the settings snapshot to the next call
+        try:
+            from resources.lib.addonsettings import AddonSettings
+            AddonSettings.clear_cached_addon_settings_object()
+        except:
+            if log_file:
+                log_file.error("Error clearing the cached settings", exc_info=True)
+
+        if log_file:
             log_file.close_log()
         raise
@@ -911,6 +911,8 @@ class AddonSettings(object):
                     xbmc.executebuiltin('SetFocus(%s)' % int(setting_id))
 
             Logger.info("Settings shown with focus on %s-%s", tab_id, setting_id or "<none>")
+            # the dialog does not block, but make sure we don't keep serving the old settings
+            AddonSettings.__refresh(KODI)
         return
 
     @staticmethod
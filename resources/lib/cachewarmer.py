@@ -0,0 +1,249 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import time
+
+from resources.lib.logger import Logger
+
+
+class CacheWarmer(object):
+    def __init__(self, channels, favourites=None, metrics=None,
+                 is_idle=None, is_playing=None, wait=None,
+                 max_folders=5, max_requests=200, max_bytes=20 * 1024 * 1024,
+                 max_duration=15 * 60, duty_cycle=0.25, backoff=30, max_backoff=600):
+        """ Pre-fetches the main lists and the first-level folders of channels, so their HTTP
+        responses are already in the cache when the user opens them.
+
+        The warmer does not depend on Kodi: the state of the device is retrieved with the
+        functions that are passed in. Before each folder it checks whether it may continue. It
+        stops as soon as the device is no longer idle or the budget for this run is used up, and
+        it backs off (exponentially) while media is playing. After each folder it sleeps long
+        enough to only be busy for `duty_cycle` of the time.
+
+        :param list[ChannelInfo] channels:          The channels to warm.
+        :param function|None favourites:            Returns the favourites (MediaItems) of a
+                                                    channel, which are warmed too.
+        :param RequestMetrics|None metrics:         The metrics of the UriHandler that are used to
+                                                    determine the network usage (defaults to those
+                                                    of the current UriHandler).
+        :param function|None is_idle:               Returns True if the device is idle.
+        :param function|None is_playing:            Returns True if media is playing.
+        :param function|None wait:                  Waits a number of seconds and returns True if
+                                                    the warmer should abort.
+        :param int max_folders:                     The maximum number of first-level folders to
+                                                    warm per channel.
+        :param int max_requests:                    The maximum number of network requests per run.
+        :param int max_bytes:                       The maximum number of downloaded bytes per run.
+        :param int max_duration:                    The maximum duration of a run in seconds
+                                                    (excluding the time spent backing off).
+        :param float duty_cycle:                    The fraction of the time the warmer may be busy.
+        :param int backoff:                         The first back off time in seconds while media
+                                                    is playing.
+        :param int max_backoff:                     The maximum back off time in seconds.
+
+        """
+
+        self.__channels = channels
+        self.__favourites = favourites
+        self.__metrics = metrics
+        self.__is_idle = is_idle or (lambda: True)
+        self.__is_playing = is_playing or (lambda: False)
+        self.__wait = wait or self.__sleep
+
+        self.maxFolders = max_folders
+        self.maxRequests = max_requests
+        self.maxBytes = max_bytes
+        self.maxDuration = max_duration
+        self.dutyCycle = duty_cycle
+        self.backoff = backoff
+        self.maxBackoff = max_backoff
+
+        self.folders = 0        # : The number of folders that were warmed in the last run.
+        self.requests = 0       # : The number of network requests done in the last run.
+        self.bytes = 0          # : The number of bytes downloaded in the last run.
+
+        self.__pause = 0.0
+        self.__busy = 0.0
+        self.__start_usage = (0, 0)
+
+    def run(self):
+        """ Warms the cache for all channels.
+
+        :return: False if the run was interrupted because the device was no longer idle or an
+                 abort was requested. True if it completed or used up its budget.
+        :rtype: bool
+
+        """
+
+        if self.__metrics is None:
+            from resources.lib.urihandler import UriHandler
+            self.__metrics = UriHandler.instance().metrics
+
+        self.folders = 0
+        self.requests = 0
+        self.bytes = 0
+        self.__pause = 0.0
+        self.__busy = 0.0
+        self.__start_usage = self.__get_network_usage()
+
+        Logger.info("Starting %s for %d channels", self, len(self.__channels))
+        try:
+            for channel_info in self.__channels:
+                result = self.__warm_channel(channel_info)
+                if result is not None:
+                    return result
+            return True
+        finally:
+            self.__update_usage()
+            Logger.info("%s warmed %d folders in %.2f s: %d requests, %d bytes",
+                        self, self.folders, self.__busy, self.requests, self.bytes)
+
+    def __warm_channel(self, channel_info):
+        """ Warms the main list, the first-level folders and the favourites of a channel.
+
+        :param ChannelInfo channel_info:    The channel to warm.
+
+        :return: None if the next channel can be warmed, otherwise the result of the run.
+        :rtype: bool|None
+
+        """
+
+        result = self.__can_continue()
+        if result is not None:
+            return result
+
+        channel = channel_info.get_channel()
+        if channel is None:
+            return None
+
+        try:
+            channel.init_channel()
+            if channel.requires_log_on():
+                Logger.debug("Not warming %s: the main list requires logging on.", channel)
+                return None
+            items = self.__warm(channel, None)
+        except:
+            Logger.error("Error warming the main list of %s", channel, exc_info=True)
+            return None
+
+        folders = [i for i in items if self.__should_warm(channel, i)][:self.maxFolders]
+        if self.__favourites is not None:
+            try:
+                folders += [f for f in self.__favourites(channel) if self.__should_warm(channel, f)]
+            except:
+                Logger.error("Error listing the favourites of %s", channel, exc_info=True)
+
+        warmed = set()
+        for folder in folders:
+            if folder.url in warmed:
+                continue
+            warmed.add(folder.url)
+
+            result = self.__can_continue()
+            if result is not None:
+                return result
+
+            try:
+                self.__warm(channel, folder)
+            except:
+                Logger.error("Error warming %s of %s", folder, channel, exc_info=True)
+        return None
+
+    def __warm(self, channel, item):
+        """ Retrieves the child items of an item, which puts the responses in the cache.
+
+        :param Channel channel:         The channel of the item.
+        :param MediaItem|None item:     The parent item (None for the main list).
+
+        :return: The child items.
+        :rtype: list[MediaItem]
+
+        """
+
+        start = time.time()
+        try:
+            items = channel.process_folder_list(item)
+        finally:
+            duration = time.time() - start
+            self.__busy += duration
+            # sleep long enough to stay within the duty cycle
+            self.__pause = duration * (1 - self.dutyCycle) / self.dutyCycle
+
+        self.folders += 1
+        Logger.debug("Warmed '%s' of %s in %.2f s: %d items",
+                     item.name if item else "main list", channel, duration, len(items))
+        return items
+
+    def __should_warm(self, channel, item):
+        """ Determines whether a child item should be warmed. Only folders that are retrieved
+        from the web and that are not live (which are never cached) are warmed.
+
+        :param Channel channel:     The channel of the item.
+        :param MediaItem item:      The item.
+
+        :rtype: bool
+
+        """
+
+        url = item.url or ""
+        return item.is_folder and not item.isLive and \
+            (url.startswith("http:") or url.startswith("https:")) and \
+            not channel.requires_log_on(item)
+
+    def __can_continue(self):
+        """ Pauses for the duty cycle and backs off while media is playing, and then determines
+        whether the run may continue.
+
+        :return: None if the run may continue, otherwise the result of the run.
+        :rtype: bool|None
+
+        """
+
+        if self.__pause > 0:
+            if self.__wait(self.__pause):
+                Logger.info("Stopping %s: abort requested.", self)
+                return False
+            self.__pause = 0.0
+
+        backoff = self.backoff
+        while self.__is_playing():
+            Logger.debug("Media is playing, backing off %s for %s seconds.", self, backoff)
+            if self.__wait(backoff):
+                Logger.info("Stopping %s: abort requested.", self)
+                return False
+            backoff = min(backoff * 2, self.maxBackoff)
+
+        if not self.__is_idle():
+            Logger.info("Stopping %s: the device is no longer idle.", self)
+            return False
+
+        self.__update_usage()
+        if self.requests >= self.maxRequests or self.bytes >= self.maxBytes \
+                or self.__busy >= self.maxDuration:
+            Logger.info("Stopping %s: the budget was used up.", self)
+            return True
+        return None
+
+    def __update_usage(self):
+        """ Updates the number of network requests and downloaded bytes of this run. """
+
+        requests, downloaded = self.__get_network_usage()
+        self.requests = requests - self.__start_usage[0]
+        self.bytes = downloaded - self.__start_usage[1]
+
+    def __get_network_usage(self):
+        """ Returns the number of network requests and downloaded bytes of the UriHandler.
+
+        :return: The number of requests and bytes that did not come from the cache.
+        :rtype: tuple[int,int]
+
+        """
+
+        totals = self.__metrics.get_totals()
+        return totals.get("requests", 0) - totals.get("cached", 0), totals.get("bytes", 0)
+
+    def __sleep(self, seconds):
+        time.sleep(seconds)
+        return False
+
+    def __str__(self):
+        return "CacheWarmer [{0} channels]".format(len(self.__channels))
@@ -218,10 +218,12 @@ class ChannelInfo(object):
         return self.addonUrl is not None
 
     @staticmethod
-    def from_json(path):
+    def from_json(path, json_data=None):
         """ Generates a list of ChannelInfo objects present in the json meta data file.
 
-        :param str path: The path of the json file.
+        :param str path:                The path of the json file.
+        :param dict|None json_data:     The already parsed content of the json file. If
+                                        specified, the file is not read.
 
         :return: The channel info objects within the json file.
         :rtype: list[ChannelInfo]
@@ -234,16 +236,11 @@ class ChannelInfo(object):
 
         channel_infos = []
 
-        with io.open(path, mode="r", encoding="utf-8") as json_file:
-            json_data = json_file.read()
-
-        json = JsonHelper(json_data, logger=Logger.instance())
-        channels = json.get_value("channels")  # type: dict
+        if json_data is None:
+            json_data = ChannelInfo.read_json(path)
 
-        if "settings" in json.json:
-            settings = json.get_value("settings")
-        else:
-            settings = []
+        channels = json_data.get("channels")  # type: dict
+        settings = json_data.get("settings", [])
         Logger.debug("Found %s channels and %s settings in %s", len(channels), len(settings), path)
 
         for channel in channels:
@@ -283,3 +280,20 @@ class ChannelInfo(object):
 
         ChannelInfo.__channel_cache[path] = channel_infos
         return channel_infos
+
+    @staticmethod
+    def read_json(path):
+        """ Reads the content of a json meta data file.
+
+        :param str path: The path of the json file.
+
+        :return: The parsed content of the json file.
+        :rtype: dict
+
+        """
+
+        with io.open(path, mode="r", encoding="utf-8") as json_file:
+            json_data = json_file.read()
+
+        json = JsonHelper(json_data, logger=Logger.instance())
+        return json.json
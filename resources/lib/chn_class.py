@@ -1,6 +1,8 @@
 # coding=utf-8  # NOSONAR
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import types
+
 from resources.lib.backtothefuture import PY2
 if PY2:
     # noinspection PyUnresolvedReferences
@@ -18,10 +20,13 @@ from resources.lib.retroconfig import Config
 from resources.lib.logger import Logger
 from resources.lib.urihandler import UriHandler
 from resources.lib.parserdata import ParserData
+from resources.lib.dataparserindex import DataParserIndex
+from resources.lib.listpipeline import ListPipeline
 from resources.lib.textures import TextureHandler
 
 from resources.lib.helpers.htmlentityhelper import HtmlEntityHelper
 from resources.lib.helpers.jsonhelper import JsonHelper
+from resources.lib.helpers.jsonstream import JsonStream
 from resources.lib.helpers.languagehelper import LanguageHelper
 from resources.lib.addonsettings import AddonSettings, LOCAL
 from resources.lib.channelinfo import ChannelInfo
@@ -95,6 +100,7 @@ class Channel:
         # self.dataHandlers = dict()
         # self.updateHandlers = dict()
         self.dataParsers = dict()
+        self.__data_parser_index = None
 
         self.episodeItemRegex = ''      # : used for the ParseMainList
         self.episodeItemJson = None     # : used for the ParseMainList
@@ -167,14 +173,59 @@ class Channel:
 
         """
 
-        items = []
+        return list(self.__iter_folder_list(item, stream=False))
+
+    def stream_folder_list(self, item=None):
+        """ Process the selected item just like `process_folder_list` does, but yields the child
+        items while the data is still being parsed.
+
+        The items can only be streamed if none of the dataparsers has a post-processor that needs
+        the complete list. Folders that might need to be grouped alphabetically are yielded after
+        all other items, once it is known whether the list limit is exceeded.
+
+        :param MediaItem|None item: The parent item.
+
+        :return: The MediaItems that form the childeren of the <item>.
+        :rtype: collections.Iterable[MediaItem]
+
+        """
+
+        return self.__iter_folder_list(item, stream=True)
+
+    def requires_log_on(self, item=None):
+        """ Indicates whether retrieving the child items of an item requires logging on.
+
+        :param MediaItem|None item: The parent item (None for the main list).
+
+        :return: True if one of the dataparsers for the item requires logging on.
+        :rtype: bool
+
+        """
+
+        url = self.mainListUri if item is None else item.url
+        return any(p.LogOnRequired for p in self.__get_data_parsers(url)
+                   if not p.is_video_updater_only())
+
+    def __iter_folder_list(self, item, stream):  # NOSONAR
+        """ Yields the child items of the selected item.
+
+        :param MediaItem|None item: The parent item.
+        :param bool stream:         Yield the items while parsing, if possible.
+
+        :return: The MediaItems that form the childeren of the <item>.
+        :rtype: collections.Iterable[MediaItem]
+
+        """
+
         self.parentItem = item
 
         if item is None:
             Logger.info("process_folder_list :: No item was specified. Assuming it was the main channel list")
             url = self.mainListUri
         elif len(item.items) > 0:
-            return item.items
+            for sub_item in item.items:
+                yield sub_item
+            return
         else:
             url = item.url
 
@@ -193,6 +244,10 @@ class Channel:
         else:
             headers = self.httpHeaders
 
+        # Attribute the requests to this channel and the data parsers in the metrics
+        UriHandler.instance().metrics.set_context(
+            self.channelName, ", ".join(self.__get_data_parser_label(p) for p in data_parsers))
+
         # Let's retrieve the required data. Main url's
         if url.startswith("http:") or url.startswith("https:") or url.startswith("file:"):
             # Disable cache on live folders
@@ -203,7 +258,9 @@ class Channel:
         # Searching a site using search_site()
         elif url == "searchSite" or url == "#searchSite":
             Logger.debug("Starting to search")
-            return self.search_site()
+            for sub_item in self.search_site():
+                yield sub_item
+            return
         # Labels instead of url's
         elif url.startswith("#"):
             data = ""
@@ -212,6 +269,26 @@ class Channel:
             Logger.debug("Unknown URL format. Setting data to ''")
             data = ""
 
+        parsed_items = self.__iter_parsed_items(data, data_parsers, stream)
+        for sub_item in self.__iter_filtered_items(parsed_items, stream):
+            yield sub_item
+
+    def __iter_parsed_items(self, data, data_parsers, stream):  # NOSONAR
+        """ Parses the data with the dataparsers and yields the created items.
+
+        :param str|JsonHelper data:             The retrieved data.
+        :param list[ParserData] data_parsers:   The dataparsers to use.
+        :param bool stream:                     Yield the items while parsing, if possible.
+
+        :return: The created items.
+        :rtype: collections.Iterable[MediaItem]
+
+        """
+
+        # Post-processors need the complete list, so then the items can not be streamed.
+        stream = stream and not [p for p in data_parsers if p.PostProcessor]
+        items = []
+
         # first check if there is a generic pre-processor
         pre_procs = [p for p in data_parsers if p.is_generic_pre_processor()]
         num_pre_procs = len(pre_procs)
@@ -240,8 +317,12 @@ class Channel:
         # The the other handlers
         Logger.trace("Processing %s Normal DataParsers", len(data_parsers))
         handler_json = None
+        # If the JSON is only used by a single parser, the results can be streamed.
+        stream_json = len([p for p in data_parsers if p.IsJson]) == 1
         for data_parser in data_parsers:
             Logger.debug("[DataParsers] Processing %s", data_parser)
+            UriHandler.instance().metrics.set_context(
+                self.channelName, self.__get_data_parser_label(data_parser))
 
             # Check for preprocessors
             if data_parser.PreProcessor:
@@ -257,7 +338,13 @@ class Channel:
                     Logger.warning("No <parser> found for %s. Skipping.", data_parser.Creator)
                 continue
 
-            if data_parser.IsJson:
+            if data_parser.IsJson and stream_json and not data_parser.PostProcessor \
+                    and not isinstance(handler_data, JsonHelper):
+                # Nothing needs the complete document, so only decode the results of the parser
+                Logger.trace("Streaming JSON results for %s", data_parser.Parser)
+                parser_results = JsonStream(handler_data).iter_path(data_parser.Parser)
+
+            elif data_parser.IsJson:
                 if handler_json is None:
                     # Cache the json requests to improve performance
                     Logger.trace("Caching JSON results for Dataparsing")
@@ -267,45 +354,31 @@ class Channel:
                         handler_json = JsonHelper(handler_data, Logger.instance())
 
                 Logger.trace(data_parser.Parser)
-                parser_results = handler_json.json
-                for parser in data_parser.Parser:
-                    # Find the right elements
-                    if isinstance(parser, tuple):
-                        # We need to match a key in a list of objects.
-                        key, value, index = parser
-                        parser_results = [p for p in parser_results if p.get(key) == value]
-                        if not parser_results:
-                            parser_results = []
-                            break
-                        if index is not None:
-                            parser_results = parser_results[index]
-
-                    elif isinstance(parser_results, list):
-                        parser_results = parser_results[parser]
-                    else:
-                        parser_results = parser_results.get(parser)
-
-                    if not parser_results:
-                        parser_results = []
-                        break
-
-                if not isinstance(parser_results, (tuple, list)):
-                    # if there is just one match, return that as a list
-                    parser_results = [parser_results]
+                parser_results = JsonStream.select(handler_json.json, data_parser.Parser)
             else:
                 if isinstance(handler_data, JsonHelper):
                     raise ValueError("Cannot perform Regex Parser on JsonHelper.")
                 else:
                     parser_results = Regexer.do_regex(data_parser.Parser, handler_data)
 
-            Logger.debug("[DataParsers] Processing DataParser.Creator for %s items", len(parser_results))
+            Logger.debug("[DataParsers] Processing DataParser.Creator")
+            result_count = 0
             for parser_result in parser_results:
+                result_count += 1
                 handler_result = data_parser.Creator(parser_result)
-                if handler_result is not None:
-                    if isinstance(handler_result, list):
-                        items += handler_result
-                    else:
-                        items.append(handler_result)
+                if handler_result is None:
+                    continue
+
+                if isinstance(handler_result, (list, types.GeneratorType)):
+                    items += handler_result
+                else:
+                    items.append(handler_result)
+
+                if stream:
+                    for sub_item in items:
+                        yield sub_item
+                    del items[:]
+            Logger.debug("[DataParsers] Processed DataParser.Creator for %s items", result_count)
 
             if data_parser.PostProcessor:
                 Logger.debug("[DataParsers] Processing DataParser.PostProcessor")
@@ -329,6 +402,22 @@ class Channel:
             items = data_parser.PostProcessor(data, items)
             Logger.trace("Post-processing returned %d items", len(items))
 
+        for sub_item in items:
+            yield sub_item
+
+    def __iter_filtered_items(self, items, stream):  # NOSONAR
+        """ Removes the hidden and duplicate items and groups the folders alphabetically if the
+        list limit is exceeded.
+
+        :param collections.Iterable[MediaItem] items:   The items to filter.
+        :param bool stream:                             Yield items that will not be grouped as
+                                                        soon as they pass the filters.
+
+        :return: The remaining items.
+        :rtype: collections.Iterable[MediaItem]
+
+        """
+
         # should we exclude DRM/GEO?
         hide_geo_locked = AddonSettings.hide_geo_locked_items_for_location(self.language)
         hide_drm_protected = AddonSettings.hide_drm_items()
@@ -338,106 +427,110 @@ class Channel:
         if not hide_folders:
             type_to_exclude = mediatype.FOLDER_TYPES
 
-        old_count = len(items)
+        # Filtering and de-duplicating is done in a single pass.
+        pipeline = ListPipeline(self.channelName)
         if hide_drm_protected:
             Logger.debug("Hiding DRM items")
-            items = [i for i in items if not i.isDrmProtected or i.media_type in type_to_exclude]
+            pipeline.add_filter("drm", lambda i: not i.isDrmProtected or i.media_type in type_to_exclude)
         if hide_geo_locked:
             Logger.debug("Hiding GEO Locked items due to GEO region: %s", self.language)
-            items = [i for i in items if not i.isGeoLocked or i.media_type in type_to_exclude]
+            pipeline.add_filter("geo", lambda i: not i.isGeoLocked or i.media_type in type_to_exclude)
         if hide_premium:
             Logger.debug("Hiding Premium items")
-            items = [i for i in items if not i.isPaid or i.media_type in type_to_exclude]
+            pipeline.add_filter("premium", lambda i: not i.isPaid or i.media_type in type_to_exclude)
 
         # Local import for performance
         from resources.lib.cloaker import Cloaker
         cloaker = Cloaker(self, AddonSettings.store(LOCAL), logger=Logger.instance())
         if not AddonSettings.show_cloaked_items():
             Logger.debug("Hiding Cloaked items")
-            items = [i for i in items if not cloaker.is_cloaked(i.url)]
+            pipeline.add_filter("cloak", lambda i: not cloaker.is_cloaked(i.url))
         else:
-            cloaked_items = [i for i in items if cloaker.is_cloaked(i.url)]
-            for c in cloaked_items:
-                c.isCloaked = True
-
-        if len(items) != old_count:
-            Logger.info("Hidden %s items due to DRM/GEO/Premium/cloak filter (Hide Folders=%s)",
-                        old_count - len(items), hide_folders)
+            def mark_cloaked(i):
+                if cloaker.is_cloaked(i.url):
+                    i.isCloaked = True
+            pipeline.add_action("cloak", mark_cloaked)
 
-        # Check for grouping or not
+        # When streaming, the items that will never be grouped are yielded right away, the others
+        # have to wait until the number of folders is known.
         limit = AddonSettings.get_list_limit()
-        folder_items = [i for i in items if i.is_folder]
-
-        # we should also de-duplicate before calculating
-        folder_items = list(set(folder_items))
-        folders = len(folder_items)
-
-        if 0 < limit < folders:
-            # let's filter them by alphabet if the number is exceeded
-            Logger.debug("Creating Groups for list exceeding '%s' folder items. Total folders found '%s'.",
-                         limit, folders)
-            other = "\a{}".format(LanguageHelper.get_localized_string(LanguageHelper.OtherChars))
-            title_format = "\a{}".format(LanguageHelper.get_localized_string(LanguageHelper.StartWith))
-            result = dict()
-            non_grouped = []
-            # Should we remove prefixes just as Kodi does?
-            # prefixes = ("de", "het", "the", "een", "a", "an")
-
-            # Copy the parent's content-type for the sub-folder items
-            if self.parentItem:
-                content_type = self.parentItem.content_type
-            else:
-                content_type = self.mainListContentType
+        held_back = []
+        folders = 0
+        for sub_item in pipeline.iter_process(items):
+            if limit <= 0:
+                yield sub_item
+                continue
 
-            for sub_item in items:
-                if sub_item.dontGroup or not sub_item.is_folder:
-                    non_grouped.append(sub_item)
-                    continue
+            if sub_item.is_folder:
+                folders += 1
+            if stream and (not sub_item.is_folder or sub_item.dontGroup):
+                yield sub_item
+            else:
+                held_back.append(sub_item)
 
-                char = sub_item.name[0].upper()
-                if char == "&":
-                    title = HtmlEntityHelper.convert_html_entities(sub_item.name)
-                    char = title[0].upper()
-
-                # Should we de-prefix?
-                # for p in prefixes:
-                #     if sub_item.name.lower().startswith(p + " "):
-                #         char = sub_item.name[len(p) + 1][0].upper()
-
-                if char.isdigit():
-                    char = "0-9"
-                elif not char.isalpha():
-                    char = other
-
-                if char not in result:
-                    Logger.trace("Creating Grouped item from: %s", sub_item)
-                    if char == other:
-                        item = MediaItem(title_format.replace("'", "") % (char,), "", mediatype.FOLDER)
-                    else:
-                        item = MediaItem(title_format % (char.upper(),), "", mediatype.FOLDER)
-                    item.complete = True
-                    item.content_type = content_type
-                    # item.set_date(2100 + ord(char[0]), 1, 1, text='')
-                    result[char] = item
-                else:
-                    item = result[char]
-                item.items.append(sub_item)
+        hidden = pipeline.inputCount - pipeline.outputCount - pipeline.removed("dedupe")
+        if hidden:
+            Logger.info("Hidden %s items due to DRM/GEO/Premium/cloak filter (Hide Folders=%s)",
+                        hidden, hide_folders)
+        Logger.trace("Found '%d' items of which '%d' are unique.",
+                     pipeline.inputCount - hidden, pipeline.outputCount)
+
+        if not 0 < limit < folders:
+            for sub_item in held_back:
+                yield sub_item
+            return
+
+        # let's filter them by alphabet if the number is exceeded
+        Logger.debug("Creating Groups for list exceeding '%s' folder items. Total folders found '%s'.",
+                     limit, folders)
+        other = "\a{}".format(LanguageHelper.get_localized_string(LanguageHelper.OtherChars))
+        title_format = "\a{}".format(LanguageHelper.get_localized_string(LanguageHelper.StartWith))
+        result = dict()
+        # Should we remove prefixes just as Kodi does?
+        # prefixes = ("de", "het", "the", "een", "a", "an")
+
+        # Copy the parent's content-type for the sub-folder items
+        if self.parentItem:
+            content_type = self.parentItem.content_type
+        else:
+            content_type = self.mainListContentType
 
-            items = non_grouped + list(result.values())
+        for sub_item in held_back:
+            if sub_item.dontGroup or not sub_item.is_folder:
+                yield sub_item
+                continue
 
-        # In order to get a better performance in de-duplicating and keeping the sort order
-        # we first need to store the order in a lookup table. Then we use sorted(set()) and
-        # use that lookup table for sorting. Using sorted(set(), items.index) this will be
-        # an O(n) (for the index()) times O(n*log(n)) (for the sorted) = O(n^2*log(n)!.
-        # The dictionary lookup (O(1)) saves us an O(n).
-        # See https://wiki.python.org/moin/TimeComplexity
-        sorted_order = {}
-        for i in range(0, len(items)):
-            sorted_order[items[i]] = i
-        unique_results = sorted(set(items), key=sorted_order.get)
+            char = sub_item.name[0].upper()
+            if char == "&":
+                title = HtmlEntityHelper.convert_html_entities(sub_item.name)
+                char = title[0].upper()
+
+            # Should we de-prefix?
+            # for p in prefixes:
+            #     if sub_item.name.lower().startswith(p + " "):
+            #         char = sub_item.name[len(p) + 1][0].upper()
+
+            if char.isdigit():
+                char = "0-9"
+            elif not char.isalpha():
+                char = other
+
+            if char not in result:
+                Logger.trace("Creating Grouped item from: %s", sub_item)
+                if char == other:
+                    item = MediaItem(title_format.replace("'", "") % (char,), "", mediatype.FOLDER)
+                else:
+                    item = MediaItem(title_format % (char.upper(),), "", mediatype.FOLDER)
+                item.complete = True
+                item.content_type = content_type
+                # item.set_date(2100 + ord(char[0]), 1, 1, text='')
+                result[char] = item
+            else:
+                item = result[char]
+            item.items.append(sub_item)
 
-        Logger.trace("Found '%d' items of which '%d' are unique.", len(items), len(unique_results))
-        return unique_results
+        for item in result.values():
+            yield item
 
     def process_video_item(self, item):
         """ Process a video item using the required dataparsers
@@ -477,6 +570,8 @@ class Channel:
                 XbmcWrapper.show_dialog(title, text)
 
         Logger.debug("Processing Updater from %s", data_parser)
+        UriHandler.instance().metrics.set_context(
+            self.channelName, self.__get_data_parser_label(data_parser))
         return data_parser.Updater(item)
 
     def search_site(self, url=None):
@@ -919,12 +1014,44 @@ class Channel:
         data.MatchType = match_type
         data.LogOnRequired = requires_logon
 
+        # compile the regexes now, so errors show up when the channel is created
+        if parser and not json:
+            Regexer.precompile(parser)
+
         if url in self.dataParsers:
             self.dataParsers[url].append(data)
         else:
             self.dataParsers[url] = [data]
+
+        # the index is (re)created on the first lookup after all parsers were added
+        self.__data_parser_index = None
         return
 
+    def _set_cache_ttl(self, url_pattern, ttl):
+        """ Overrides the HTTP cache freshness for URL's matching a regular expression, regardless
+        of the Cache-Control/Expires headers that the server sends.
+
+        :param str url_pattern:     The regular expression that the URL's should match.
+        :param int ttl:             The number of seconds the responses are considered fresh. Use 0
+                                    to never cache the responses.
+
+        """
+
+        UriHandler.instance().cachePolicy.add_ttl_override(url_pattern, ttl)
+
+    def _set_retry_policy(self, url_pattern, **kwargs):
+        """ Overrides how failing requests for URL's matching a regular expression are retried,
+        for example to enable hedged requests for a slow API.
+
+        :param str url_pattern:     The regular expression that the URL's should match.
+        :param kwargs:              The values to override: max_attempts, backoff_factor,
+                                    backoff_max, retry_status_codes, connect_timeout,
+                                    read_timeout or hedge_after (see RetryPolicy).
+
+        """
+
+        UriHandler.instance().retryPolicy.add_override(url_pattern, **kwargs)
+
     def _get_setting(self, setting_id, value_for_none=None):
         """ Retrieves channel specific settings. Just to prevent us from importing AddonSettings in all channels.
 
@@ -1004,17 +1131,12 @@ class Channel:
             else:
                 Logger.warning("no DataParser was found keyword [%s]. Continuing with other options.", url)
         else:
-            # make sure we sort by keylength and then start with the longest one.
-            keys = sorted(self.dataParsers.keys(), key=len, reverse=True)
-            # watch.lap("DataParsers sorted")
-
-            # filter them in order
-            for key in keys:
-                # for each key we see if we have filtered results
-                data_parsers = [d for d in self.dataParsers[key] if d.matches(url)]
-                if data_parsers:
-                    Logger.trace("Found %s direct DataParsers matches", len(data_parsers))
-                    break
+            # the index returns the matches of the longest matching url.
+            if self.__data_parser_index is None:
+                self.__data_parser_index = DataParserIndex(self.dataParsers)
+            data_parsers = self.__data_parser_index.find(url)
+            if data_parsers:
+                Logger.trace("Found %s direct DataParsers matches", len(data_parsers))
             # watch.lap("DataParsers filtered")
 
         if not data_parsers:
@@ -1031,6 +1153,17 @@ class Channel:
             Logger.debug("Found %s DataParsers for '%s'", len(data_parsers), url)
         return data_parsers
 
+    def __get_data_parser_label(self, data_parser):
+        """ Returns a short label for a data parser, used for the request metrics.
+
+        :param ParserData data_parser:  The data parser.
+
+        :rtype: str
+
+        """
+
+        return data_parser.Name or data_parser.Match
+
     def __generate_data_parsers_from_old_methods(self, url):
         """ Generates Data Parsers based on the old regular expressions or the JSON queries.
         The regular expression suppersede the JSON.
@@ -101,12 +101,14 @@ class Cloaker(object):
         first_time = not self.__settingsStore.get_boolean_setting(Cloaker.FIRST_TIME_SHOWN,
                                                                   default=False)
 
-        # update the first time message setting unless we should not.
-        if update_first_time_message:
-            self.__settingsStore.set_setting(Cloaker.FIRST_TIME_SHOWN, update_first_time_message)
-
-        self.__settingsStore.\
-            set_setting(Cloaker.CLOAKED_KEY, self.__cloaked, channel=self.__channel)
+        # store both settings with a single write
+        with self.__settingsStore.batch():
+            # update the first time message setting unless we should not.
+            if update_first_time_message and first_time:
+                self.__settingsStore.set_setting(Cloaker.FIRST_TIME_SHOWN, update_first_time_message)
+
+            self.__settingsStore.\
+                set_setting(Cloaker.CLOAKED_KEY, self.__cloaked, channel=self.__channel)
 
         if first_time and self.__logger and update_first_time_message:
             self.__logger.debug("First time cloak found.")
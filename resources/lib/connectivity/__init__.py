@@ -1,2 +1,2 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
-__all__ = ["streamcache", "cachehttpadapter"]
+__all__ = ["streamcache", "cachehttpadapter", "cachepolicy", "sessionpool"]
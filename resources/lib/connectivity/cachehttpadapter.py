@@ -6,235 +6,221 @@ import requests.utils
 from requests.adapters import HTTPAdapter, DEFAULT_POOLSIZE, DEFAULT_RETRIES, DEFAULT_POOLBLOCK
 from requests.structures import CaseInsensitiveDict
 
-import json
 import hashlib
+import threading
 
+from .cachepolicy import CachePolicy
 from .streamcache import StreamCache
 from resources.lib.logger import Logger
 
 
 class CacheHTTPAdapter(HTTPAdapter):
 
-    def __init__(self, cache_store, pool_connections=DEFAULT_POOLSIZE, pool_maxsize=DEFAULT_POOLSIZE,
-                 max_retries=DEFAULT_RETRIES, pool_block=DEFAULT_POOLBLOCK):
+    def __init__(self, cache_store, cache_policy=None, pool_connections=DEFAULT_POOLSIZE,
+                 pool_maxsize=DEFAULT_POOLSIZE, max_retries=DEFAULT_RETRIES,
+                 pool_block=DEFAULT_POOLBLOCK):
         """ Creates a Caching HTTP Adapter for the Requests module.
 
-        :param StreamCache cache_store:     The Cache store to use.
-        :param int pool_connections:        Size of connection pool.
-        :param int pool_maxsize:            Maximum number of active connections.
-        :param int max_retries:             Maximum number of retries.
-        :param bool pool_block:             Use the default pool?
+        :param StreamCache cache_store:         The Cache store to use.
+        :param CachePolicy cache_policy:        The policy that determines caching and freshness.
+        :param int pool_connections:            Size of connection pool.
+        :param int pool_maxsize:                Maximum number of active connections.
+        :param int max_retries:                 Maximum number of retries.
+        :param bool pool_block:                 Use the default pool?
 
         """
 
         self.cache_store = cache_store        # type: StreamCache
+        self.cache_policy = cache_policy or CachePolicy()
+        self.__revalidations = []
+        self.__revalidations_lock = threading.Lock()
 
         super(CacheHTTPAdapter, self).__init__(pool_connections, pool_maxsize, max_retries,
                                                pool_block)
 
     def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        send_kwargs = {"stream": stream, "timeout": timeout, "verify": verify, "cert": cert, "proxies": proxies}
+
+        cached_response, cache_data, staleness = None, None, None
         try:
             if request.method == "GET":
-                response = self.__get_cached_response(request)
-                if response:
+                cached_response, cache_data, staleness = self.__get_cached_response(request)
+                if cached_response is not None and staleness <= 0:
+                    Logger.debug("Cache-Hit: %s", request.url)
+                    self.cache_store.cacheHits += 1
+                    cached_response.cacheStatus = "hit"
+                    return cached_response
+
+                if cached_response is not None and \
+                        staleness <= self.cache_policy.get_stale_while_revalidate(cache_data):
+                    Logger.debug("Stale-Cache hit within stale-while-revalidate. Revalidating in the background.")
                     self.cache_store.cacheHits += 1
-                    return response
+                    self.__revalidate_in_background(request, cache_data, send_kwargs)
+                    cached_response.cacheStatus = "stale"
+                    return cached_response
+
+                if cached_response is not None and self.cache_policy.can_revalidate(cache_data):
+                    Logger.debug("Stale-Cache hit found. Revalidating")
+                    self.cache_policy.add_validators(request.headers, cache_data)
+                elif cached_response is not None:
+                    Logger.debug("Expired Cache-Hit: %s", request.url)
         except:
             Logger.error("Error retrieving cache for %s", request.url, exc_info=True)
 
         # Actually send a request
         Logger.debug("Retrieving data from: %s", request.url)
-        response = super(CacheHTTPAdapter, self).send(request, stream, timeout, verify, cert, proxies)
-
         try:
-            # Cache it if it was a cacheable response
-            cache_data = self.__extract_cache_data(response.headers)
-            if self.__should_cache(response, cache_data):
-                self.__store_response(request, response, cache_data)
+            response = super(CacheHTTPAdapter, self).send(request, **send_kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if self.__may_serve_stale_on_error(cached_response, cache_data, staleness):
+                Logger.warning("Request failed. Serving stale cache within stale-if-error for %s", request.url)
+                cached_response.cacheStatus = "stale-error"
+                return cached_response
+            raise
 
-            if response.status_code == 304:
-                Logger.debug("304 Response found. Prolonging the %s", response.url)
-                self.cache_store.cacheHits += 1
-                response = self.__get_cached_response(request, no_check=True)
-        except:
-            Logger.error("Error storing cache for %s", request.url, exc_info=True)
+        if response.status_code >= 500 and \
+                self.__may_serve_stale_on_error(cached_response, cache_data, staleness):
+            Logger.warning("Request failed with %s. Serving stale cache within stale-if-error for %s",
+                           response.status_code, request.url)
+            cached_response.cacheStatus = "stale-error"
+            return cached_response
 
-        return response
+        return self.__process_response(request, response, cached_response, cache_data)
 
-    def __get_cached_response(self, req, no_check=False):
-        body_key, meta_key = self.__get_cache_keys(req)
-        if not self.cache_store.has_cache_key(meta_key) or not \
-                self.cache_store.has_cache_key(body_key):
-            Logger.debug("No-Cache-Hit: %s", req.url)
-            return None
+    def close(self):
+        """ Waits for pending background revalidations and closes the adapter. """
 
-        with self.cache_store.get(meta_key) as fd:
-            meta = json.load(fd)
-        headers = CaseInsensitiveDict(data=meta["headers"])
-        cache_data = meta.get("cache_data")
+        with self.__revalidations_lock:
+            revalidations = list(self.__revalidations)
 
-        resp = requests.Response()
-        resp.url = meta.get("url", req.url)
-        resp.raw = self.cache_store.get(body_key)
-        resp.status_code = meta["status"]
-        resp.reason = meta.get("reason")
-        resp.headers = headers
-        resp.encoding = meta["encoding"]
-        resp.request = req
-
-        if no_check:
-            return resp
-
-        # Determine the maximum age and then check if the cache if valid or not.
-        Logger.trace("Cache-Data: %s", cache_data)
-        valid_in_seconds = 3600
-        if 'max-age' in cache_data:
-            valid_in_seconds = cache_data['max-age']
-
-        if self.cache_store.is_expired(meta_key, valid_in_seconds):
-            if self.__must_revalidate(cache_data):
-                Logger.debug("Stale-Cache hit found. Revalidating")
-                req.headers["If-None-Match"] = headers["etag"]
-            else:
-                Logger.debug("Expired Cache-Hit: %s", req.url)
-            return None
+        for revalidation in revalidations:
+            revalidation.join(10)
 
-        Logger.debug("Cache-Hit: %s", req.url)
-        return resp
+        super(CacheHTTPAdapter, self).close()
 
-    def __extract_cache_data(self, headers):
-        """ Extracts cache data from the `cache-control` headers.
+    def __process_response(self, request, response, cached_response, cache_data):
+        """ Stores a response in the cache or refreshes the cached one on a `304 Not Modified`.
 
-        :param dict headers:    The HTTP headers.
+        :param requests.PreparedRequest request:            The request that was sent.
+        :param requests.Response response:                  The response that was received.
+        :param requests.Response|None cached_response:      The (stale) cached response.
+        :param dict[str,any]|None cache_data:               The cache data of the cached response.
 
-        :return: The cache data from the `cache-control` headers
-        :rtype: dict[str,str]
+        :return: The response to return to the caller.
+        :rtype: requests.Response
 
         """
 
-        cache_data = {}
-
-        if "cache-control" in headers:
-            cache_control = headers['cache-control']
-            for entry in cache_control.strip().split(","):
-                if entry.find("=") > 0:
-                    (key, value) = entry.split("=")
-                    try:
-                        cache_data[key.strip().lower()] = int(value.strip())
-                    except ValueError:
-                        cache_data[key.strip().lower()] = True
-                else:
-                    cache_data[entry.strip().lower()] = True
-
-        if "etag" in headers:
-            # Not used now.
-            # if len(cache_data) == 0:
-            #     # only an e-tag is present, we should make it stale after some time, less then the 3600 seconds
-            #     cache_data['max-age'] = 60
-            #     cache_data['must-revalidate'] = True
-            cache_data['etag'] = headers['etag']
-
-        if cache_data:
-            Logger.debug("Found cache-control and etag data: %s", cache_data)
-        return cache_data
-
-    def __should_cache(self, res, cache_data):
-        """ Returns whether a response should be cached for further use. It uses
-        the "cache-control" header value and the type of response (https/2xx status)
-        to determine if a response should be cached.
+        try:
+            if response.status_code == 304 and cached_response is not None:
+                Logger.debug("304 Response found. Prolonging the %s", response.url)
+                self.cache_store.cacheHits += 1
 
-        These Cache-Control parameters are used:
+                # Combine the stored cache data with the updated data from the 304 response
+                new_cache_data = dict(cache_data)
+                new_cache_data.update(self.cache_policy.extract_cache_data(response.headers))
+                valid_in_seconds = self.cache_policy.get_freshness_lifetime(request.url, new_cache_data)
+                self.cache_store.touch(self.__get_cache_key(request), valid_in_seconds)
+                cached_response.cacheStatus = "revalidated"
+                return cached_response
 
-        * max-age=[seconds] - specifies the maximum amount of time that an
-        representation will be considered fresh. Similar to Expires, this
-        directive is relative to the time of the request, rather than absolute.
-        [seconds] is the number of seconds from the time of the request you wish
-        the representation to be fresh for.
+            # Cache it if it was a cacheable response
+            cache_data = self.cache_policy.extract_cache_data(response.headers)
+            if self.cache_policy.should_cache(response, cache_data):
+                self.__store_response(request, response, cache_data)
+        except:
+            Logger.error("Error storing cache for %s", request.url, exc_info=True)
 
-        * public - marks authenticated responses as cacheable; normally, if HTTP
-        authentication is required, responses are automatically private.
+        response.cacheStatus = "miss"
+        return response
 
-        * private - allows caches that are specific to one user (e.g., in a
-        browser) to store the response; shared caches (e.g., in a proxy) may
-        not.
+    def __get_cached_response(self, req):
+        """ Retrieves a cached response for a request.
 
-        * no-cache - forces caches to submit the request to the origin server for
-        validation before releasing a cached copy, every time. This is useful to
-        assure that authentication is respected (in combination with public), or
-        to maintain rigid freshness, without sacrificing all of the benefits of
-        caching.
+        :param requests.PreparedRequest req:    The request to find the cached response for.
 
-        * no-store - instructs caches not to keep a copy of the representation
-        under any conditions.
+        :return: The cached response, its cache data and the number of seconds it is stale
+                 (negative when it is still fresh), or None values if nothing was cached.
+        :rtype: tuple[requests.Response|None,dict[str,any]|None,float|None]
 
-        * must-revalidate - tells caches that they must obey any freshness
-        information you give them about a representation. HTTP allows caches to
-        serve stale representations under special conditions; by specifying this
-        header, you're telling the cache that you want it to strictly follow
-        your rules.
+        """
 
-        * proxy-revalidate - similar to must-revalidate, except that it only
-        applies to proxy caches.
+        cache_key = self.__get_cache_key(req)
+        if not self.cache_store.has_cache_key(cache_key):
+            Logger.debug("No-Cache-Hit: %s", req.url)
+            return None, None, None
 
-        :param dict[str,str] cache_data: Cached data from the request
+        try:
+            meta, body = self.cache_store.get(cache_key)
+        except KeyError:
+            Logger.debug("No-Cache-Hit (removed): %s", req.url)
+            return None, None, None
 
-        :returns: Indication if the request should be cached.
-        :rtype: bool
+        cache_data = meta.get("cache_data") or {}
+        Logger.trace("Cache-Data: %s", cache_data)
 
+        # If the response varies on request headers, they should match the stored ones.
+        stored_vary = meta.get("vary")
+        if stored_vary and self.cache_policy.get_vary_values(req.headers, cache_data) != stored_vary:
+            Logger.debug("No-Cache-Hit due to Vary mismatch on %s: %s", list(stored_vary.keys()), req.url)
+            return None, None, None
 
-        """
+        resp = requests.Response()
+        resp.url = meta.get("url", req.url)
+        resp.raw = body
+        resp.status_code = meta["status"]
+        resp.reason = meta.get("reason")
+        resp.headers = CaseInsensitiveDict(data=meta["headers"])
+        resp.encoding = meta["encoding"]
+        resp.request = req
+        return resp, cache_data, self.cache_store.get_staleness(cache_key)
 
-        if res.request.method != "GET":
-            Logger.trace("Not a GET method. Not caching.")
+    def __may_serve_stale_on_error(self, cached_response, cache_data, staleness):
+        if cached_response is None:
             return False
+        return staleness <= self.cache_policy.get_stale_if_error(cache_data)
 
-        if res.status_code < 200 or res.status_code >= 300:
-            Logger.trace("No 2xx response code. Not caching.")
-            return False
+    def __revalidate_in_background(self, request, cache_data, send_kwargs):
+        """ Revalidates (or refreshes) a stale cached response on a background thread.
 
-        if "no-cache" in cache_data or "no-store" in cache_data:
-            Logger.trace("CacheKey No-Cache or No-Store found. Not caching")
-            return False
+        :param requests.PreparedRequest request:    The request to revalidate.
+        :param dict[str,any] cache_data:            The cache data of the stale response.
+        :param dict[str,any] send_kwargs:           The keyword arguments for sending.
 
-        # must revalidate means that you must revalidate after the cache became
-        # stale. So after the cache expired.
-        if "must-revalidate" in cache_data or "proxy-revalidate" in cache_data:
-            Logger.trace("CacheKey Must-Revalidate or proxy-revalidate found. Caching")
-            return True
+        """
 
-        if "max-age" in cache_data:
-            Logger.trace("Max-Age found (%s). Caching", cache_data['max-age'])
-            return True
+        revalidation_request = request.copy()
+        if self.cache_policy.can_revalidate(cache_data):
+            self.cache_policy.add_validators(revalidation_request.headers, cache_data)
 
-        Logger.trace("Unknown cache parameters. Let's just cache")
-        return True
+        def revalidate():
+            try:
+                response = super(CacheHTTPAdapter, self).send(revalidation_request, **send_kwargs)
+                if response.status_code == 304:
+                    cached_response, stale_data, _ = self.__get_cached_response(request)
+                    self.__process_response(revalidation_request, response, cached_response, stale_data)
+                else:
+                    self.__process_response(revalidation_request, response, None, None)
+                    # Make sure the body was read and the connection was released.
+                    response.close()
+            except:
+                Logger.warning("Background revalidation failed for %s", request.url, exc_info=True)
+            finally:
+                with self.__revalidations_lock:
+                    self.__revalidations.remove(thread)
+
+        thread = threading.Thread(target=revalidate, name="Revalidate {0}".format(request.url))
+        thread.daemon = True
+        with self.__revalidations_lock:
+            self.__revalidations.append(thread)
+        thread.start()
 
     def __store_response(self, req, res, cache_data):
         Logger.debug("Storing cache for: %s", res.url)
-        body_key, meta_key = self.__get_cache_keys(req)
-
-        # Store the body as a binary file and reset the raw and _content_consumed attributes
-        # of the response so we can reuse it again
-        with self.cache_store.set(body_key) as fp:
-            for chunk in res.iter_content(chunk_size=128):
-                fp.write(chunk)
-
-        # we need to restore some original response protected members and the raw content. The
-        # latter is an urllib3 response, but we can use an BytesIO as long as we add some required
-        # stuff such as _original_response.
-        original_response = None
-        if hasattr(res.raw, '_original_response'):
-            original_response = res.raw._original_response
-
-        # set the raw content so we can use it again
-        res.raw = self.cache_store.get(body_key)
-        res._content_consumed = False
-        if original_response:
-            res.raw._original_response = original_response
-
-        # store all headers and cache-data and store it in a json file
-        data = {
-            "body": body_key,
+        cache_key = self.__get_cache_key(req)
+
+        # store all headers and cache-data together with the body
+        meta = {
             "url": res.url,
             "headers": dict(
                 (k, v) for k, v in res.headers.items()
@@ -242,47 +228,53 @@ class CacheHTTPAdapter(HTTPAdapter):
             "status": res.status_code,
             "reason": res.reason,
             "encoding": res.encoding,
-            "cache_data": cache_data
+            "cache_data": cache_data,
+            "vary": self.cache_policy.get_vary_values(req.headers, cache_data)
         }
-        with self.cache_store.set(meta_key) as fp:
-            json_str = json.dumps(data, indent=2)
-            fp.write(json_str.encode())
-        Logger.trace(data)
+        Logger.trace(meta)
+
+        # Determine the maximum age of the response.
+        valid_in_seconds = self.cache_policy.get_freshness_lifetime(req.url, cache_data)
 
+        # Read the full body once and store it in a single write. The response keeps the body
+        # in memory, so there is no need to re-read it from the cache.
+        body = res.content
+        compress = self.__is_text_content_type(res.headers.get("content-type", ""))
+        with self.cache_store.set(cache_key, meta, expires_in=valid_in_seconds, compress=compress) as fp:
+            fp.write(body)
         return
 
-    def __must_revalidate(self, cache_data):
-        """ Checks if a cached response should be revalidated
+    def __is_text_content_type(self, content_type):
+        """ Checks whether a content type is text based and thus compresses well.
 
-        Arguments:
-        meta_data : dict - the response to check.
+        :param str content_type:    The content-type header value.
 
-        If True is returned the response has a must-revalidate cache parameters
-        and an ETAG.
+        :return: Indication whether the content is text.
+        :rtype: bool
 
         """
 
-        # No cache data present, so no need to revalidate the thing.
-        if not cache_data:
-            Logger.trace("No cache data found for a cached request. No "
-                         "need to revalidate as it's either expired or not.")
-            return False
+        content_type = content_type.split(";", 1)[0].strip().lower()
+        if content_type.startswith("text/"):
+            return True
 
-        # Only revalidate if we were told and if we have an etag
-        # if "must-revalidate" in cache_data or "proxy-revalidate" in cache_data:
-        #     if "etag" in cache_data:
-        #         return True
+        return content_type.endswith(("json", "xml", "javascript", "mpegurl"))
 
-        # always revalidate a etag as many sites don't provide the ....-revalidate option.
-        if "etag" in cache_data:
-            return True
+    def __get_cache_key(self, req):
+        """ Generates the cache key for a request. Requests with a different `Authorization`
+        header get different keys, so responses for other credentials are never served.
 
-        return False
+        :param requests.PreparedRequest req:    The request.
+
+        :return: The cache key.
+        :rtype: str
+
+        """
 
-    def __get_cache_keys(self, req):
         hash_tool = hashlib.md5()
         hash_tool.update(req.url.encode())
-        key = hash_tool.hexdigest()
-        body_file = "{0}.body".format(key)
-        meta_file = "{0}.meta".format(key)
-        return body_file, meta_file
+        authorization = req.headers.get("authorization")
+        if authorization:
+            hash_tool.update(b"\n")
+            hash_tool.update(authorization.encode())
+        return hash_tool.hexdigest()
@@ -0,0 +1,297 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import re
+import time
+from email.utils import parsedate_tz, mktime_tz
+
+from resources.lib.logger import Logger
+
+
+class CachePolicy(object):
+    def __init__(self, default_ttl=3600, shared=False):
+        """ Determines if and for how long HTTP responses can be cached.
+
+        The freshness of a response is determined (in order of precedence) by a channel
+        specific TTL override, the `s-maxage` (shared caches only) and `max-age` Cache-Control
+        directives, the `Expires` header or a heuristic based on `Last-Modified`. If none
+        of these are present, the `default_ttl` is used.
+
+        :param int default_ttl:     The freshness lifetime for responses without any
+                                    freshness information.
+        :param bool shared:         Does this policy apply to a shared cache?
+
+        """
+
+        self.defaultTtl = default_ttl
+        self.shared = shared
+        self.__ttl_overrides = {}
+
+    def add_ttl_override(self, url_pattern, ttl):
+        """ Overrides the freshness lifetime for all URL's matching a regular expression.
+
+        :param str url_pattern:     The regular expression that the URL's should match.
+        :param int ttl:             The time in seconds the responses are considered fresh. If
+                                    0 is specified, the responses are never cached.
+
+        """
+
+        Logger.debug("Setting cache TTL override of %ss for '%s'", ttl, url_pattern)
+        self.__ttl_overrides[url_pattern] = (re.compile(url_pattern, re.IGNORECASE), ttl)
+
+    def get_ttl_override(self, url):
+        """ Returns the TTL override for a URL.
+
+        :param str url:     The URL to find the override for.
+
+        :return: The TTL in seconds or None if there is no override.
+        :rtype: int|None
+
+        """
+
+        for regex, ttl in self.__ttl_overrides.values():
+            if regex.search(url):
+                return ttl
+        return None
+
+    def extract_cache_data(self, headers):
+        """ Extracts cache data from the `cache-control`, `expires`, `last-modified`, `date`,
+        `age`, `vary` and `etag` headers.
+
+        :param dict headers:    The HTTP headers.
+
+        :return: The cache data from the headers.
+        :rtype: dict[str,any]
+
+        """
+
+        cache_data = {}
+
+        if "cache-control" in headers:
+            cache_control = headers['cache-control']
+            for entry in cache_control.strip().split(","):
+                if entry.find("=") > 0:
+                    (key, value) = entry.split("=", 1)
+                    try:
+                        cache_data[key.strip().lower()] = int(value.strip().strip('"'))
+                    except ValueError:
+                        cache_data[key.strip().lower()] = True
+                elif entry.strip():
+                    cache_data[entry.strip().lower()] = True
+
+        if "etag" in headers:
+            cache_data['etag'] = headers['etag']
+
+        if "last-modified" in headers:
+            cache_data['last-modified'] = headers['last-modified']
+
+        for header in ("expires", "date"):
+            if header in headers:
+                cache_data[header] = self.__parse_http_date(headers[header])
+
+        if "age" in headers:
+            try:
+                cache_data["age"] = int(headers["age"])
+            except ValueError:
+                pass
+
+        if "vary" in headers:
+            cache_data["vary"] = [v.strip().lower() for v in headers["vary"].split(",") if v.strip()]
+
+        if cache_data:
+            Logger.debug("Found cache-control and validator data: %s", cache_data)
+        return cache_data
+
+    def should_cache(self, res, cache_data):
+        """ Returns whether a response should be cached for further use. It uses
+        the "cache-control" header value and the type of response (https/2xx status)
+        to determine if a response should be cached.
+
+        These Cache-Control parameters are used:
+
+        * max-age=[seconds] - specifies the maximum amount of time that an
+        representation will be considered fresh. Similar to Expires, this
+        directive is relative to the time of the request, rather than absolute.
+        [seconds] is the number of seconds from the time of the request you wish
+        the representation to be fresh for.
+
+        * s-maxage=[seconds] - same as max-age but only for shared caches.
+
+        * no-cache - forces caches to submit the request to the origin server for
+        validation before releasing a cached copy, every time. So we only store it
+        if it can be revalidated (it has an ETag or Last-Modified header).
+
+        * no-store - instructs caches not to keep a copy of the representation
+        under any conditions.
+
+        * private - allows caches that are specific to one user to store the
+        response; shared caches may not.
+
+        * must-revalidate/proxy-revalidate - tells caches that they must obey any
+        freshness information you give them about a representation.
+
+        Responses with a `Vary: *` header or a TTL override of 0 are never cached.
+
+        :param requests.Response res:   The response to check.
+        :param dict[str,any] cache_data: Cached data from the request
+
+        :returns: Indication if the request should be cached.
+        :rtype: bool
+
+        """
+
+        if res.request.method != "GET":
+            Logger.trace("Not a GET method. Not caching.")
+            return False
+
+        if res.status_code < 200 or res.status_code >= 300:
+            Logger.trace("No 2xx response code. Not caching.")
+            return False
+
+        if self.get_ttl_override(res.request.url) == 0:
+            Logger.trace("TTL override of 0 found. Not caching")
+            return False
+
+        if "no-store" in cache_data:
+            Logger.trace("CacheKey No-Store found. Not caching")
+            return False
+
+        if self.shared and "private" in cache_data:
+            Logger.trace("CacheKey Private found for shared cache. Not caching")
+            return False
+
+        if "*" in cache_data.get("vary", []):
+            Logger.trace("Vary: * found. Not caching")
+            return False
+
+        if "no-cache" in cache_data and not self.can_revalidate(cache_data):
+            Logger.trace("CacheKey No-Cache found without validators. Not caching")
+            return False
+
+        Logger.trace("Caching response with cache data: %s", cache_data)
+        return True
+
+    def get_freshness_lifetime(self, url, cache_data):
+        """ Determines the number of seconds a response is considered fresh, corrected for the
+        age the response already had.
+
+        :param str url:                     The URL of the response.
+        :param dict[str,any] cache_data:    The cache data of the response.
+
+        :return: The remaining freshness lifetime in seconds.
+        :rtype: int
+
+        """
+
+        ttl = self.get_ttl_override(url)
+        if ttl is not None:
+            return ttl
+
+        if "no-cache" in cache_data:
+            return 0
+
+        if self.shared and "s-maxage" in cache_data:
+            lifetime = cache_data["s-maxage"]
+        elif "max-age" in cache_data:
+            lifetime = cache_data["max-age"]
+        elif "expires" in cache_data:
+            date = cache_data.get("date") or int(time.time())
+            # An invalid expires means already expired.
+            lifetime = (cache_data["expires"] or 0) - date
+        elif "last-modified" in cache_data and cache_data.get("date"):
+            # RFC 7234 heuristic: 10% of the time since the last modification.
+            last_modified = self.__parse_http_date(cache_data["last-modified"]) or cache_data["date"]
+            lifetime = min(self.defaultTtl, (cache_data["date"] - last_modified) // 10)
+        else:
+            lifetime = self.defaultTtl
+
+        if not isinstance(lifetime, int) or isinstance(lifetime, bool):
+            lifetime = 0
+        return max(0, lifetime - cache_data.get("age", 0))
+
+    def get_stale_while_revalidate(self, cache_data):
+        """ The number of seconds a stale response may be served while it is revalidated in
+        the background.
+
+        :param dict[str,any] cache_data:    The cache data of the response.
+
+        :rtype: int
+
+        """
+
+        if "must-revalidate" in cache_data or "no-cache" in cache_data:
+            return 0
+        return self.__get_seconds(cache_data, "stale-while-revalidate")
+
+    def get_stale_if_error(self, cache_data):
+        """ The number of seconds a stale response may be served if the origin fails.
+
+        :param dict[str,any] cache_data:    The cache data of the response.
+
+        :rtype: int
+
+        """
+
+        if "must-revalidate" in cache_data:
+            return 0
+        return self.__get_seconds(cache_data, "stale-if-error")
+
+    def can_revalidate(self, cache_data):
+        """ Checks if a cached response can be revalidated using conditional requests.
+
+        :param dict[str,any] cache_data:    The cache data of the response.
+
+        :return: True if there is an ETag or Last-Modified validator.
+        :rtype: bool
+
+        """
+
+        if not cache_data:
+            return False
+        return "etag" in cache_data or "last-modified" in cache_data
+
+    def add_validators(self, headers, cache_data):
+        """ Adds the conditional request headers for revalidating a cached response.
+
+        :param dict headers:                The request headers to update.
+        :param dict[str,any] cache_data:    The cache data of the response.
+
+        """
+
+        if "etag" in cache_data:
+            headers["If-None-Match"] = cache_data["etag"]
+        if "last-modified" in cache_data:
+            headers["If-Modified-Since"] = cache_data["last-modified"]
+
+    def get_vary_values(self, request_headers, cache_data):
+        """ Returns the request header values for the headers listed in the `Vary` header.
+
+        :param dict request_headers:        The headers of the request.
+        :param dict[str,any] cache_data:    The cache data of the response.
+
+        :return: The values of the headers that the response varies on.
+        :rtype: dict[str,str|None]
+
+        """
+
+        return dict((h, request_headers.get(h)) for h in cache_data.get("vary", []))
+
+    def __get_seconds(self, cache_data, directive):
+        value = cache_data.get(directive, 0)
+        if isinstance(value, bool):
+            return 0
+        return value
+
+    def __parse_http_date(self, value):
+        """ Parses a HTTP date (RFC 7231) into a Unix timestamp.
+
+        :param str value:   The date string.
+
+        :return: The timestamp or None if it was invalid.
+        :rtype: int|None
+
+        """
+
+        date_tuple = parsedate_tz(value)
+        if date_tuple is None:
+            return None
+        return int(mktime_tz(date_tuple))
@@ -0,0 +1,253 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import io
+import os
+import pickle
+import time
+
+from resources.lib.backtothefuture import PY2
+if PY2:
+    # noinspection PyCompatibility,PyUnresolvedReferences
+    from cookielib import Cookie, CookieJar, MozillaCookieJar, LoadError
+else:
+    # noinspection PyCompatibility
+    from http.cookiejar import Cookie, CookieJar, MozillaCookieJar, LoadError
+
+from resources.lib.connectivity.streamcache import replace_file, get_temp_file_name
+from resources.lib.logger import Logger
+
+
+class CookieStore(CookieJar):
+    __MAGIC = b"RCJ1"
+
+    # The Cookie attributes that are stored (in the order of the Cookie constructor).
+    __FIELDS = ("version", "name", "value", "port", "port_specified", "domain",
+                "domain_specified", "domain_initial_dot", "path", "path_specified",
+                "secure", "expires", "discard", "comment", "comment_url", "_rest")
+
+    def __init__(self, filename, policy=None):
+        """ Creates a cookie jar that is persisted in a binary file.
+
+        Changes to the jar only mark it as dirty. The cookies are written to disk with a single
+        write once `save()` is called, and only if something was changed. Other processes might
+        have changed the file in the meantime, so the changes of this jar are applied to the
+        cookies on disk before they are written. Files in the old Mozilla text format are
+        converted on the first save.
+
+        :param str filename:            The file to store the cookies in.
+        :param CookiePolicy policy:     The cookie policy to use.
+
+        """
+
+        CookieJar.__init__(self, policy)
+        self.filename = filename
+        self.dirty = False
+        # The changes since the last save: ("set", Cookie) or ("clear", (domain, path, name))
+        self.__changes = []
+
+    def set_cookie(self, cookie):
+        """ Sets a cookie and marks the jar as changed.
+
+        :param Cookie cookie:   The cookie to set.
+
+        """
+
+        self._cookies_lock.acquire()
+        try:
+            existing = self._cookies.get(cookie.domain, {}).get(cookie.path, {}).get(cookie.name)
+            if existing is None or self.__get_values(existing) != self.__get_values(cookie):
+                self.dirty = True
+                self.__changes.append(("set", cookie))
+            CookieJar.set_cookie(self, cookie)
+        finally:
+            self._cookies_lock.release()
+
+    def clear(self, domain=None, path=None, name=None):
+        """ Clears some cookies and marks the jar as changed.
+
+        :param str domain:  Only clear the cookies for this domain.
+        :param str path:    Only clear the cookies for this path (requires a domain).
+        :param str name:    Only clear the cookies with this name (requires a domain and path).
+
+        """
+
+        CookieJar.clear(self, domain, path, name)
+        self.dirty = True
+        self.__changes.append(("clear", (domain, path, name)))
+
+    def clear_session_cookies(self):
+        """ Clears all session cookies and marks the jar as changed. Session cookies are never
+        written to disk, so this does not change the file. """
+
+        CookieJar.clear_session_cookies(self)
+        self.dirty = True
+
+    def load(self, filename=None):
+        """ Loads the cookies from disk with a single read.
+
+        :param str filename:    The file to load from (defaults to the jar's file).
+
+        """
+
+        filename = filename or self.filename
+        if not os.path.isfile(filename):
+            return
+
+        start = time.time()
+        domains = self.__read(filename)
+        if domains is None:
+            self.__load_legacy(filename)
+            return
+
+        now = time.time()
+        self._cookies_lock.acquire()
+        try:
+            for cookies in domains.values():
+                for values in cookies:
+                    cookie = Cookie(*values)
+                    if cookie.expires is not None and cookie.expires <= now:
+                        continue
+                    CookieJar.set_cookie(self, cookie)
+        finally:
+            self._cookies_lock.release()
+
+        Logger.debug("Loaded %d cookies from '%s' in %.2f ms",
+                     len(self), filename, (time.time() - start) * 1000)
+
+    def save(self, filename=None):
+        """ Writes the cookies to disk if the jar was changed. Just like the Mozilla cookie jar
+        session cookies and expired cookies are not stored.
+
+        :param str filename:    The file to write to (defaults to the jar's file).
+
+        """
+
+        if not self.dirty:
+            return
+
+        filename = filename or self.filename
+        now = time.time()
+        on_disk = self.__read(filename) if os.path.isfile(filename) else None
+
+        # Only the merge is done inside the lock, so parallel requests are not blocked while
+        # writing to disk.
+        self._cookies_lock.acquire()
+        try:
+            self.dirty = False
+            changes = self.__changes
+            self.__changes = []
+            if on_disk is not None:
+                self.__merge(on_disk, changes)
+
+            domains = {}
+            for cookie in self:
+                if cookie.discard or (cookie.expires is not None and cookie.expires <= now):
+                    continue
+                domains.setdefault(cookie.domain, []).append(self.__get_values(cookie))
+        finally:
+            self._cookies_lock.release()
+
+        data = CookieStore.__MAGIC + pickle.dumps(domains, protocol=2)
+        temp_file = get_temp_file_name(filename)
+        try:
+            with io.open(temp_file, "wb") as fp:
+                fp.write(data)
+            replace_file(temp_file, filename)
+        except:
+            self.dirty = True
+            self.__changes = changes + self.__changes
+            Logger.error("Error saving cookies to '%s'", filename, exc_info=True)
+            if os.path.isfile(temp_file):
+                os.remove(temp_file)
+            return
+
+        Logger.debug("Saved %d bytes of cookies to '%s'", len(data), filename)
+
+    def __merge(self, domains, changes):
+        """ Replaces the cookies of this jar with the ones on disk, with the changes of this
+        jar applied on top of them. The session cookies of this jar are kept.
+
+        :param dict[str,list[tuple]] domains:   The cookies on disk per domain.
+        :param list[tuple] changes:             The changes of this jar since the last save.
+
+        """
+
+        merged = CookieJar()
+        for cookies in domains.values():
+            for values in cookies:
+                CookieJar.set_cookie(merged, Cookie(*values))
+
+        for change, value in changes:
+            if change == "set":
+                CookieJar.set_cookie(merged, value)
+                continue
+
+            try:
+                CookieJar.clear(merged, *value)
+            except KeyError:
+                # another process already removed them
+                pass
+
+        for cookie in self:
+            if cookie.discard:
+                CookieJar.set_cookie(merged, cookie)
+        self._cookies = merged._cookies
+
+    def __read(self, filename):
+        """ Reads the cookies from a binary cookie file with a single read.
+
+        :param str filename:    The file to read from.
+
+        :return: The cookie values per domain, or None if the file is not a (valid) binary
+                 cookie file.
+        :rtype: dict[str,list[tuple]]|None
+
+        """
+
+        try:
+            with io.open(filename, "rb") as fp:
+                data = fp.read()
+            if not data.startswith(CookieStore.__MAGIC):
+                return None
+            return pickle.loads(data[len(CookieStore.__MAGIC):])
+        except Exception:
+            Logger.error("Error loading cookies from '%s'", filename, exc_info=True)
+            return None
+
+    def __load_legacy(self, filename):
+        """ Loads the cookies from an old Mozilla text cookie file. They will be converted to
+        the binary format on the next save.
+
+        :param str filename:    The file to load from.
+
+        """
+
+        legacy_jar = MozillaCookieJar(filename)
+        try:
+            legacy_jar.load()
+        except (LoadError, IOError):
+            Logger.warning("Cannot convert old cookie file '%s'", filename, exc_info=True)
+            return
+
+        self._cookies_lock.acquire()
+        try:
+            for cookie in legacy_jar:
+                CookieJar.set_cookie(self, cookie)
+            self.dirty = True
+        finally:
+            self._cookies_lock.release()
+        Logger.info("Converted %d cookies from old cookie file '%s'", len(self), filename)
+
+    def __get_values(self, cookie):
+        """ Returns the values of a cookie in the order of the Cookie constructor.
+
+        :param Cookie cookie:   The cookie.
+
+        :rtype: tuple
+
+        """
+
+        return tuple(getattr(cookie, field) for field in CookieStore.__FIELDS)
+
+    def __str__(self):
+        return "CookieStore [{0} cookies, dirty={1}]".format(len(self), self.dirty)
@@ -0,0 +1,240 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import io
+import json
+import os
+import threading
+import time
+
+from resources.lib.backtothefuture import PY2
+if PY2:
+    # noinspection PyUnresolvedReferences
+    import urlparse as parse
+else:
+    # noinspection PyUnresolvedReferences
+    import urllib.parse as parse
+
+from resources.lib.connectivity.streamcache import replace_file, get_temp_file_name
+from resources.lib.logger import Logger
+
+
+class RequestMetrics(object):
+    # The cache states of responses that did not use the network for the body.
+    CACHED_STATES = ("hit", "stale", "stale-error", "revalidated")
+
+    # The maximum number of endpoints that are kept in the session file.
+    __MAX_ENDPOINTS = 250
+
+    def __init__(self):
+        """ Collects timing and size information of all HTTP requests done by the UriHandler.
+
+        The requests are attributed to the channel and the data parser that are set using
+        `set_context()`. At the end of each plugin call `store()` logs a summary of the call and
+        aggregates it into a session file.
+
+        """
+
+        self.records = []
+        self.channel = None
+        self.parser = None
+        self.__totals = {}
+        self.__lock = threading.Lock()
+
+    def set_context(self, channel=None, parser=None):
+        """ Sets the channel and the data parser that the next requests are attributed to.
+
+        :param str|None channel:    The name of the channel.
+        :param str|None parser:     The name (or match) of the data parser.
+
+        """
+
+        self.channel = channel
+        self.parser = parser
+
+    def record(self, method, url, response, duration, attempts=1, error=None, stream=False):
+        """ Records a request.
+
+        :param str method:                          The HTTP method.
+        :param str url:                             The URL that was requested.
+        :param requests.Response|None response:     The final response (if any).
+        :param float duration:                      The total duration including all attempts.
+        :param int attempts:                        The number of attempts that were done.
+        :param str|None error:                      The name of the error if it failed.
+        :param bool stream:                         Was the response streamed (the body is not
+                                                    read yet)?
+
+        """
+
+        url_parts = parse.urlparse(url)
+        record = {
+            "method": method,
+            "host": url_parts.netloc.lower(),
+            "endpoint": "{0}{1}".format(url_parts.netloc.lower(), url_parts.path),
+            "channel": self.channel,
+            "parser": self.parser,
+            "status": None,
+            "total": round(duration, 4),
+            "ttfb": None,
+            "bytes": 0,
+            "cache": "uncached",
+            "attempts": attempts,
+            "hedged": False,
+            "error": error
+        }
+
+        if response is not None:
+            record["status"] = response.status_code
+            record["cache"] = getattr(response, "cacheStatus", None) or "uncached"
+            record["hedged"] = getattr(response, "hedged", False)
+            if record["cache"] not in RequestMetrics.CACHED_STATES:
+                # The time until the headers were parsed.
+                record["ttfb"] = round(response.elapsed.total_seconds(), 4)
+                if stream:
+                    record["bytes"] = int(response.headers.get("content-length", 0) or 0)
+                else:
+                    record["bytes"] = len(response.content or b"")
+
+        stats = self.__get_stats(record)
+        with self.__lock:
+            self.records.append(record)
+            self.__add_stats(self.__totals, stats)
+
+    def get_totals(self):
+        """ Returns the totals of the recorded requests, without summarizing all records.
+
+        :return: The totals, the same as the `totals` of `get_summary()`.
+        :rtype: dict[str,int|float]
+
+        """
+
+        with self.__lock:
+            return dict(self.__totals)
+
+    def clear(self):
+        """ Clears the recorded requests without storing them. """
+
+        with self.__lock:
+            self.records = []
+            self.__totals = {}
+
+    def get_summary(self):
+        """ Creates a summary of all recorded requests.
+
+        :return: The totals, the cache states and the statistics per host, channel, data parser
+                 and endpoint. Also includes the slowest requests.
+        :rtype: dict[str,any]
+
+        """
+
+        with self.__lock:
+            records = list(self.records)
+        return self.__summarize(records)
+
+    def store(self, path, new_session=False):
+        """ Logs a JSON summary of the recorded requests, adds them to the aggregate in the
+        session file and clears the recorded requests.
+
+        :param str path:            The session file to aggregate into.
+        :param bool new_session:    Start a new session aggregate.
+
+        """
+
+        with self.__lock:
+            records = self.records
+            self.records = []
+            self.__totals = {}
+
+        if not records:
+            return
+
+        summary = self.__summarize(records)
+        Logger.debug("HTTP request summary:\n%s", json.dumps(summary, sort_keys=True, indent=2))
+
+        session = None
+        if not new_session and os.path.isfile(path):
+            try:
+                with io.open(path, "rb") as fp:
+                    session = json.loads(fp.read().decode("utf-8"))
+            except:
+                Logger.warning("Error reading HTTP request summary '%s'", path, exc_info=True)
+
+        if not session:
+            session = self.__create_aggregate()
+            session["started"] = int(time.time())
+            session["calls"] = 0
+
+        session["calls"] += 1
+        session["updated"] = int(time.time())
+        self.__add_stats(session["totals"], summary["totals"])
+        for state, count in summary["cache"].items():
+            session["cache"][state] = session["cache"].get(state, 0) + count
+        for group in ("hosts", "channels", "parsers", "endpoints"):
+            for key, stats in summary[group].items():
+                self.__add_stats(session[group].setdefault(key, {}), stats)
+
+        if len(session["endpoints"]) > RequestMetrics.__MAX_ENDPOINTS:
+            endpoints = sorted(session["endpoints"].items(), key=lambda e: e[1]["time"], reverse=True)
+            session["endpoints"] = dict(endpoints[:RequestMetrics.__MAX_ENDPOINTS])
+
+        temp_file = get_temp_file_name(path)
+        try:
+            # open the file as binary file, as json.dumps will already encode as utf-8 bytes
+            with io.open(temp_file, "wb") as fp:
+                fp.write(json.dumps(session, sort_keys=True, indent=1).encode("utf-8"))
+            replace_file(temp_file, path)
+        except:
+            Logger.error("Error storing HTTP request summary '%s'", path, exc_info=True)
+            if os.path.isfile(temp_file):
+                os.remove(temp_file)
+
+    def __summarize(self, records):
+        """ Aggregates records into a summary.
+
+        :param list[dict[str,any]] records:     The records to summarize.
+
+        :rtype: dict[str,any]
+
+        """
+
+        summary = self.__create_aggregate()
+        for record in records:
+            stats = self.__get_stats(record)
+            self.__add_stats(summary["totals"], stats)
+            summary["cache"][record["cache"]] = summary["cache"].get(record["cache"], 0) + 1
+            for group in ("host", "channel", "parser", "endpoint"):
+                key = record[group] or "<none>"
+                self.__add_stats(summary["{0}s".format(group)].setdefault(key, {}), stats)
+
+        summary["slowest"] = sorted(records, key=lambda r: r["total"], reverse=True)[:5]
+        return summary
+
+    def __create_aggregate(self):
+        return {"totals": {}, "cache": {}, "hosts": {}, "channels": {}, "parsers": {},
+                "endpoints": {}}
+
+    def __get_stats(self, record):
+        """ Converts a single record into statistics that can be added up.
+
+        :param dict[str,any] record:    The record.
+
+        :rtype: dict[str,int|float]
+
+        """
+
+        return {
+            "requests": 1,
+            "time": record["total"],
+            "ttfb": record["ttfb"] or 0,
+            "bytes": record["bytes"],
+            "errors": int(record["error"] is not None or (record["status"] or 0) >= 400),
+            "cached": int(record["cache"] in RequestMetrics.CACHED_STATES),
+            "retries": record["attempts"] - 1,
+            "hedged": int(record["hedged"])
+        }
+
+    def __add_stats(self, target, stats):
+        for key, value in stats.items():
+            target[key] = round(target.get(key, 0) + value, 4)
+
+    def __str__(self):
+        return "RequestMetrics [{0} requests]".format(len(self.records))
@@ -0,0 +1,162 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import random
+import re
+
+from resources.lib.logger import Logger
+
+
+class RetryPolicy(object):
+    # Methods that can safely be sent more than once.
+    IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, max_attempts=3, backoff_factor=0.5, backoff_max=10.0,
+                 retry_status_codes=(429, 500, 502, 503, 504),
+                 connect_timeout=10, read_timeout=30, hedge_after=None):
+        """ Determines how often and when failed HTTP requests are retried.
+
+        Idempotent requests are retried on connection errors, timeouts and the
+        `retry_status_codes`. Other requests (POST) are only retried if the connection could not
+        be established, as the server never received them.
+
+        The delay before each retry is `backoff_factor * 2 ^ (retry - 1)` seconds (with some
+        jitter), limited by `backoff_max` and a `Retry-After` header if the server sends one.
+
+        :param int max_attempts:                The maximum number of attempts (1 disables
+                                                retrying).
+        :param float backoff_factor:            The base delay in seconds between attempts.
+        :param float backoff_max:               The maximum delay between attempts.
+        :param tuple[int] retry_status_codes:   The HTTP status codes that should be retried.
+        :param float|None connect_timeout:      The timeout for setting up a connection (None
+                                                to use the read timeout).
+        :param float read_timeout:              The timeout for waiting on the server response.
+        :param float|None hedge_after:          Send a second, identical GET request if there is
+                                                no response after this number of seconds and
+                                                use whichever returns first (None disables it).
+
+        """
+
+        self.maxAttempts = max(1, max_attempts)
+        self.backoffFactor = backoff_factor
+        self.backoffMax = backoff_max
+        self.retryStatusCodes = tuple(retry_status_codes)
+        self.connectTimeout = connect_timeout
+        self.readTimeout = read_timeout
+        self.hedgeAfter = hedge_after
+        self.__overrides = {}
+
+    def add_override(self, url_pattern, **kwargs):
+        """ Uses a different policy for all URL's matching a regular expression. The values that
+        are not specified are taken from this policy.
+
+        :param str url_pattern:     The regular expression that the URL's should match.
+        :param kwargs:              The values to override (see the RetryPolicy constructor).
+
+        :return: The new policy for the matching URL's.
+        :rtype: RetryPolicy
+
+        """
+
+        values = dict(
+            max_attempts=self.maxAttempts, backoff_factor=self.backoffFactor,
+            backoff_max=self.backoffMax, retry_status_codes=self.retryStatusCodes,
+            connect_timeout=self.connectTimeout, read_timeout=self.readTimeout,
+            hedge_after=self.hedgeAfter
+        )
+        values.update(kwargs)
+        policy = RetryPolicy(**values)
+
+        Logger.debug("Setting %s for '%s'", policy, url_pattern)
+        self.__overrides[url_pattern] = (re.compile(url_pattern, re.IGNORECASE), policy)
+        return policy
+
+    def get_policy(self, url):
+        """ Returns the policy that applies to a URL.
+
+        :param str url:     The URL to find the policy for.
+
+        :return: The override for the URL or this policy if there is none.
+        :rtype: RetryPolicy
+
+        """
+
+        for regex, policy in self.__overrides.values():
+            if regex.search(url):
+                return policy
+        return self
+
+    def get_timeout(self):
+        """ Returns the timeout to pass on to Requests.
+
+        :return: The connect and read timeout.
+        :rtype: tuple[float,float]|float
+
+        """
+
+        if self.connectTimeout is None:
+            return self.readTimeout
+        return self.connectTimeout, self.readTimeout
+
+    def should_retry_status(self, method, status_code, attempt):
+        """ Should a request that resulted in a specific status code be retried?
+
+        :param str method:          The HTTP method of the request.
+        :param int status_code:     The resulting status code.
+        :param int attempt:         The number of attempts that were already done.
+
+        :rtype: bool
+
+        """
+
+        return attempt < self.maxAttempts \
+            and method.upper() in RetryPolicy.IDEMPOTENT_METHODS \
+            and status_code in self.retryStatusCodes
+
+    def should_retry_error(self, method, attempt, connect_error):
+        """ Should a request that failed with a connection error or timeout be retried?
+
+        :param str method:          The HTTP method of the request.
+        :param int attempt:         The number of attempts that were already done.
+        :param bool connect_error:  Did the error occur while connecting (the request was not
+                                    sent)?
+
+        :rtype: bool
+
+        """
+
+        if attempt >= self.maxAttempts:
+            return False
+        return connect_error or method.upper() in RetryPolicy.IDEMPOTENT_METHODS
+
+    def can_hedge(self, method, stream):
+        """ Can a hedged request be sent for a request?
+
+        :param str method:      The HTTP method of the request.
+        :param bool stream:     Is the response streamed?
+
+        :rtype: bool
+
+        """
+
+        return bool(self.hedgeAfter) and not stream and method.upper() == "GET"
+
+    def get_backoff(self, attempt, retry_after=None):
+        """ Returns the number of seconds to wait before the next attempt.
+
+        :param int attempt:             The number of attempts that were already done.
+        :param str|None retry_after:    The value of a `Retry-After` header.
+
+        :rtype: float
+
+        """
+
+        if retry_after and retry_after.strip().isdigit():
+            return min(float(retry_after), self.backoffMax)
+
+        backoff = self.backoffFactor * (2 ** (attempt - 1))
+        backoff += random.uniform(0, self.backoffFactor / 2.0)
+        return min(backoff, self.backoffMax)
+
+    def __str__(self):
+        return "RetryPolicy [maxAttempts={0}, backoff={1}s, timeout={2}, hedgeAfter={3}]".format(
+            self.maxAttempts, self.backoffFactor, self.get_timeout(), self.hedgeAfter)
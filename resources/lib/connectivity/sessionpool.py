@@ -0,0 +1,172 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter, DEFAULT_POOLSIZE
+
+from resources.lib.backtothefuture import PY2
+if PY2:
+    # noinspection PyUnresolvedReferences
+    import urlparse as parse
+else:
+    # noinspection PyUnresolvedReferences
+    import urllib.parse as parse
+
+from resources.lib.connectivity.cachehttpadapter import CacheHTTPAdapter
+from resources.lib.logger import Logger
+
+
+class SessionPool(object):
+    def __init__(self, cache_store=None, pool_size=DEFAULT_POOLSIZE, idle_timeout=60, cache_policy=None):
+        """ Creates a process wide pool of keep-alive Requests sessions.
+
+        Sessions are keyed by host, proxy, SSL verification mode and caching mode, so
+        subsequent requests to the same host re-use the already open (TLS) connections.
+
+        :param StreamCache|None cache_store:    The cache store to use for cached sessions.
+        :param int pool_size:                   The maximum number of connections per host.
+        :param int idle_timeout:                Close sessions that were idle for this number
+                                                of seconds.
+        :param CachePolicy|None cache_policy:   The policy for the cached sessions.
+
+        """
+
+        self.cacheStore = cache_store
+        self.cachePolicy = cache_policy
+        self.poolSize = pool_size
+        self.idleTimeout = idle_timeout
+
+        # Statistics of sessions that were already closed.
+        self.__closed_connections = 0
+        self.__closed_requests = 0
+
+        self.__sessions = {}
+        self.__lock = threading.RLock()
+
+    def get_session(self, uri, cookie_jar, proxies=None, verify=True, use_cache=True):
+        """ Returns a (pooled) session for the given uri and connection properties.
+
+        :param str uri:                         The URI that will be requested.
+        :param CookieJar cookie_jar:            The cookie jar to attach to the session.
+        :param dict[str,str]|None proxies:      The proxies to use.
+        :param bool verify:                     Should the SSL certificates be verified.
+        :param bool use_cache:                  Should the session use the cache store.
+
+        :return: A Requests session with the correct adapters mounted.
+        :rtype: requests.Session
+
+        """
+
+        url_parts = parse.urlparse(uri)
+        host = "{0}://{1}".format(url_parts.scheme, url_parts.netloc).lower()
+        proxy_key = tuple(sorted(proxies.items())) if proxies else None
+        use_cache = use_cache and self.cacheStore is not None
+        key = (host, proxy_key, verify, use_cache)
+
+        with self.__lock:
+            self.__close_idle_sessions()
+
+            session, _ = self.__sessions.get(key, (None, None))
+            if session is None:
+                Logger.debug("Creating new pooled session for %s (proxy=%s, verify=%s, cache=%s)",
+                             host, proxy_key is not None, verify, use_cache)
+                session = self.__create_session(verify, use_cache)
+
+            # The cookie jar can be replaced, so always make sure we use the current one.
+            session.cookies = cookie_jar
+            self.__sessions[key] = (session, time.time())
+            return session
+
+    def get_connection_counts(self):
+        """ Returns the number of new and re-used connections in this pool.
+
+        :return: A tuple with the number of new and the number of re-used connections.
+        :rtype: tuple[int,int]
+
+        """
+
+        connections = self.__closed_connections
+        requests_done = self.__closed_requests
+        with self.__lock:
+            for session, _ in self.__sessions.values():
+                session_connections, session_requests = self.__get_session_counts(session)
+                connections += session_connections
+                requests_done += session_requests
+
+        return connections, max(0, requests_done - connections)
+
+    def close(self):
+        """ Closes all pooled sessions and their connections. """
+
+        with self.__lock:
+            for key in list(self.__sessions.keys()):
+                self.__close_session(key)
+
+    def __create_session(self, verify, use_cache):
+        session = requests.Session()
+        session.verify = verify
+
+        if use_cache:
+            Logger.trace("Adding the %s to the session", self.cacheStore)
+            adapter = CacheHTTPAdapter(self.cacheStore, cache_policy=self.cachePolicy,
+                                       pool_maxsize=self.poolSize)
+        else:
+            adapter = HTTPAdapter(pool_maxsize=self.poolSize)
+
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def __close_idle_sessions(self):
+        if not self.idleTimeout:
+            return
+
+        idle_limit = time.time() - self.idleTimeout
+        for key, (_, last_used) in list(self.__sessions.items()):
+            if last_used < idle_limit:
+                Logger.debug("Closing idle pooled session for %s", key[0])
+                self.__close_session(key)
+
+    def __close_session(self, key):
+        session, _ = self.__sessions.pop(key)
+        connections, requests_done = self.__get_session_counts(session)
+        self.__closed_connections += connections
+        self.__closed_requests += requests_done
+        session.close()
+
+    def __get_session_counts(self, session):
+        """ Counts the connections and requests of all urllib3 pools of a session.
+
+        :param requests.Session session:    The session to inspect.
+
+        :return: The number of connections made and the number of requests done.
+        :rtype: tuple[int,int]
+
+        """
+
+        connections = 0
+        requests_done = 0
+        adapters = set(session.adapters.values())
+        for adapter in adapters:
+            managers = [adapter.poolmanager] + list(adapter.proxy_manager.values())
+            for manager in managers:
+                if manager is None:
+                    continue
+
+                for pool_key in manager.pools.keys():
+                    pool = manager.pools.get(pool_key)
+                    if pool is None:
+                        continue
+                    connections += getattr(pool, "num_connections", 0)
+                    requests_done += getattr(pool, "num_requests", 0)
+
+        return connections, requests_done
+
+    def __str__(self):
+        new_connections, reused_connections = self.get_connection_counts()
+        return "SessionPool [sessions={0}, poolSize={1}, idleTimeout={2}s, " \
+               "connections={3} new/{4} reused]".format(
+                len(self.__sessions), self.poolSize, self.idleTimeout,
+                new_connections, reused_connections)
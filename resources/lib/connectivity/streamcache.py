@@ -2,8 +2,15 @@
 
 import os
 import io
-import datetime
+import json
+import struct
 import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+
+from resources.lib.logger import Logger
 
 # lock object to use.
 cacheLock = threading.RLock()
@@ -35,36 +42,200 @@ def locked_read_write(origfunc):
     return execute_locked
 
 
+def replace_file(source, destination):
+    """ Atomically replaces the destination file with the source file.
+
+    :param str source:          The file to move.
+    :param str destination:     The file to replace.
+
+    """
+
+    try:
+        os.replace(source, destination)
+    except AttributeError:
+        # Python 2 has no os.replace and os.rename does not overwrite on Windows.
+        if os.path.isfile(destination):
+            os.remove(destination)
+        os.rename(source, destination)
+
+
+def get_temp_file_name(path):
+    """ Returns a unique name for a temporary file that will replace a file. The plugin and the
+    service can run as sub-interpreters of the same process, so the process id (and their
+    locks) are shared and cannot be used to tell them apart.
+
+    :param str path:    The file that will be replaced.
+
+    :return: The name of the temporary file.
+    :rtype: str
+
+    """
+
+    return "{0}.{1}.tmp".format(path, uuid.uuid4().hex)
+
+
 class StreamCache(object):
-    def __init__(self, cache_path):
+    __INDEX_VERSION = 2
+
+    # Index entry fields: [size, stored, accessed, expires]
+    __SIZE = 0
+    __STORED = 1
+    __ACCESSED = 2
+    __EXPIRES = 3
+
+    # Each cache file starts with the length of the JSON meta data and the storage flags,
+    # followed by the meta data and the body.
+    __HEADER = struct.Struct(">IB")
+    __FLAG_ZLIB = 1
+
+    # Files that are not in the index are removed once they are this old. Younger ones might
+    # still be added to the index by the process that stored them.
+    __ORPHAN_AGE = 3600
+
+    def __init__(self, cache_path, max_size_mb=50, max_age=7 * 24 * 3600, compression_level=1):
+        """ Creates a size bounded cache store with an LRU index.
+
+        The index is only written to disk when the store is flushed. Other processes might have
+        changed the index in the meantime, so their changes are merged before it is written.
+
+        :param str cache_path:          The cache folder in which the store is created.
+        :param int max_size_mb:         The maximum size of all the cached responses in MB.
+        :param int max_age:             Remove entries that were not used in this amount of
+                                        seconds.
+        :param int compression_level:   The zlib level for compressed entries (0 disables
+                                        compression).
+
+        """
+
         self.cacheHits = 0
         self.cachePath = os.path.join(cache_path, "www")
+        self.indexPath = os.path.join(self.cachePath, ".index")
+        self.maxSize = max_size_mb * 1024 * 1024
+        self.maxAge = max_age
+        self.compressionLevel = compression_level
         if not os.path.isdir(self.cachePath):
             os.makedirs(self.cachePath)
 
+        # The index is ordered from least recently used to most recently used.
+        self.__index = OrderedDict()
+        self.__size = 0
+        self.__dirty = False
+        # The keys that were removed (with the time they were stored) and the keys that were
+        # stored since the index was last synchronised with the one on disk.
+        self.__removed = {}
+        self.__stored = set()
+        self.__load_index()
+
     @locked_read_write
-    def set(self, key):
+    def set(self, key, meta=None, expires_in=3600, compress=False):
+        """ Returns a file-like object to write the body of a cache entry to. The data is
+        written to a temporary file and only becomes available once the writer is closed.
+
+        :param str key:             The key to store.
+        :param dict meta:           Meta data to store together with the body.
+        :param int expires_in:      The number of seconds the entry is considered fresh.
+        :param bool compress:       Should the body be stored zlib compressed.
+
+        :return: A writer that commits the entry when it is closed.
+        :rtype: _CacheWriter
+
+        """
+
+        compressor = None
+        flags = 0
+        if compress and self.compressionLevel:
+            compressor = zlib.compressobj(self.compressionLevel)
+            flags |= StreamCache.__FLAG_ZLIB
+
         file_name = os.path.join(self.cachePath, key)
-        fp = io.open(file_name, mode="w+b")
-        return fp
+        temp_name = get_temp_file_name(file_name)
+        fp = io.open(temp_name, mode="w+b")
+        meta_data = json.dumps(meta or {}, separators=(",", ":")).encode()
+        fp.write(StreamCache.__HEADER.pack(len(meta_data), flags))
+        fp.write(meta_data)
+        return _CacheWriter(self, key, fp, temp_name, file_name, expires_in, compressor)
 
     @locked_read_write
     def get(self, key):
-        file_name = os.path.join(self.cachePath, key)
-        with io.open(file_name, mode="rb") as fp:
-            return io.BytesIO(fp.read())
+        """ Retrieves a cached entry.
 
-    def is_expired(self, key, seconds=3600):
+        :param str key:     The key to retrieve.
+
+        :return: The stored meta data and a stream with the body.
+        :rtype: tuple[dict,io.BytesIO]
+
+        """
+
+        entry = self.__index.pop(key)
         file_name = os.path.join(self.cachePath, key)
-        if not os.path.isfile(file_name):
+        try:
+            with io.open(file_name, mode="rb") as fp:
+                meta_length, flags = StreamCache.__HEADER.unpack(fp.read(StreamCache.__HEADER.size))
+                meta = json.loads(fp.read(meta_length).decode())
+                data = fp.read()
+            if flags & StreamCache.__FLAG_ZLIB:
+                data = zlib.decompress(data)
+            body = io.BytesIO(data)
+        except (IOError, OSError, ValueError, struct.error, zlib.error):
+            Logger.warning("Removing invalid cache entry: %s", key)
+            self.__size -= entry[StreamCache.__SIZE]
+            self.__dirty = True
+            self.__delete_file(key, entry)
+            raise KeyError(key)
+
+        # Move it to the most recently used position
+        entry[StreamCache.__ACCESSED] = round(time.time(), 3)
+        self.__index[key] = entry
+        self.__dirty = True
+        return meta, body
+
+    def is_expired(self, key):
+        """ Returns if a key in the cache is no longer fresh.
+
+        :param str key:     The key to check.
+
+        :return: Indication if the entry has expired.
+        :rtype: bool
+
+        """
+
+        entry = self.__index.get(key)
+        if entry is None:
             return False
 
-        store_time = datetime.datetime.fromtimestamp(os.path.getmtime(file_name))
-        valid_until = store_time + datetime.timedelta(seconds=seconds)
-        if valid_until < datetime.datetime.now():
-            return True
+        return entry[StreamCache.__EXPIRES] < time.time()
 
-        return False
+    def get_staleness(self, key):
+        """ Returns the number of seconds an entry is past its expiry time.
+
+        :param str key:     The key to check.
+
+        :return: The seconds since the entry expired, or a negative number if it is still fresh.
+        :rtype: float
+
+        """
+
+        entry = self.__index.get(key)
+        if entry is None:
+            return 0
+
+        return time.time() - entry[StreamCache.__EXPIRES]
+
+    @locked_read_write
+    def touch(self, key, expires_in):
+        """ Updates the expiry of an entry after it was successfully revalidated.
+
+        :param str key:         The key to update.
+        :param int expires_in:  The number of seconds the entry is considered fresh again.
+
+        """
+
+        entry = self.__index.get(key)
+        if entry is None:
+            return
+
+        entry[StreamCache.__EXPIRES] = round(time.time(), 3) + expires_in
+        self.__dirty = True
 
     def has_cache_key(self, key):
         """ Returns if a key is present (expired or not) in the cache.
@@ -76,8 +247,243 @@ class StreamCache(object):
 
         """
 
+        return key in self.__index
+
+    @locked_read_write
+    def remove(self, key):
+        """ Removes an entry from the cache.
+
+        :param str key:     The key to remove.
+
+        """
+
+        entry = self.__index.pop(key, None)
+        if entry is None:
+            return
+
+        self.__size -= entry[StreamCache.__SIZE]
+        self.__delete_file(key, entry)
+        self.__dirty = True
+
+    @locked_read_write
+    def flush(self):
+        """ Merges the index with the one on disk and writes it if it was changed. """
+
+        if not self.__dirty:
+            return
+
+        self.__merge_index()
+        self.__write_index()
+        self.__removed = {}
+        self.__stored = set()
+
+    @locked_read_write
+    def _commit(self, key, temp_name, file_name, size, expires_in):
+        """ Moves a completely written entry into place and updates the index.
+
+        :param str key:             The key that was written.
+        :param str temp_name:       The temporary file that was written.
+        :param str file_name:       The final file name.
+        :param int size:            The size on disk of the entry.
+        :param int expires_in:      The number of seconds the entry is considered fresh.
+
+        """
+
+        replace_file(temp_name, file_name)
+
+        old_entry = self.__index.pop(key, None)
+        if old_entry is not None:
+            self.__size -= old_entry[StreamCache.__SIZE]
+
+        now = round(time.time(), 3)
+        self.__index[key] = [size, now, now, now + expires_in]
+        self.__size += size
+        self.__stored.add(key)
+        self.__dirty = True
+        self.__evict()
+
+    def __evict(self):
+        """ Removes the least recently used entries until the store fits its maximum size. """
+
+        while self.__size > self.maxSize and len(self.__index) > 1:
+            key, entry = self.__index.popitem(last=False)
+            Logger.debug("Evicting cache entry %s (%s bytes)", key, entry[StreamCache.__SIZE])
+            self.__size -= entry[StreamCache.__SIZE]
+            self.__delete_file(key, entry)
+            self.__dirty = True
+
+    def __load_index(self):
+        """ Loads the index in a single read. If there is no (valid) index, all cache files
+        are removed as they can no longer be tracked. Otherwise only the files that are not in
+        the index anymore are removed. The index itself is only written when the store is
+        flushed. """
+
+        entries = self.__read_index()
+        if entries is None:
+            Logger.info("No valid cache index found in '%s'. Starting with an empty cache.",
+                        self.indexPath)
+            self.__purge_files()
+            return
+
+        oldest_access = time.time() - self.maxAge
+        for key, entry in entries:
+            if entry[StreamCache.__ACCESSED] < oldest_access:
+                self.__delete_file(key, entry)
+                self.__dirty = True
+                continue
+
+            self.__index[key] = entry
+            self.__size += entry[StreamCache.__SIZE]
+
+        self.__evict()
+        self.__remove_orphans()
+
+    def __merge_index(self):
+        """ Merges the index on disk into the in-memory index, so the entries that other
+        processes stored or removed since the last synchronisation are not lost.
+
+        * Entries on disk that were removed here are dropped, unless they were stored again.
+        * Entries that were not stored here, but are no longer on disk, were removed by another
+          process and are dropped.
+        * For entries that are present in both, the most recently stored one is used.
+
+        """
+
+        entries = self.__read_index()
+        if entries is None:
+            return
+
+        merged = {}
+        for key, entry in entries:
+            removed_stored = self.__removed.get(key)
+            if removed_stored is None or entry[StreamCache.__STORED] > removed_stored:
+                merged[key] = entry
+
+        for key, entry in self.__index.items():
+            other = merged.get(key)
+            if other is None:
+                if key not in self.__stored:
+                    # it was on disk when we synchronised, so another process removed it.
+                    continue
+                merged[key] = entry
+                continue
+
+            if other[StreamCache.__STORED] > entry[StreamCache.__STORED]:
+                entry, other = other, entry
+            entry[StreamCache.__ACCESSED] = max(entry[StreamCache.__ACCESSED],
+                                                other[StreamCache.__ACCESSED])
+            if entry[StreamCache.__STORED] == other[StreamCache.__STORED]:
+                entry[StreamCache.__EXPIRES] = max(entry[StreamCache.__EXPIRES],
+                                                   other[StreamCache.__EXPIRES])
+            merged[key] = entry
+
+        self.__index = OrderedDict(sorted(merged.items(), key=lambda e: e[1][StreamCache.__ACCESSED]))
+        self.__size = sum(entry[StreamCache.__SIZE] for entry in self.__index.values())
+        self.__evict()
+
+    def __read_index(self):
+        """ Reads the index from disk.
+
+        :return: The entries of the index or None if there is no (valid) index.
+        :rtype: list|None
+
+        """
+
+        try:
+            with io.open(self.indexPath, mode="rb") as fp:
+                index = json.loads(fp.read().decode())
+            if index.get("version") != StreamCache.__INDEX_VERSION:
+                raise ValueError("Invalid index version: {0}".format(index.get("version")))
+            return index["entries"]
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+
+    def __write_index(self):
+        index = {
+            "version": StreamCache.__INDEX_VERSION,
+            "entries": list(self.__index.items())
+        }
+        temp_name = get_temp_file_name(self.indexPath)
+        with io.open(temp_name, mode="wb") as fp:
+            fp.write(json.dumps(index, separators=(",", ":")).encode())
+        replace_file(temp_name, self.indexPath)
+        self.__dirty = False
+
+    def __remove_orphans(self):
+        """ Removes the files that are not in the index, for example because the process that
+        stored them stopped before writing its index. """
+
+        oldest_change = time.time() - StreamCache.__ORPHAN_AGE
+        for file_name in os.listdir(self.cachePath):
+            if file_name in self.__index or file_name == ".index":
+                continue
+
+            try:
+                if os.path.getmtime(os.path.join(self.cachePath, file_name)) < oldest_change:
+                    Logger.debug("Removing untracked cache file %s", file_name)
+                    self.__delete_file(file_name)
+            except OSError:
+                pass
+
+    def __purge_files(self):
+        for file_name in os.listdir(self.cachePath):
+            self.__delete_file(file_name)
+
+    def __delete_file(self, key, entry=None):
+        # without an entry the file was not tracked, so any entry for it is no longer valid
+        self.__removed[key] = entry[StreamCache.__STORED] if entry else float("inf")
         file_name = os.path.join(self.cachePath, key)
-        return os.path.isfile(file_name)
+        try:
+            os.remove(file_name)
+        except OSError:
+            pass
 
     def __str__(self):
-        return "Cache store [{0}]".format(self.cachePath)
+        return "Cache store [{0}, {1} entries, {2:.1f}/{3} MB]".format(
+            self.cachePath, len(self.__index), self.__size / 1048576.0, self.maxSize // 1048576)
+
+
+class _CacheWriter(object):
+    def __init__(self, cache_store, key, fp, temp_name, file_name, expires_in, compressor=None):
+        """ A file-like writer that atomically adds an entry to a StreamCache when closed.
+
+        :param StreamCache cache_store:     The cache store to add the entry to.
+        :param str key:                     The key of the entry.
+        :param io.BufferedRandom fp:        The temporary file to write to.
+        :param str temp_name:               The name of the temporary file.
+        :param str file_name:               The name of the final file.
+        :param int expires_in:              The number of seconds the entry is considered fresh.
+        :param compressor:                  An optional zlib compress object for the body.
+
+        """
+
+        self.__cache_store = cache_store
+        self.__key = key
+        self.__fp = fp
+        self.__temp_name = temp_name
+        self.__file_name = file_name
+        self.__expires_in = expires_in
+        self.__compressor = compressor
+
+    def write(self, data):
+        if self.__compressor:
+            data = self.__compressor.compress(data)
+        return self.__fp.write(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.__compressor and exc_type is None:
+            self.__fp.write(self.__compressor.flush())
+
+        size = self.__fp.tell()
+        self.__fp.close()
+        if exc_type is not None:
+            os.remove(self.__temp_name)
+            return False
+
+        # noinspection PyProtectedMember
+        self.__cache_store._commit(self.__key, self.__temp_name, self.__file_name, size,
+                                   self.__expires_in)
+        return False
@@ -0,0 +1,93 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import re
+
+from resources.lib.parserdata import ParserData
+
+
+class DataParserIndex(object):
+    def __init__(self, data_parsers):
+        """ Creates a lookup structure for the data parsers of a channel, so finding the parsers
+        for a URL does not require sorting and matching all registered URL's.
+
+        The data parsers of the longest registered URL that matches are used. Equally long URL's
+        are used in the order in which they were registered.
+
+        :param dict[str,list[ParserData]] data_parsers:     The data parsers per registered URL.
+
+        """
+
+        self.__data_parsers = data_parsers
+        self.__keys = sorted(data_parsers.keys(), key=len, reverse=True)
+
+        # For each match type the registered URL's are stored with their rank in self.__keys.
+        self.__exact = {}           # : URL -> rank
+        self.__starts = {}          # : length -> {URL -> rank}
+        self.__ends = {}            # : length -> {URL -> rank}
+        self.__contains = []        # : [(rank, URL)]
+        self.__regexes = []         # : [(rank, compiled regex)]
+
+        for rank, key in enumerate(self.__keys):
+            for match_type in set(d.MatchType for d in data_parsers[key]):
+                if match_type == ParserData.MatchStart:
+                    self.__starts.setdefault(len(key), {})[key] = rank
+                elif match_type == ParserData.MatchEnd:
+                    self.__ends.setdefault(len(key), {})[key] = rank
+                elif match_type == ParserData.MatchExact:
+                    self.__exact[key] = rank
+                elif match_type == ParserData.MatchRegex:
+                    self.__regexes.append((rank, re.compile(key, re.DOTALL + re.IGNORECASE)))
+                else:
+                    self.__contains.append((rank, key))
+
+    def find(self, url):
+        """ Returns the data parsers that match a URL. These are the matching data parsers of the
+        longest registered URL that has any match.
+
+        :param str|unicode url:     The URL to match.
+
+        :return: The matching data parsers in the order they were added.
+        :rtype: list[ParserData]
+
+        """
+
+        best = self.__exact.get(url, len(self.__keys))
+
+        for length, keys in self.__starts.items():
+            rank = keys.get(url[:length], best)
+            if rank < best:
+                best = rank
+
+        url_length = len(url)
+        for length, keys in self.__ends.items():
+            if length > url_length:
+                continue
+            rank = keys.get(url[url_length - length:], best)
+            if rank < best:
+                best = rank
+
+        # These lists are sorted by rank, so only the ones better than the current best are tried.
+        for rank, key in self.__contains:
+            if rank >= best:
+                break
+            if key in url:
+                best = rank
+                break
+
+        for rank, regex in self.__regexes:
+            if rank >= best:
+                break
+            if regex.match(url) is not None:
+                best = rank
+                break
+
+        if best == len(self.__keys):
+            return []
+
+        return [d for d in self.__data_parsers[self.__keys[best]] if d.matches(url)]
+
+    def __len__(self):
+        return len(self.__keys)
+
+    def __str__(self):
+        return "DataParserIndex [{0} urls]".format(len(self.__keys))
@@ -234,16 +234,17 @@ class EnvController:
         return True
 
     @staticmethod
-    def cache_clean_up(path, cache_time, mask="*.*"):
+    def cache_clean_up(path, cache_time, mask="*.*", skip_folders=None):
         """Cleans up the XOT cache folder.
 
         Check the cache files create timestamp and compares it with the current datetime extended
         with the amount of seconds as defined in cacheTime.
 
         Expired items are deleted.
-        :param str path:        The cache path to clean.
-        :param int cache_time:  The minimum (in seconds) of files that will be deleted.
-        :param str mask:        The file mask to consider when cleaning the cache.
+        :param str path:                    The cache path to clean.
+        :param int cache_time:              The minimum (in seconds) of files that will be deleted.
+        :param str mask:                    The file mask to consider when cleaning the cache.
+        :param list[str] skip_folders:      Sub folders of the path that should not be cleaned.
 
         """
 
@@ -268,6 +269,9 @@ class EnvController:
                     Logger.debug("Cleaning cache folder: %s", root)
                     current_dir = root
 
+                if skip_folders and root == path:
+                    dirs[:] = [d for d in dirs if d not in skip_folders]
+
                 for basename in files:
                     if fnmatch.fnmatch(basename, mask):
                         filename = os.path.join(root, basename)
@@ -2,14 +2,18 @@
 
 import sys
 import os
+import io
 import datetime
 import time
+import json
+from collections import OrderedDict
 
 from resources.lib.backtothefuture import PY3
 if PY3:
     import glob
 
 from resources.lib.addonsettings import AddonSettings
+from resources.lib.connectivity.streamcache import replace_file
 from resources.lib.xbmcwrapper import XbmcWrapper
 from resources.lib.helpers.languagehelper import LanguageHelper
 from resources.lib.retroconfig import Config
@@ -24,6 +28,7 @@ class ChannelIndex(object):
     """ Class that handles the deploying and loading of available channels."""
 
     __channelIndexer = None  # : Property to store the channel indexer in.
+    __INDEX_VERSION = 1      # : Version of the on-disk channel index format.
 
     @staticmethod
     def get_register():
@@ -56,9 +61,11 @@ class ChannelIndex(object):
         """
 
         self.__INTERNAL_CHANNEL_PATH = "channels"
+        self.__CHANNEL_INDEX = os.path.join(Config.profileDir, "channelindex.json")
 
         # initialise the collections
         self.__allChannels = []  # list of all available channels, used for deduplications
+        self.__index = None      # the on-disk channel index, once loaded
 
         self.validAt = datetime.datetime.now()
         self.id = int(time.time())
@@ -95,7 +102,9 @@ class ChannelIndex(object):
         channel_pack, channel_set = channel_id.rsplit(".", 1)
         channel_set_info_path = os.path.join(channel_path, channel_pack, channel_set, "chn_{}.json".format(channel_set))
 
-        channel_infos = ChannelInfo.from_json(channel_set_info_path)
+        index = self.__load_index()
+        channel_set_data = index["channelSets"].get(channel_set_info_path) if index else None
+        channel_infos = ChannelInfo.from_json(channel_set_info_path, channel_set_data)
         if channel_code is None:
             channel_infos = [ci for ci in channel_infos if ci.channelCode is None]
         else:
@@ -109,7 +118,8 @@ class ChannelIndex(object):
             Logger.debug("Found single channel in the channel index: %s.", channel_infos[0])
 
         channel_info = channel_infos[0]
-        if self.__is_channel_set_updated(channel_info):
+        # A valid index guarantees that the channel set was already initialised.
+        if channel_set_data is None and self.__is_channel_set_updated(channel_info):
             Logger.warning("Found updated channel_set: %s.", channel_set_info_path)
 
             # new we should init all channels by loading them all, just to be sure that all is ok
@@ -151,56 +161,56 @@ class ChannelIndex(object):
         channels_updated = False
         country_visibility = {}
 
-        channel_path = os.path.join(Config.rootDir, self.__INTERNAL_CHANNEL_PATH)
-        for channel_pack in os.listdir(channel_path):
-            if not channel_pack.startswith("channel."):
-                continue
+        index = self.__load_index()
+        if index:
+            channel_sets = index["channelSets"]
+        else:
+            channel_sets = self.__scan_channel_sets()
 
-            for channel_set in os.listdir(os.path.join(channel_path, channel_pack)):
-                channel_set_path = os.path.join(channel_path, channel_pack, channel_set)
-                if not os.path.isdir(channel_set_path):
-                    continue
+        for channel_set_info_path, channel_set_data in channel_sets.items():
+            channel_infos = ChannelInfo.from_json(channel_set_info_path, channel_set_data)
 
-                channel_set_info_path = os.path.join(channel_set_path, "chn_{}.json".format(channel_set))
-                channel_infos = ChannelInfo.from_json(channel_set_info_path)
+            # Check if the channel was updated (a valid index means nothing was updated)
+            if not index and self.__is_channel_set_updated(channel_infos[0]):
+                if not channels_updated:
+                    # this was the first update found (otherwise channelsUpdated was True) show a message:
+                    title = LanguageHelper.get_localized_string(LanguageHelper.InitChannelTitle)
+                    text = LanguageHelper.get_localized_string(LanguageHelper.InitChannelText)
+                    XbmcWrapper.show_notification(title, text, display_time=15000, logger=Logger.instance())
+                channels_updated |= True
 
-                # Check if the channel was updated
-                if self.__is_channel_set_updated(channel_infos[0]):
-                    if not channels_updated:
-                        # this was the first update found (otherwise channelsUpdated was True) show a message:
-                        title = LanguageHelper.get_localized_string(LanguageHelper.InitChannelTitle)
-                        text = LanguageHelper.get_localized_string(LanguageHelper.InitChannelText)
-                        XbmcWrapper.show_notification(title, text, display_time=15000, logger=Logger.instance())
-                    channels_updated |= True
+                # Initialise the channelset.
+                self.__initialise_channel_set(channel_infos[0])
 
-                    # Initialise the channelset.
-                    self.__initialise_channel_set(channel_infos[0])
+                # And perform all first actions for the included channels in the set
+                for channel_info in channel_infos:
+                    self.__initialise_channel(channel_info)
 
-                    # And perform all first actions for the included channels in the set
-                    for channel_info in channel_infos:
-                        self.__initialise_channel(channel_info)
+            # Check the channel validity
+            for channel_info in channel_infos:
+                if not self.__channel_is_correct(channel_info):
+                    continue
+                self.__allChannels.append(channel_info)
 
-                # Check the channel validity
-                for channel_info in channel_infos:
-                    if not self.__channel_is_correct(channel_info):
-                        continue
-                    self.__allChannels.append(channel_info)
+                if channel_info.ignore:
+                    Logger.warning("Not loading: %s -> ignored in the channel set", channel_info)
+                    continue
+                valid_channels.append(channel_info)
 
-                    if channel_info.ignore:
-                        Logger.warning("Not loading: %s -> ignored in the channel set", channel_info)
-                        continue
-                    valid_channels.append(channel_info)
+                # was the channel hidden based on language settings? We do some caching to speed
+                # things up.
+                if channel_info.language not in country_visibility:
+                    country_visibility[channel_info.language] = AddonSettings.show_channel_with_language(channel_info.language)
+                channel_info.visible = country_visibility[channel_info.language]
 
-                    # was the channel hidden based on language settings? We do some caching to speed
-                    # things up.
-                    if channel_info.language not in country_visibility:
-                        country_visibility[channel_info.language] = AddonSettings.show_channel_with_language(channel_info.language)
-                    channel_info.visible = country_visibility[channel_info.language]
+                # was the channel explicitly disabled from the settings?
+                channel_info.enabled = AddonSettings.get_channel_visibility(channel_info)
 
-                    # was the channel explicitly disabled from the settings?
-                    channel_info.enabled = AddonSettings.get_channel_visibility(channel_info)
+                Logger.debug("Found channel: %s", channel_info)
 
-                    Logger.debug("Found channel: %s", channel_info)
+        if not index:
+            # Store the index after the initialisation, as that might have changed the folders.
+            self.__save_index(channel_sets)
 
         if channels_updated:
             Logger.info("New or updated channels found. Updating add-on configuration for all channels and user agent.")
@@ -239,6 +249,107 @@ class ChannelIndex(object):
         Logger.debug("Found these categories: %s", ", ".join(categories))
         return categories
 
+    def __scan_channel_sets(self):
+        """ Scans the channel folder for all channel sets and reads their json meta data files.
+
+        :return: The parsed json meta data per channel set json file.
+        :rtype: OrderedDict[str,dict]
+
+        """
+
+        channel_sets = OrderedDict()
+        channel_path = os.path.join(Config.rootDir, self.__INTERNAL_CHANNEL_PATH)
+        for channel_pack in os.listdir(channel_path):
+            if not channel_pack.startswith("channel."):
+                continue
+
+            for channel_set in os.listdir(os.path.join(channel_path, channel_pack)):
+                channel_set_path = os.path.join(channel_path, channel_pack, channel_set)
+                if not os.path.isdir(channel_set_path):
+                    continue
+
+                channel_set_info_path = os.path.join(channel_set_path, "chn_{}.json".format(channel_set))
+                channel_sets[channel_set_info_path] = ChannelInfo.read_json(channel_set_info_path)
+
+        return channel_sets
+
+    def __load_index(self):
+        """ Loads the on-disk channel index from the profile folder.
+
+        The index is only valid if it was created by the same version of the add-on and none
+        of the channel folders were modified since it was created.
+
+        :return: The channel index or None if there was no valid index.
+        :rtype: dict|None
+
+        """
+
+        if self.__index is not None:
+            return self.__index
+
+        if not os.path.isfile(self.__CHANNEL_INDEX):
+            Logger.debug("No channel index found at: %s", self.__CHANNEL_INDEX)
+            return None
+
+        try:
+            with io.open(self.__CHANNEL_INDEX, mode="rb") as fp:
+                index = json.loads(fp.read().decode("utf-8"), object_pairs_hook=OrderedDict)
+
+            if index.get("version") != self.__INDEX_VERSION or \
+                    index.get("addonVersion") != str(Config.version):
+                Logger.info("Channel index version mismatch. Rebuilding the channel index.")
+                return None
+
+            for folder, modified in index["folders"].items():
+                if os.stat(folder).st_mtime != modified:
+                    Logger.info("Channel folder '%s' was changed. Rebuilding the channel index.", folder)
+                    return None
+        except:
+            Logger.warning("Error loading the channel index. Rebuilding the channel index.", exc_info=True)
+            return None
+
+        Logger.debug("Loaded channel index with %d channel sets from: %s",
+                     len(index["channelSets"]), self.__CHANNEL_INDEX)
+        self.__index = index
+        return index
+
+    def __save_index(self, channel_sets):
+        """ Stores the channel sets with the modification times of the channel folders in the
+        on-disk channel index.
+
+        :param OrderedDict[str,dict] channel_sets: The parsed json data per channel set.
+
+        """
+
+        channel_path = os.path.join(Config.rootDir, self.__INTERNAL_CHANNEL_PATH)
+        folders = [channel_path]
+        for channel_set_info_path in channel_sets.keys():
+            channel_set_path = os.path.dirname(channel_set_info_path)
+            channel_pack_path = os.path.dirname(channel_set_path)
+            if channel_pack_path not in folders:
+                folders.append(channel_pack_path)
+            folders.append(channel_set_path)
+
+        index = OrderedDict()
+        index["version"] = self.__INDEX_VERSION
+        index["addonVersion"] = str(Config.version)
+        index["folders"] = OrderedDict((f, os.stat(f).st_mtime) for f in folders)
+        index["channelSets"] = channel_sets
+
+        temp_index = "{}.tmp".format(self.__CHANNEL_INDEX)
+        try:
+            # open the file as binary file, as json.dumps will already encode as utf-8 bytes
+            with io.open(temp_index, mode="w+b") as fp:
+                fp.write(json.dumps(index, separators=(",", ":")).encode("utf-8"))
+            replace_file(temp_index, self.__CHANNEL_INDEX)
+        except:
+            Logger.error("Error storing the channel index at: %s", self.__CHANNEL_INDEX, exc_info=True)
+            return
+
+        Logger.debug("Stored channel index with %d channel sets at: %s",
+                     len(channel_sets), self.__CHANNEL_INDEX)
+        self.__index = index
+
     def __is_channel_set_updated(self, channel_info):
         """ Checks whether a channel set was updated.
 
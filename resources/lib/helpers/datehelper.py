@@ -1,12 +1,37 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 import datetime
+import re
 import pytz
 import time
+from collections import OrderedDict
 
 
 class DateHelper(object):
     """Helper class to parse datenames into numbers"""
 
+    # The format directives that are parsed without time.strptime (with the same regexes).
+    __DIRECTIVES = {
+        "Y": r"\d\d\d\d",
+        "y": r"\d\d",
+        "m": r"1[0-2]|0[1-9]|[1-9]",
+        "d": r"3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9]",
+        "H": r"2[0-3]|[0-1]\d|\d",
+        "M": r"[0-5]\d|\d",
+        "S": r"6[0-1]|[0-5]\d|\d",
+        "f": r"[0-9]{1,6}"
+    }
+
+    # ISO-8601/RFC-3339 date and times like 2016-01-01T23:21:20.123+01:00
+    __ISO_8601 = re.compile(
+        r"(\d{4})-(\d\d)-(\d\d)(?:[T ](\d\d):(\d\d)(?::(\d\d)(?:[.,](\d{1,6})\d*)?)?)?"
+        r"(Z|[+-]\d\d(?::?\d\d)?)?$", re.IGNORECASE)
+
+    # The maximum number of date formats and time zones that are kept.
+    __MAX_CACHE_SIZE = 250
+
+    __parsers = OrderedDict()       # : date format -> (compiled regex, directives) or None for strptime
+    __time_zones = OrderedDict()    # : time zone name -> pytz time zone
+
     def __init__(self):
         """No initialisation, just statics"""
 
@@ -161,16 +186,67 @@ class DateHelper(object):
 
         """
 
-        time_tuple = DateHelper.get_date_from_string(value, date_format)
-        naive_datetime = datetime.datetime(*time_tuple[:6])
+        naive_datetime = DateHelper.__parse_datetime(value, date_format)
 
         if time_zone is None:
             return naive_datetime
 
-        tz_info = pytz.timezone(time_zone)
+        tz_info = DateHelper.__get_time_zone(time_zone)
         aware_datetime = tz_info.localize(naive_datetime)
         return aware_datetime
 
+    @staticmethod
+    def get_datetimes_from_strings(values, date_format="%Y-%m-%dT%H:%M:%S", time_zone=None):
+        """ Parses a list of strings with the same format, for instance all start times of
+        an EPG listing.
+
+        :param list[str] values:    The string values to parse.
+        :param str date_format:     The format to use.
+        :param str time_zone:       The timezone name for the TZ to use.
+
+        :return: For each value a datetime object that is timezone aware if a timezone was
+                 specified.
+        :rtype: list[datetime.datetime]
+
+        """
+
+        tz_info = DateHelper.__get_time_zone(time_zone) if time_zone else None
+        results = []
+        for value in values:
+            naive_datetime = DateHelper.__parse_datetime(value, date_format)
+            results.append(tz_info.localize(naive_datetime) if tz_info else naive_datetime)
+        return results
+
+    @staticmethod
+    def get_datetime_from_iso8601(value):
+        """ Parses an ISO-8601 (RFC-3339) date and time string like
+        `2016-01-01T23:21:20.123+01:00`. The time, seconds, fraction and offset are optional.
+
+        :param str value:   The string value to parse.
+
+        :return: A datetime object that is timezone aware if the value contains an offset.
+        :rtype: datetime.datetime
+
+        """
+
+        match = DateHelper.__ISO_8601.match(value)
+        if match is None:
+            raise ValueError("'%s' is not an ISO-8601 date and time" % (value, ))
+
+        year, month, day, hour, minute, second, fraction, offset = match.groups()
+        naive_datetime = datetime.datetime(
+            int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0),
+            int((fraction or "0").ljust(6, "0")))
+
+        if offset is None:
+            return naive_datetime
+        if offset in ("Z", "z"):
+            return naive_datetime.replace(tzinfo=pytz.utc)
+
+        minutes = int(offset[1:3]) * 60 + int(offset[-2:] if len(offset) > 3 else 0)
+        return naive_datetime.replace(
+            tzinfo=pytz.FixedOffset(minutes if offset[0] == "+" else -minutes))
+
     @staticmethod
     def get_date_from_string(value, date_format="%Y-%m-%dT%H:%M:%S+00:00"):
         """ Converts a formatted date-time string to a time struct.
@@ -197,7 +273,139 @@ class DateHelper(object):
 
         """
 
-        return time.strptime(value, date_format)
+        date_values = DateHelper.__parse(value, date_format)
+        if date_values is None:
+            return time.strptime(value, date_format)
+
+        year, month, day = date_values[:3]
+        date = datetime.date(year, month, day)
+        year_day = date.toordinal() - datetime.date(year, 1, 1).toordinal() + 1
+        return time.struct_time(date_values[:6] + (date.weekday(), year_day, -1))
+
+    @staticmethod
+    def __parse_datetime(value, date_format):
+        """ Parses a string into a naive datetime, using time.strptime if the format is not
+        supported by the precompiled regexes.
+
+        :param str value:           The string value to parse
+        :param str date_format:     The format to use
+
+        :rtype: datetime.datetime
+
+        """
+
+        date_values = DateHelper.__parse(value, date_format)
+        if date_values is None:
+            return datetime.datetime(*time.strptime(value, date_format)[:6])
+        return datetime.datetime(*date_values)
+
+    @staticmethod
+    def __parse(value, date_format):
+        """ Parses a string using a precompiled regex for the format, which is a lot faster than
+        time.strptime.
+
+        :param str value:           The string value to parse
+        :param str date_format:     The format to use
+
+        :return: The year, month, day, hour, minute, second and microsecond or None if the
+                 format is not supported and time.strptime should be used.
+        :rtype: tuple[int,int,int,int,int,int,int]|None
+
+        """
+
+        parser = DateHelper.__get_cached(DateHelper.__parsers, date_format, DateHelper.__compile_format)
+        if parser is None:
+            return None
+
+        regex, directives = parser
+        match = regex.match(value)
+        if match is None or match.end() != len(value):
+            raise ValueError("time data %r does not match format %r" % (value, date_format))
+
+        values = dict(zip(directives, match.groups()))
+        if "Y" in values:
+            year = int(values["Y"])
+        elif "y" in values:
+            # the same pivot year as time.strptime
+            year = int(values["y"])
+            year += 2000 if year <= 68 else 1900
+        else:
+            year = 1900
+
+        return (year, int(values.get("m", 1)), int(values.get("d", 1)),
+                int(values.get("H", 0)), int(values.get("M", 0)), int(values.get("S", 0)),
+                int(values.get("f", "0").ljust(6, "0")))
+
+    @staticmethod
+    def __compile_format(date_format):
+        """ Converts a date format into a regex in the same way time.strptime does.
+
+        :param str date_format:     The format to convert.
+
+        :return: The compiled regex and the directives of its groups, or None if the format
+                 contains directives that are not supported.
+        :rtype: tuple[re.Pattern,list[str]]|None
+
+        """
+
+        regex = ""
+        directives = []
+        parts = re.split(r"(%.)", date_format)
+        for i, part in enumerate(parts):
+            if i % 2 == 0:
+                if "%" in part:
+                    # a stray % at the end
+                    return None
+                # whitespace in the format matches any whitespace
+                regex += re.sub(r"(?:\\\s)+", r"\\s+", re.escape(part))
+                continue
+
+            directive = part[1]
+            if directive == "%":
+                regex += "%"
+            elif directive in DateHelper.__DIRECTIVES and directive not in directives:
+                regex += "(%s)" % (DateHelper.__DIRECTIVES[directive], )
+                directives.append(directive)
+            else:
+                return None
+
+        return re.compile(regex, re.IGNORECASE), directives
+
+    @staticmethod
+    def __get_time_zone(time_zone):
+        """ Returns a (cached) pytz time zone.
+
+        :param str time_zone:   The name of the time zone.
+
+        :rtype: datetime.tzinfo
+
+        """
+
+        return DateHelper.__get_cached(DateHelper.__time_zones, time_zone, pytz.timezone)
+
+    @staticmethod
+    def __get_cached(cache, key, create):
+        """ Returns a value from a cache that keeps the __MAX_CACHE_SIZE most recently used
+        values.
+
+        :param OrderedDict cache:   The cache to use.
+        :param str key:             The key of the value.
+        :param function create:     Creates the value for a key that is not in the cache.
+
+        :return: The cached or created value.
+
+        """
+
+        try:
+            value = cache.pop(key)
+        except KeyError:
+            value = create(key)
+            while len(cache) >= DateHelper.__MAX_CACHE_SIZE:
+                cache.popitem(last=False)
+
+        # move it to the end, as it is the most recently used one
+        cache[key] = value
+        return value
 
     @staticmethod
     def __get_month_from_name(month, language, short=True):
@@ -0,0 +1,91 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import sys
+import threading
+import time
+
+from resources.lib.backtothefuture import PY2
+if PY2:
+    # noinspection PyUnresolvedReferences
+    import __builtin__ as builtins
+    # implicit relative imports are tried first
+    DEFAULT_LEVEL = -1
+else:
+    # noinspection PyCompatibility
+    import builtins
+    DEFAULT_LEVEL = 0
+
+
+class ImportTimer(object):
+    """ Class that measures the time it takes to import modules. """
+
+    def __init__(self):
+        """ Creates an ImportTimer. Use start() to start measuring all (absolute) imports of
+        modules that were not yet imported. """
+
+        self.timings = {}           # : module name -> (total seconds, own seconds)
+        self.startTime = None
+        self.stopTime = None
+
+        self.__original_import = None
+        self.__thread = None
+        self.__nested = []
+
+    def start(self):
+        """ Starts measuring the imports on the current thread. """
+
+        if self.__original_import is not None:
+            return
+
+        self.startTime = time.time()
+        self.__thread = threading.current_thread()
+        self.__original_import = builtins.__import__
+        builtins.__import__ = self.__timed_import
+
+    def stop(self):
+        """ Stops measuring the imports. """
+
+        if self.__original_import is None:
+            return
+
+        builtins.__import__ = self.__original_import
+        self.__original_import = None
+        self.stopTime = time.time()
+
+    def log_report(self, logger, limit=25):
+        """ Writes the slowest imports to the log.
+
+        :param Logger logger:   The logger to write to.
+        :param int limit:       The maximum number of modules to report.
+
+        """
+
+        if not self.timings:
+            return
+
+        total_time = sum(own for _, own in self.timings.values())
+        slowest = sorted(self.timings.items(), key=lambda t: t[1][0], reverse=True)[:limit]
+        lines = ["{0:>8.1f} ms {1:>8.1f} ms  {2}".format(total * 1000, own * 1000, name)
+                 for name, (total, own) in slowest]
+        logger.debug("Imported %d modules in %.1f ms. Slowest imports (total, own, module):\n%s",
+                     len(self.timings), total_time * 1000, "\n".join(lines))
+
+    def __timed_import(self, name, globals=None, locals=None, fromlist=(), level=DEFAULT_LEVEL):
+        # Relative imports, already loaded modules and imports from other threads are not timed.
+        # On Python 2 a level of -1 is an implicit import, which is also tried as an absolute one.
+        if level > 0 or name in sys.modules or threading.current_thread() is not self.__thread:
+            return self.__original_import(name, globals, locals, fromlist, level)
+
+        start = time.time()
+        self.__nested.append(0.0)
+        try:
+            return self.__original_import(name, globals, locals, fromlist, level)
+        finally:
+            duration = time.time() - start
+            nested = self.__nested.pop()
+            if self.__nested:
+                self.__nested[-1] += duration
+            self.timings[name] = (duration, duration - nested)
+
+    def __str__(self):
+        return "ImportTimer [{0} modules]".format(len(self.timings))
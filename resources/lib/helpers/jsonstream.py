@@ -0,0 +1,257 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import re
+from json.decoder import scanstring
+
+
+class JsonStream(object):
+    __WHITESPACE = re.compile(r"[ \t\n\r]*")
+    __DECODER = json.JSONDecoder()
+
+    def __init__(self, data):
+        """ Creates a reader that extracts the results of a JSON data parser path from JSON data
+        without loading the complete document.
+
+        Only the objects and arrays on the path are scanned. Other values are decoded one by one
+        and discarded, and the elements of the resulting array are decoded and returned one at a
+        time. Once a part of the path cannot be streamed (for instance a negative index), the
+        current value is decoded and the rest of the path is applied in memory.
+
+        :param str|unicode|bytes data:  JSON data, possibly wrapped in a JSONP callback.
+
+        """
+
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+
+        data = data.strip()
+        if data and data[0] not in "[{":
+            # find the actual start in case of a jQuery18303627530449324564_1370950605750({"success":true});
+            data = data[data.find("(") + 1:data.rfind(")")]
+        self.data = data
+
+    def iter_path(self, path):
+        """ Yields the results of a JSON data parser path.
+
+        :param list[str|int|tuple]|str path:   The data parser path.
+
+        :return: The same results that `JsonStream.select(json, path)` would return.
+        :rtype: collections.Iterable[any]
+
+        """
+
+        if not self.data:
+            # no data in, no data out (just like the JsonHelper)
+            for result in JsonStream.select(dict(), path):
+                yield result
+            return
+
+        for result in self.__iter_value(self.__skip_whitespace(0), list(path), 0):
+            yield result
+
+    @staticmethod
+    def select(json_data, path):
+        """ Applies a JSON data parser path to JSON data.
+
+        A path consists of dictionary keys, list indexes and (key, value, index) tuples. The
+        tuples filter a list of objects on the value of a key, and optionally take the element
+        at index from the filtered list.
+
+        :param any json_data:                   The JSON data.
+        :param list[str|int|tuple]|str path:    The data parser path.
+
+        :return: The results, if a single result was found it is returned as a list.
+        :rtype: list[any]
+
+        """
+
+        parser_results = json_data
+        for parser in path:
+            # Find the right elements
+            if isinstance(parser, tuple):
+                # We need to match a key in a list of objects.
+                key, value, index = parser
+                parser_results = [p for p in parser_results if p.get(key) == value]
+                if not parser_results:
+                    parser_results = []
+                    break
+                if index is not None:
+                    parser_results = parser_results[index]
+
+            elif isinstance(parser_results, list):
+                parser_results = parser_results[parser]
+            else:
+                parser_results = parser_results.get(parser)
+
+            if not parser_results:
+                parser_results = []
+                break
+
+        if not isinstance(parser_results, (tuple, list)):
+            # if there is just one match, return that as a list
+            parser_results = [parser_results]
+        return parser_results
+
+    def __iter_value(self, pos, path, step):
+        """ Yields the results for the remaining path of the value at a position.
+
+        :param int pos:                     The position of the value.
+        :param list[str|int|tuple] path:    The data parser path.
+        :param int step:                    The part of the path that should be applied.
+
+        :rtype: collections.Iterable[any]
+
+        """
+
+        token = self.data[pos]
+        if step == len(path):
+            if token == "[":
+                for element in self.__iter_array(pos, decode=True):
+                    yield element
+            else:
+                value = self.__decode(pos)[0]
+                # values that are considered False are only returned for an empty path
+                if step and not value:
+                    return
+                for result in JsonStream.select(value, []):
+                    yield result
+            return
+
+        if step and self.__is_empty(pos):
+            return
+
+        parser = path[step]
+        if token == "{" and not isinstance(parser, tuple):
+            # N.B. for duplicate keys the first one is used, where json.loads uses the last one
+            for key, value_pos in self.__iter_object(pos):
+                if key == parser:
+                    for result in self.__iter_value(value_pos, path, step + 1):
+                        yield result
+                    return
+            return
+
+        if token == "[" and isinstance(parser, int) and parser >= 0:
+            for index, element_pos in enumerate(self.__iter_array(pos)):
+                if index == parser:
+                    for result in self.__iter_value(element_pos, path, step + 1):
+                        yield result
+                    return
+            raise IndexError("list index out of range")
+
+        if token == "[" and isinstance(parser, tuple) and (parser[2] is None or parser[2] >= 0):
+            key, value, index = parser
+            matches = (e for e in self.__iter_array(pos, decode=True) if e.get(key) == value)
+
+            if index is None and step == len(path) - 1:
+                for element in matches:
+                    yield element
+                return
+
+            if index is None:
+                # the rest of the path is applied to the filtered list
+                matches = list(matches)
+                for result in JsonStream.select(matches, path[step + 1:]) if matches else []:
+                    yield result
+                return
+
+            found = False
+            for match_index, element in enumerate(matches):
+                found = True
+                if match_index == index:
+                    for result in JsonStream.select(element, path[step + 1:]) if element else []:
+                        yield result
+                    return
+            if found:
+                raise IndexError("list index out of range")
+            return
+
+        # this part of the path cannot be streamed, so continue in memory
+        for result in JsonStream.select(self.__decode(pos)[0], path[step:]):
+            yield result
+
+    def __iter_object(self, pos):
+        """ Yields the keys of an object and the positions of their values.
+
+        :param int pos:     The position of the opening brace.
+
+        :rtype: collections.Iterable[tuple[str,int]]
+
+        """
+
+        data = self.data
+        pos = self.__skip_whitespace(pos + 1)
+        if data[pos] == "}":
+            return
+
+        while True:
+            if data[pos] != '"':
+                raise ValueError("Expecting property name at position {0}".format(pos))
+            key, pos = scanstring(data, pos + 1)
+            pos = self.__skip_whitespace(pos)
+            if data[pos] != ":":
+                raise ValueError("Expecting ':' delimiter at position {0}".format(pos))
+            value_pos = self.__skip_whitespace(pos + 1)
+            yield key, value_pos
+
+            # skip the value that was not used
+            pos = self.__skip_whitespace(self.__decode(value_pos)[1])
+            if data[pos] == "}":
+                return
+            if data[pos] != ",":
+                raise ValueError("Expecting ',' delimiter at position {0}".format(pos))
+            pos = self.__skip_whitespace(pos + 1)
+
+    def __iter_array(self, pos, decode=False):
+        """ Yields the positions or the decoded values of the elements of an array.
+
+        :param int pos:         The position of the opening bracket.
+        :param bool decode:     Yield the decoded elements instead of their positions.
+
+        :rtype: collections.Iterable[int|any]
+
+        """
+
+        data = self.data
+        pos = self.__skip_whitespace(pos + 1)
+        if data[pos] == "]":
+            return
+
+        while True:
+            if decode:
+                element, end = self.__decode(pos)
+                yield element
+            else:
+                yield pos
+                end = self.__decode(pos)[1]
+            pos = self.__skip_whitespace(end)
+            if data[pos] == "]":
+                return
+            if data[pos] != ",":
+                raise ValueError("Expecting ',' delimiter at position {0}".format(pos))
+            pos = self.__skip_whitespace(pos + 1)
+
+    def __is_empty(self, pos):
+        """ Checks whether the value at a position is considered False.
+
+        :param int pos:     The position of the value.
+
+        :rtype: bool
+
+        """
+
+        token = self.data[pos]
+        if token == "{":
+            return self.data[self.__skip_whitespace(pos + 1)] == "}"
+        if token == "[":
+            return self.data[self.__skip_whitespace(pos + 1)] == "]"
+        return not self.__decode(pos)[0]
+
+    def __decode(self, pos):
+        return JsonStream.__DECODER.raw_decode(self.data, pos)
+
+    def __skip_whitespace(self, pos):
+        return JsonStream.__WHITESPACE.match(self.data, pos).end()
+
+    def __str__(self):
+        return "JsonStream [{0} chars]".format(len(self.data))
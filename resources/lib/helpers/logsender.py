@@ -1,5 +1,7 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import collections
+import gzip
 import os
 import io
 
@@ -55,10 +57,33 @@ class LogSender(object):
         if not file_path:
             raise ValueError("No filename specified")
 
+        return self.send_files(name, [file_path], expire, paste_format, user_key)
+
+    def send_files(self, name, file_paths, expire='1M', paste_format=None, user_key=None):
+        """ Sends a log file together with the end of its older generations as a single paste.
+
+        Only the part that fits in the paste is read: the top and end of the most recent file
+        if it is too large, or else the complete file preceded by the end of the older ones.
+
+        :param str|unicode name:                Name of the logfile paste/gist.
+        :param list[str|unicode] file_paths:    The files to upload, starting with the most recent
+                                                one. Files ending with .gz are gzip compressed.
+        :param str|unicode expire:              Expiration time.
+        :param str|unicode paste_format:        The format for the file.
+        :param str|unicode user_key:            The user API key.
+
+        :return: The result of the upload.
+        :rtype: any
+
+        """
+
+        if not file_paths:
+            raise ValueError("No filename specified")
+
         if self.__logger:
-            self.__logger.info("Sending log at: %s", file_path)
+            self.__logger.info("Sending log at: %s", ", ".join(file_paths))
 
-        code = self.__read_file_bytes(file_path)
+        code = self.__read_files(file_paths)
         return self.send(name, code, expire, paste_format, user_key)
 
     def send(self, name, code, expire='1M', paste_format=None, user_key=None):
@@ -157,44 +182,92 @@ class LogSender(object):
             self.__logger.info("HasteBin Url: %s", url)
         return url
 
-    def __read_file_bytes(self, file_path):
-        """ Reads bytes from a file.
+    def __read_files(self, file_paths):
+        """ Reads the most recent part of a log file and its older generations.
+
+        :param list[str|unicode] file_paths:    The files to read, starting with the most recent
+                                                one.
+
+        :return: The text read.
+        :rtype: str
+
+        """
+
+        max_size = self.__maxSize or self.__maxCharCount
+        if not max_size:
+            raise IndexError("No maximum size or char count set")
+
+        separator = "\n%s\n" % ("*" * 100)
+        size = os.path.getsize(file_paths[0])
+        if size > max_size:
+            if self.__logger:
+                self.__logger.warning("Filesize too large: %s, posting last %s kB",
+                                      size, max_size // 1024)
+
+            # post the top so we have all the required data, and the bottom
+            code = self.__read_head(file_paths[0]) + separator
+            return code + self.__read_tail(file_paths[0], max_size - len(code))
+
+        # the complete file fits, so fill up with the end of the older generations
+        parts = [self.__read_tail(file_paths[0], size)]
+        remaining = max_size - size
+        for file_path in file_paths[1:]:
+            if remaining <= len(separator):
+                break
+            code = self.__read_tail(file_path, remaining - len(separator))
+            parts.insert(0, code + separator)
+            remaining -= len(code) + len(separator)
+        return "".join(parts)
+
+    def __read_head(self, file_path):
+        """ Reads the top of a log file: the first 100 lines for hastebin or the first 20 kB.
+
+        :param str|unicode file_path:   The file to read.
+
+        :return: The text read.
+        :rtype: str
+
+        """
+
+        with io.open(file_path, 'rb') as fp:
+            if self.__maxCharCount:
+                data = b"".join(fp.readline() for _ in range(100))
+            else:
+                data = fp.read(20 * 1024)
+        return data.decode('utf-8', 'replace')
+
+    def __read_tail(self, file_path, max_bytes):
+        """ Reads the last bytes of a file without reading the complete file into memory. Gzip
+        compressed files are decompressed while reading.
 
         :param str|unicode file_path:   The file to read.
+        :param int max_bytes:           The maximum number of bytes to read.
 
-        :return: The bytes read.
+        :return: The text read, starting at a complete line.
         :rtype: str
 
         """
 
-        code = ""
-        with io.open(file_path, 'r', encoding='utf-8') as fp:
-            if self.__maxSize:
+        if file_path.endswith(".gz"):
+            # gzip files cannot be read backwards, so only keep the chunks we need
+            chunks = collections.deque()
+            kept = size = 0
+            with gzip.open(file_path, 'rb') as fp:
+                for chunk in iter(lambda: fp.read(64 * 1024), b""):
+                    chunks.append(chunk)
+                    kept += len(chunk)
+                    size += len(chunk)
+                    while kept - len(chunks[0]) >= max_bytes:
+                        kept -= len(chunks.popleft())
+            data = b"".join(chunks)
+        else:
+            with io.open(file_path, 'rb') as fp:
                 fp.seek(0, os.SEEK_END)
                 size = fp.tell()
-                fp.seek(0, os.SEEK_SET)
-                if size > self.__maxSize:
-                    if self.__logger:
-                        self.__logger.warning("Filesize too large: %s, posting last %s kB",
-                                              size, self.__maxSize / 1024)
-
-                    # post the top so wwe have all the required data, and the bottom
-                    top_bytes = 20
-                    code += fp.read(top_bytes * 1024)
-                    code += "\n%s\n" % ("*" * 100)
-                    fp.seek(size - (self.__maxSize - (top_bytes * 1024)), os.SEEK_SET)
-
-                code += fp.read()
-                return code
-
-            elif self.__maxCharCount:
-                code = fp.read()
-                if len(code) > self.__maxCharCount:
-                    lines = code.splitlines()
-                    result = "\n".join(lines[:100])
-                    result += "\n{}\n".format("*" * 100)
-                    result += code[-(self.__maxCharCount - len(result)) + 1:]
-                    return result
-                return code
-            else:
-                raise IndexError("No maximum size or char count set")
+                fp.seek(max(0, size - max_bytes), os.SEEK_SET)
+                data = fp.read()
+
+        if size > max_bytes:
+            data = data[-max_bytes:]
+            data = data[data.find(b"\n") + 1:]
+        return data.decode('utf-8', 'replace')
@@ -0,0 +1,164 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import time
+
+from resources.lib.logger import Logger
+
+
+class ListPipeline(object):
+    def __init__(self, name):
+        """ Creates a pipeline of stages that post-process a list of MediaItems in a single pass.
+
+        Each item is passed through the filters in the order they were added. Items that pass
+        all filters are de-duplicated on their `guidValue` (the first one wins) and then passed
+        to the actions. The time spent in each stage is logged.
+
+        :param str name:    The name of the pipeline, used for logging.
+
+        """
+
+        self.name = name
+        self.__filters = []     # : [(name, function)]
+        self.__actions = []     # : [(name, function)]
+        self.__removed = {}     # : name -> number of items removed by the stage
+
+        self.inputCount = 0     # : The number of items that went into the last run.
+        self.outputCount = 0    # : The number of items that came out of the last run.
+
+    def add_filter(self, name, keep):
+        """ Adds a stage that removes items.
+
+        :param str name:                        The name of the stage.
+        :param (MediaItem) -> bool keep:        Returns True if the item should be kept.
+
+        :return: The pipeline itself so stages can be chained.
+        :rtype: ListPipeline
+
+        """
+
+        self.__filters.append((name, keep))
+        return self
+
+    def add_action(self, name, action):
+        """ Adds a stage that is called for each unique item that passed all filters, for
+        instance to mark or collect items.
+
+        :param str name:                        The name of the stage.
+        :param (MediaItem) -> None action:      The function to call for each item.
+
+        :return: The pipeline itself so stages can be chained.
+        :rtype: ListPipeline
+
+        """
+
+        self.__actions.append((name, action))
+        return self
+
+    def removed(self, name):
+        """ Returns the number of items that a stage removed during the last run.
+
+        :param str name:    The name of the stage ("dedupe" for the duplicates).
+
+        :rtype: int
+
+        """
+
+        return self.__removed.get(name, 0)
+
+    def process(self, items):
+        """ Runs all stages over the items in a single pass.
+
+        :param list[MediaItem] items:   The items to process.
+
+        :return: The unique items that passed all filters, in their original order.
+        :rtype: list[MediaItem]
+
+        """
+
+        return list(self.iter_process(items))
+
+    def iter_process(self, items):
+        """ Runs all stages over the items in a single pass and yields the results as soon as
+        they have passed all stages.
+
+        :param collections.Iterable[MediaItem] items:   The items to process.
+
+        :return: The unique items that passed all filters, in their original order.
+        :rtype: collections.Iterable[MediaItem]
+
+        """
+
+        timed = Logger.instance() is not None and Logger.instance().minLogLevel <= Logger.LVL_DEBUG
+        stages = [name for name, _ in self.__filters] + ["dedupe"] + \
+                 [name for name, _ in self.__actions]
+        durations = dict((name, 0.0) for name in stages)
+        removed = dict((name, 0) for name in stages)
+        self.__removed = removed
+        self.inputCount = 0
+        self.outputCount = 0
+        start = time.time()
+        # the time the items were being handled by whoever consumes them
+        paused = 0.0
+
+        filters = self.__filters
+        actions = [action for _, action in self.__actions]
+        if timed:
+            filters = [(name, self.__timed(name, keep, durations)) for name, keep in filters]
+            actions = [self.__timed(name, action, durations) for name, action in self.__actions]
+
+        seen = set()
+        for item in items:
+            self.inputCount += 1
+            for name, keep in filters:
+                if not keep(item):
+                    removed[name] += 1
+                    break
+            else:
+                guid_value = item.guidValue
+                if guid_value in seen:
+                    removed["dedupe"] += 1
+                    continue
+                seen.add(guid_value)
+
+                for action in actions:
+                    action(item)
+
+                self.outputCount += 1
+                if timed:
+                    pause_start = time.time()
+                    yield item
+                    paused += time.time() - pause_start
+                else:
+                    yield item
+
+        if timed:
+            # whatever was not spent in the other stages was spent de-duplicating
+            duration = time.time() - start - paused
+            durations["dedupe"] = duration - sum(durations.values())
+            Logger.debug("%s: %d -> %d items in %.2f ms (%s)",
+                         self, self.inputCount, self.outputCount, duration * 1000,
+                         ", ".join("{0}: {1:.2f} ms -{2}".format(name, durations[name] * 1000, removed[name])
+                                   for name in stages))
+
+    def __timed(self, name, function, durations):
+        """ Wraps a stage function so the time spent in it is added to its duration.
+
+        :param str name:                    The name of the stage.
+        :param function function:           The function of the stage.
+        :param dict[str,float] durations:   The durations per stage.
+
+        :return: The wrapped function.
+        :rtype: function
+
+        """
+
+        def timed_function(item):
+            stage_start = time.time()
+            try:
+                return function(item)
+            finally:
+                durations[name] += time.time() - stage_start
+        return timed_function
+
+    def __str__(self):
+        return "ListPipeline [{0}]".format(self.name)
@@ -1,16 +1,18 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import gzip
 import os
 import io
+import shutil
 import sys
+import threading
 import traceback
 import time
-import datetime
 
 from resources.lib.backtothefuture import PY2
 
 
-class Logger:
+class Logger(object):
     LVL_CRITICAL = 50
     LVL_FATAL = LVL_CRITICAL
     LVL_ERROR = 40
@@ -47,7 +49,7 @@ class Logger:
 
     @staticmethod
     def create_logger(log_file_name, application_name, min_log_level=10,
-                      append=False, dual_logger=None):
+                      append=False, dual_logger=None, max_size=None, generations=1):
         """ Initialises the Logger instance and opens it for writing
 
         :param str|None log_file_name:      Path of the log file to write to.
@@ -56,6 +58,10 @@ class Logger:
         :param bool append:                 If set to True, the current log file is not deleted.
                                             Default value is False.
         :param function|None dual_logger:   A function that is used for dual logging.
+        :param int|None max_size:           The size (in bytes) at which the log file is
+                                            rotated. None only rotates when a new log is started.
+        :param int generations:             The number of (gzip compressed) old log files to
+                                            keep.
 
         :return: The new Logger instance
         :rtype: Logger
@@ -64,7 +70,7 @@ class Logger:
 
         if Logger.__logger is None:
             Logger.__logger = Logger(log_file_name, application_name, min_log_level, append,
-                                     dual_logger)
+                                     dual_logger, max_size, generations)
             # Logger.__logger.dualLog("CREATING LOGGER: {0}".format(Logger.__logger.id))
         else:
             Logger.warning("Cannot create a second logger instance!")
@@ -72,7 +78,7 @@ class Logger:
         return Logger.__logger
 
     def __init__(self, log_file_name, application_name, min_log_level=10,
-                 append=False, dual_logger=None):
+                 append=False, dual_logger=None, max_size=None, generations=1):
         """ Initialises the Logger instance and opens it for writing.
 
         :param str|None log_file_name:      Path of the log file to write to.
@@ -81,18 +87,31 @@ class Logger:
         :param bool append:                 If set to True, the current log file is not deleted.
                                             Default value is False.
         :param function|None dual_logger:   A function that is used for dual logging.
+        :param int|None max_size:           The size (in bytes) at which the log file is
+                                            rotated. None only rotates when a new log is started.
+        :param int generations:             The number of (gzip compressed) old log files to
+                                            keep.
 
         """
 
         self.logFileName = log_file_name
+        self.maxSize = max_size
+        self.generations = generations
         self.fileMode = "a"
         self.fileFlags = os.O_WRONLY | os.O_APPEND | os.O_CREAT
 
+        self.__min_log_level = None
         self.minLogLevel = min_log_level
         self.dualLog = dual_logger
         self.logDual = dual_logger is not None
-        self.logEntryCount = 0
-        self.flushInterval = 5 if log_file_name is not None else 1
+
+        # Log lines are buffered and only flushed once this number of characters was written, or
+        # when an error is logged.
+        self.flushSize = 64 * 1024 if log_file_name is not None else 0
+        self.__unflushed_size = 0
+        self.__file_size = 0                # : The size of the log file in bytes.
+        self.__rotating = False
+        self.__lock = threading.RLock()
         self.encoding = 'cp1252'
         self.applicationName = application_name
 
@@ -100,6 +119,11 @@ class Logger:
         self.timeFormat = "%Y%m%d %H:%M:%S"
         self.logFormat = '%s - [%-8s] - %-20s - %-4d - %s\n'
 
+        # caches for the timestamp (per second) and the source file per code object
+        self.__timestamp = None
+        self.__timestamp_second = None
+        self.__source_files = {}
+
         self.logLevelNames = {
             Logger.LVL_CRITICAL: 'CRITICAL',
             Logger.LVL_ERROR: 'ERROR',
@@ -121,6 +145,28 @@ class Logger:
                 self.applicationName, self.logFileName,), 1)
         return
 
+    @property
+    def minLogLevel(self):
+        """ The minimum level that is logged.
+
+        :rtype: int
+
+        """
+
+        return self.__min_log_level
+
+    @minLogLevel.setter
+    def minLogLevel(self, min_log_level):
+        """ Sets the minimum level that is logged. The static log methods for lower levels are
+        replaced by methods that do nothing, so they don't cost any formatting or frame lookups.
+
+        :param int min_log_level:   Minimum log level to log.
+
+        """
+
+        self.__min_log_level = min_log_level
+        Logger.__bind_log_methods(min_log_level)
+
     @staticmethod
     def trace(msg, *args, **kwargs):
         """ Logs an trace message (with loglevel 0)
@@ -238,19 +284,46 @@ class Logger:
             # Logging for concurrency
             # self.dualLog("CURRENT LOGGER before: {0}".format(Logger.instance() or "none"))
             Logger._Logger__logger = None
+            # Without a logger, the log methods should behave like they always did.
+            Logger.__bind_log_methods(Logger.LVL_TRACE)
             # Logging for concurrency
             # self.dualLog("CURRENT LOGGER after: {0}".format(Logger.instance() or "none"))
             # self.dualLog("CLOSING LOGGER: {0}".format(self.id))
 
-        self.logHandle.flush()
+        self.flush()
         if self.logHandle is not sys.stdout:
             self.logHandle.close()
 
+    def flush(self):
+        """ Writes all the buffered log lines to the log file. """
+
+        self.__unflushed_size = 0
+        self.logHandle.flush()
+
+    def get_log_files(self):
+        """ Returns the current log file and the existing old (gzip compressed) log files.
+
+        :return: The paths of the log files, starting with the most recent one.
+        :rtype: list[str]
+
+        """
+
+        if self.logFileName is None:
+            return []
+
+        log_files = [self.logFileName]
+        for generation in range(1, self.generations + 1):
+            generation_file = self.__get_generation_file_name(generation)
+            if not os.path.isfile(generation_file):
+                break
+            log_files.append(generation_file)
+        return log_files
+
     def clean_up_log(self):
         """ Closes an old log file and creates a new one.
 
-        This method renames the current log file to .old.log and creates a
-        new log file with the .log filename.
+        This method rotates the current log file into a compressed .1.log.gz file
+        (shifting the older ones) and creates a new log file with the .log filename.
 
         If the original file was open for writing/appending, the new file
         will also be open for writing/appending
@@ -273,17 +346,106 @@ class Logger:
         except:
             was_open = False
 
-        (file_name, extension) = os.path.splitext(self.logFileName)
-        old_file_name = "%s.old%s" % (file_name, extension)
-        if os.path.exists(self.logFileName):
-            if os.path.exists(old_file_name):
-                os.remove(old_file_name)
-            os.rename(self.logFileName, old_file_name)
+        self.__rotate_files()
 
         if was_open:
             self.__open_log()
         return
 
+    def __rotate_log(self):
+        """ Rotates the log file while logging, because it reached its maximum size. """
+
+        if self.logFileName is None or self.__rotating:
+            return
+
+        # Reopening the log file writes to it, which should not start another rotation.
+        self.__rotating = True
+        try:
+            self.flush()
+            self.logHandle.close()
+            try:
+                self.__rotate_files()
+            finally:
+                # If the rotation fails, keep appending to the current file.
+                self.__open_log()
+        except:
+            # Only retry after another maxSize bytes were logged.
+            self.__file_size = 0
+            self.__write("%s :: Error rotating logfile at %s bytes",
+                         self.applicationName, self.maxSize, level=Logger.LVL_ERROR, exc_info=True)
+            return
+        finally:
+            self.__rotating = False
+
+        self.__write("%s :: Rotated logfile at %s bytes, older entries are in '%s'",
+                     self.applicationName, self.maxSize, self.__get_generation_file_name(1),
+                     level=Logger.LVL_INFO)
+
+    def __rotate_files(self):
+        """ Compresses the current (closed) log file into the first old generation and shifts
+        the existing generations. The oldest generation is removed.
+
+        """
+
+        # files from the time there was only a single uncompressed .old.log are no longer used
+        (file_name, extension) = os.path.splitext(self.logFileName)
+        old_file_name = "%s.old%s" % (file_name, extension)
+        if os.path.exists(old_file_name):
+            os.remove(old_file_name)
+
+        if not os.path.exists(self.logFileName):
+            return
+
+        if self.generations < 1:
+            os.remove(self.logFileName)
+            return
+
+        for generation in range(self.generations, 1, -1):
+            older_file = self.__get_generation_file_name(generation - 1)
+            if os.path.exists(older_file):
+                self.__replace_file(older_file, self.__get_generation_file_name(generation))
+
+        # compress with the fastest level, as this is done while starting or logging
+        generation_file = self.__get_generation_file_name(1)
+        temp_file = "%s.tmp" % (generation_file, )
+        with io.open(self.logFileName, "rb") as source:
+            with gzip.open(temp_file, "wb", compresslevel=1) as target:
+                shutil.copyfileobj(source, target, 64 * 1024)
+        self.__replace_file(temp_file, generation_file)
+        os.remove(self.logFileName)
+
+    def __get_byte_size(self, text):
+        """ Returns the number of bytes that a text takes in the (UTF-8 encoded) log file.
+
+        :param str|unicode|bytes text:  The text that was written.
+
+        :rtype: int
+
+        """
+
+        if isinstance(text, bytes):
+            return len(text)
+        return len(text.encode("utf-8"))
+
+    def __get_generation_file_name(self, generation):
+        """ Returns the path of an old generation of the log file.
+
+        :param int generation:  The generation (1 is the most recent old log file).
+
+        :return: The path, e.g. retrospect.1.log.gz
+        :rtype: str
+
+        """
+
+        (file_name, extension) = os.path.splitext(self.logFileName)
+        return "%s.%d%s.gz" % (file_name, generation, extension)
+
+    def __replace_file(self, source, destination):
+        # Python 2 has no os.replace and os.rename does not overwrite on Windows.
+        if os.path.exists(destination):
+            os.remove(destination)
+        os.rename(source, destination)
+
     def __str__(self):
         return str(self.id)
 
@@ -321,58 +483,74 @@ class Logger:
             # get frame information
             (source_file, source_line_number) = self.__find_caller()
 
-            # get time information
-            timestamp = datetime.datetime.today().strftime(self.timeFormat)
+            # get time information, which only changes every second
+            now = time.time()
+            if int(now) != self.__timestamp_second:
+                self.__timestamp_second = int(now)
+                self.__timestamp = time.strftime(self.timeFormat, time.localtime(now))
+            timestamp = self.__timestamp
 
             # check for exception info, if present, add to end of string:
             # noinspection PyArgumentList
             msg = self.__process_exc_info(msg, **kwargs)
 
             # now split lines and write everyline into the logfile:
-            lines = msg.splitlines()
-            line_count = len(lines)
-
-            try:
-                # check if multiline
-                if line_count > 1:
-                    for i in range(0, line_count):
-                        # for line in lines:
-                        line = lines[i]
-                        if len(line) <= 0:
-                            continue
-
-                        # if last line:
-                        if i == line_count - 1:
-                            line = '+ %s' % (line, )
-                        elif i > 0:
-                            line = '| %s' % (line,)
-
+            if "\n" in msg or "\r" in msg:
+                lines = msg.splitlines()
+                line_count = len(lines)
+            else:
+                line_count = 1
+
+            # the lock prevents writing to the file while it is being rotated
+            with self.__lock:
+                try:
+                    # check if multiline
+                    if line_count > 1:
+                        for i in range(0, line_count):
+                            # for line in lines:
+                            line = lines[i]
+                            if len(line) <= 0:
+                                continue
+
+                            # if last line:
+                            if i == line_count - 1:
+                                line = '+ %s' % (line, )
+                            elif i > 0:
+                                line = '| %s' % (line,)
+
+                            formatted_message = self.logFormat % (
+                                timestamp,
+                                self.logLevelNames.get(log_level),
+                                source_file,
+                                source_line_number,
+                                line)
+                            self.logHandle.write(formatted_message)
+                            size = self.__get_byte_size(formatted_message)
+                            self.__unflushed_size += size
+                            self.__file_size += size
+                    else:
                         formatted_message = self.logFormat % (
                             timestamp,
                             self.logLevelNames.get(log_level),
                             source_file,
                             source_line_number,
-                            line)
+                            msg)
                         self.logHandle.write(formatted_message)
-                else:
-                    formatted_message = self.logFormat % (
-                        timestamp,
-                        self.logLevelNames.get(log_level),
-                        source_file,
-                        source_line_number,
-                        msg)
-                    self.logHandle.write(formatted_message)
-            except UnicodeEncodeError:
-                if PY2:
-                    formatted_message = formatted_message.encode('raw_unicode_escape')
-                    self.logHandle.write(formatted_message)
-                raise
-
-            # Finally close the filehandle
-            self.logEntryCount += 1
-            if self.logEntryCount % self.flushInterval == 0:
-                self.logEntryCount = 0
-                self.logHandle.flush()
+                        size = self.__get_byte_size(formatted_message)
+                        self.__unflushed_size += size
+                        self.__file_size += size
+                except UnicodeEncodeError:
+                    if PY2:
+                        formatted_message = formatted_message.encode('raw_unicode_escape')
+                        self.logHandle.write(formatted_message)
+                    raise
+
+                # Finally flush the filehandle, but only if enough was written or it was an error
+                if self.__unflushed_size >= self.flushSize or log_level >= Logger.LVL_ERROR:
+                    self.flush()
+
+                if self.maxSize and self.__file_size >= self.maxSize:
+                    self.__rotate_log()
             return
         except:
             if not self.logDual:
@@ -399,30 +577,68 @@ class Logger:
         :rtype: tuple[str, int]
 
         """
-        return_value = ("Unknown", 0)
-
         # get the current frame and descent down until the correct one is found
         # noinspection PyProtectedMember,PyUnresolvedReferences
         current_frame = sys._getframe(3)  # could be _getframe(#) and (3)
         while hasattr(current_frame, "f_code"):
             co = current_frame.f_code
-            source_file = os.path.normcase(co.co_filename)
-            method_name = co.co_name
-            # if current_frame belongs to this logger.py, equals <string> or equals a private log
-            # method (_log or __Log) continue searching.
-            if source_file == "<string>" \
-                    or source_file in os.path.normcase(__file__) \
-                    or "stopwatch.py" in source_file \
-                    or method_name in ("_Log", "__Log", "_log", "__log"):
+            # The file name only depends on the code object, so it is only determined once.
+            try:
+                source_file = self.__source_files[co]
+            except KeyError:
+                source_file = self.__get_source_file(co)
+                self.__source_files[co] = source_file
+
+            if source_file is None:
                 current_frame = current_frame.f_back
                 continue
+            return source_file, current_frame.f_lineno
+
+        return "Unknown", 0
+
+    def __get_source_file(self, co):
+        """ Determines the file name to log for a code object.
+
+        :param co:  The code object of a frame.
+
+        :return: The file name (without path) or None if the frame should be skipped.
+        :rtype: str|None
+
+        """
+
+        source_file = os.path.normcase(co.co_filename)
+        method_name = co.co_name
+        # if current_frame belongs to this logger.py, equals <string> or equals a private log
+        # method (_log or __Log) continue searching.
+        if source_file == "<string>" \
+                or source_file in os.path.normcase(__file__) \
+                or "stopwatch.py" in source_file \
+                or method_name in ("_Log", "__Log", "_log", "__log"):
+            return None
+
+        # get the source_path and source_file
+        return os.path.split(source_file)[1]
+
+    @staticmethod
+    def __bind_log_methods(min_log_level):
+        """ Binds the static log methods: the ones for levels below the minimum level are
+        replaced with methods that do nothing.
+
+        :param int min_log_level:   Minimum log level to log.
+
+        """
+
+        for name, level in Logger.__LOG_METHOD_LEVELS:
+            if level < min_log_level:
+                setattr(Logger, name, staticmethod(Logger.__ignore))
             else:
-                # get the source_path and source_file
-                (source_path, source_file) = os.path.split(source_file)
-                return_value = (source_file, current_frame.f_lineno)
-                break
+                setattr(Logger, name, Logger.__log_methods[name])
+
+    @staticmethod
+    def __ignore(msg, *args, **kwargs):
+        """ Replaces log methods for levels that are not logged. """
 
-        return return_value
+        pass
 
     def __open_log(self):
         """ Opens the log file for appending.
@@ -463,12 +679,14 @@ class Logger:
             else:
                 self.logHandle = io.open(self.logFileName, "r+", encoding='utf-8')
             self.logHandle.seek(0, 2)
+            self.__file_size = os.path.getsize(self.logFileName)
             self.__write("XOT Logger :: Appending Existing logFile", level=Logger.LVL_INFO)
         else:
             log_dir = os.path.dirname(self.logFileName)
             if not os.path.isdir(log_dir):
                 os.makedirs(log_dir)
             # no file exists, so just create a new one for writing
+            self.__file_size = 0
             if PY2:
                 self.logHandle = io.open(self.logFileName, "wb")
             else:
@@ -493,3 +711,13 @@ class Logger:
             msg = "%s\n%s" % (msg, traceback.format_exc())
 
         return msg
+
+
+# The original static log methods and their levels, so they can be restored after they were
+# replaced by methods that do nothing.
+Logger._Logger__LOG_METHOD_LEVELS = (
+    ("trace", Logger.LVL_TRACE), ("debug", Logger.LVL_DEBUG), ("info", Logger.LVL_INFO),
+    ("warning", Logger.LVL_WARNING), ("error", Logger.LVL_ERROR), ("critical", Logger.LVL_CRITICAL)
+)
+Logger._Logger__log_methods = dict(
+    (name, Logger.__dict__[name]) for name, _ in Logger._Logger__LOG_METHOD_LEVELS)
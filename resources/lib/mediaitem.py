@@ -8,6 +8,7 @@ from functools import reduce
 
 import xbmcgui
 
+from resources.lib.backtothefuture import PY2
 from resources.lib.addonsettings import AddonSettings
 from resources.lib import kodifactory
 from resources.lib.logger import Logger
@@ -20,8 +21,23 @@ from resources.lib.streams.adaptive import Adaptive
 from resources.lib.proxyinfo import ProxyInfo
 
 
-# Don't make this an MediaItem(object) as it breaks the pickles
-class MediaItem:
+if PY2:
+    class MediaItemType(type):
+        def __call__(cls, *args, **kwargs):
+            """ Pickles of the old-style MediaItem of Python 2 create the instance without any
+            arguments and then call __setstate__(), so then __init__() is skipped. """
+
+            if not args and not kwargs:
+                return cls.__new__(cls)
+            return type.__call__(cls, *args, **kwargs)
+
+    MediaItemBase = MediaItemType("MediaItemBase", (object,), {"__slots__": ()})
+else:
+    MediaItemBase = object
+
+
+# The properties and slots require a new-style class on Python 2.
+class MediaItem(MediaItemBase):
     """Main class that represent items that are retrieved in Retrospect. They are used
     to fill the lists and have MediaStreams in this hierarchy:
 
@@ -36,6 +52,29 @@ class MediaItem:
     LabelDuration = "Duration"
     ExpiresAt = LanguageHelper.get_localized_string(LanguageHelper.ExpiresAt)
 
+    # The __dict__ is still there for attributes that channels add themselves.
+    __slots__ = (
+        "__dict__",
+        "name", "tv_show_title", "url", "actionUrl",
+        "description", "thumb", "fanart", "icon", "poster",
+        "__date", "__timestamp", "__expires_datetime",
+        "dontGroup", "isLive", "isGeoLocked", "isDrmProtected", "isPaid", "season", "epsiode",
+        "__infoLabels", "complete", "__items", "__http_headers", "isCloaked", "__meta_data",
+        "media_type", "content_type", "__streams", "subtitle",
+        "__guid", "__guid_value", "__guid_source", "__display"
+    )
+
+    # The pickled state uses the attribute names of the non-slotted MediaItem, so pickles remain
+    # compatible. These are the lazily created containers and their names in the pickled state.
+    # They are left out of the state if they were never used.
+    __lazy_state_names = {
+        "_MediaItem__infoLabels": "_MediaItem__infoLabels",
+        "_MediaItem__items": "items",
+        "_MediaItem__http_headers": "HttpHeaders",
+        "_MediaItem__meta_data": "metaData",
+        "_MediaItem__streams": "streams",
+    }
+
     #noinspection PyShadowingBuiltins
     def __init__(self, title, url, media_type=mediatype.FOLDER, depickle=False, tv_show_title=None):
         """ Creates a new MediaItem.
@@ -81,15 +120,16 @@ class MediaItem:
         self.isPaid = False                       # : if set to True, the item is a Paid item and cannot be played (*)
         self.season = 0                           # : The season number
         self.epsiode = 0                          # : The episode number
-        self.__infoLabels = dict()                # : Additional Kodi InfoLabels
+        self.__infoLabels = None                  # : Additional Kodi InfoLabels (created on first write)
 
+        # The containers are only created when they are first used.
         self.complete = False
-        self.items = []
-        self.HttpHeaders = dict()                 # : http headers for the item data retrieval
+        self.__items = None
+        self.__http_headers = None                # : http headers for the item data retrieval
 
         # Items that are not essential for pickled
         self.isCloaked = False
-        self.metaData = dict()                    # : Additional data that is for internal / routing use only
+        self.__meta_data = None                   # : Additional data that is for internal / routing use only
 
         # Kodi media types: video, movie, tvshow, season, episode or musicvideo, music, song, album, artist
         self.media_type = media_type
@@ -97,22 +137,123 @@ class MediaItem:
         # musicvideos, videos, images, games. Defaults to 'episodes'
         self.content_type = contenttype.EPISODES
 
-        self.streams = []  # type: list[MediaStream]
+        self.__streams = None
         self.subtitle = None
 
-        if depickle:
-            # While deplickling we don't need to do the guid/guidValue calculations. They will
-            # be set from the __setstate__()
-            return
+        # GUID used for identification of the object. It is calculated from the initial title
+        # and url when it is first used. While depickling, it will be set from __setstate__().
+        self.__guid = None
+        self.__guid_value = None
+        self.__guid_source = None if depickle else (title, url)
 
-        # GUID used for identification of the object. Do not set from script, MD5 needed
-        # to prevent UTF8 issues
-        try:
-            self.guid = "%s%s" % (EncodingHelper.encode_md5(title), EncodingHelper.encode_md5(url or ""))
-        except:
-            Logger.error("Error setting GUID for title:'%s' and url:'%s'. Falling back to UUID", title, url, exc_info=True)
-            self.guid = self.__get_uuid()
-        self.guidValue = int("0x%s" % (self.guid,), 0)
+        # The cached display values for get_kodi_item() and the values they were based on.
+        self.__display = None
+
+    @property
+    def guid(self):
+        """ The unique identifier of this item, based on the title and url it was created with.
+
+        :rtype: str
+
+        """
+
+        if self.__guid is None and self.__guid_source is not None:
+            title, url = self.__guid_source
+            self.__guid_source = None
+
+            # MD5 needed to prevent UTF8 issues
+            try:
+                self.__guid = "%s%s" % (EncodingHelper.encode_md5(title), EncodingHelper.encode_md5(url or ""))
+            except:
+                Logger.error("Error setting GUID for title:'%s' and url:'%s'. Falling back to UUID", title, url, exc_info=True)
+                self.__guid = self.__get_uuid()
+        return self.__guid
+
+    @guid.setter
+    def guid(self, value):
+        self.__guid = value
+        self.__guid_value = None
+        self.__guid_source = None
+
+    @property
+    def guidValue(self):
+        """ The integer value of the guid, used for equality checks.
+
+        :rtype: int
+
+        """
+
+        if self.__guid_value is None and self.guid is not None:
+            self.__guid_value = int("0x%s" % (self.guid,), 0)
+        return self.__guid_value
+
+    @guidValue.setter
+    def guidValue(self, value):
+        self.__guid_value = value
+
+    @property
+    def items(self):
+        """ The child items of this item.
+
+        :rtype: list[MediaItem]
+
+        """
+
+        if self.__items is None:
+            self.__items = []
+        return self.__items
+
+    @items.setter
+    def items(self, value):
+        self.__items = value
+
+    @property
+    def HttpHeaders(self):
+        """ The http headers for the item data retrieval.
+
+        :rtype: dict[str,str]
+
+        """
+
+        if self.__http_headers is None:
+            self.__http_headers = dict()
+        return self.__http_headers
+
+    @HttpHeaders.setter
+    def HttpHeaders(self, value):
+        self.__http_headers = value
+
+    @property
+    def metaData(self):
+        """ Additional data that is for internal / routing use only.
+
+        :rtype: dict[str,any]
+
+        """
+
+        if self.__meta_data is None:
+            self.__meta_data = dict()
+        return self.__meta_data
+
+    @metaData.setter
+    def metaData(self, value):
+        self.__meta_data = value
+
+    @property
+    def streams(self):
+        """ The MediaStreams of this item.
+
+        :rtype: list[MediaStream]
+
+        """
+
+        if self.__streams is None:
+            self.__streams = []
+        return self.__streams
+
+    @streams.setter
+    def streams(self, value):
+        self.__streams = value
 
     def add_stream(self, url, bitrate=0, subtitle=None):
         """ Appends a single stream to  this MediaItem.
@@ -144,7 +285,7 @@ class MediaItem:
 
         """
 
-        return len(self.streams) > 0
+        return bool(self.__streams)
 
     @property
     def is_playable(self):
@@ -194,7 +335,7 @@ class MediaItem:
         :rtype: bool
         """
 
-        return MediaItem.LabelTrackNumber in self.__infoLabels
+        return bool(self.__infoLabels) and MediaItem.LabelTrackNumber in self.__infoLabels
 
     def has_date(self):
         """ Returns if a date was set
@@ -231,6 +372,8 @@ class MediaItem:
 
         """
 
+        if not self.__infoLabels:
+            return None
         return self.__infoLabels.get(label)
 
     def set_info_label(self, label, value):
@@ -242,7 +385,10 @@ class MediaItem:
 
         """
 
+        if self.__infoLabels is None:
+            self.__infoLabels = dict()
         self.__infoLabels[label] = value
+        self.__display = None
 
     def set_artwork(self, icon=None, thumb=None, fanart=None, poster=None):
         """ Set the artwork for this MediaItem.
@@ -273,10 +419,10 @@ class MediaItem:
             return
 
         self.season = int(season)
-        self.__infoLabels["Season"] = self.season
+        self.set_info_label("Season", self.season)
 
         self.epsiode = int(episode)
-        self.__infoLabels["Episode"] = self.epsiode
+        self.set_info_label("Episode", self.epsiode)
         return
 
     def set_expire_datetime(self, timestamp, year=0, month=0, day=0, hour=0, minutes=0, seconds=0):
@@ -392,29 +538,97 @@ class MediaItem:
         """
         return self.__date
 
-    def get_kodi_item(self, name=None):
+    @staticmethod
+    def get_display_settings():
+        """ Retrieves the add-on settings that determine how items are displayed. When creating
+        a lot of Kodi items, these can be retrieved once and passed on to `get_kodi_item()`.
+
+        :return: The folder prefix, whether to hide fanart and whether to show the date of folders
+                 in their title.
+        :rtype: tuple[str,bool,bool]
+
+        """
+
+        return (AddonSettings.get_folder_prefix(),
+                AddonSettings.hide_fanart(),
+                not AddonSettings.is_min_version(AddonSettings.KodiLeia))
+
+    def get_kodi_item(self, name=None, display_settings=None):
         """Creates a Kodi item with the same data is the MediaItem.
 
         This item is used for displaying purposes only and changes to it will
         not be passed on to the MediaItem.
 
-        :param str|unicode name:    Overwrites the name of the Kodi item.
+        The label, plot, info labels and art are cached and only determined again if any of the
+        values they are based on changed.
+
+        :param str|unicode name:                        Overwrites the name of the Kodi item.
+        :param tuple[str,bool,bool] display_settings:   The result of `get_display_settings()` or
+                                                        None to retrieve them.
 
         :return: a complete Kodi ListItem
         :rtype: xbmcgui.ListItem
 
         """
 
+        if display_settings is None:
+            display_settings = MediaItem.get_display_settings()
+
+        if self.description is None:
+            self.description = ''
+
+        # These are all the values that the displayed values depend on.
+        key = (name, display_settings, self.name, self.description, self.media_type, self.url,
+               self.tv_show_title, self.__date, self.__timestamp, self.__expires_datetime,
+               self.isDrmProtected, self.isGeoLocked, self.isPaid, self.isCloaked,
+               self.thumb, self.icon, self.fanart, self.poster)
+        if self.__display is None or self.__display[0] != key:
+            self.__display = (key, self.__get_display_values(name, display_settings))
+        name, info_labels, art = self.__display[1]
+
+        # now create the Kodi item
+        item = kodifactory.list_item(name or "<unknown>", self.__date)
+        item.setLabel(name)
+        item.setLabel2(self.__date)
+
+        # set a flag to indicate it is a item that can be used with setResolveUrl.
+        if self.is_playable:
+            Logger.trace("Setting IsPlayable to True")
+            item.setProperty("IsPlayable", "true")
+
+        # specific items
+        Logger.trace("Setting InfoLabels: %s", info_labels)
+        if self.media_type in mediatype.AUDIO_TYPES:
+            item.setInfo(type="music", infoLabels=info_labels)
+        else:
+            item.setInfo(type="video", infoLabels=info_labels)
+
+        # now set all the art to prevent duplicate calls to Kodi
+        item.setArt(art)
+
+        item.setContentLookup(False)
+        return item
+
+    def __get_display_values(self, name, display_settings):
+        """ Determines the values that are displayed for a Kodi item.
+
+        :param str|unicode name:                        Overwrites the name of the Kodi item.
+        :param tuple[str,bool,bool] display_settings:   The result of `get_display_settings()`.
+
+        :return: The label, info labels and art.
+        :rtype: tuple[str,dict[str,any],dict[str,str]]
+
+        """
+
+        folder_prefix, hide_fanart, show_folder_dates = display_settings
+
         # Update name and descriptions
         name_post_fix, description_pre_fix = self.__update_title_and_description_with_limitations()
 
-        name = self.__get_title(name)
+        name = self.__get_title(name, folder_prefix, show_folder_dates)
         name = "%s %s" % (name, name_post_fix)
         name = self.__full_decode_text(name)
 
-        if self.description is None:
-            self.description = ''
-
         if description_pre_fix != "":
             description = "%s\n\n%s" % (description_pre_fix, self.description)
         else:
@@ -434,7 +648,7 @@ class MediaItem:
             kodi_year = 0
 
         # Get all the info labels starting with the ones set and then add the specific ones
-        info_labels = self.__infoLabels.copy()
+        info_labels = dict(self.__infoLabels or {})
         info_labels["Title"] = name
 
         if self.media_type and self.media_type != mediatype.PAGE:
@@ -449,33 +663,13 @@ class MediaItem:
         if self.tv_show_title:
             info_labels["TVShowTitle"] = self.tv_show_title
 
-        # now create the Kodi item
-        item = kodifactory.list_item(name or "<unknown>", self.__date)
-        item.setLabel(name)
-        item.setLabel2(self.__date)
-
-        # set a flag to indicate it is a item that can be used with setResolveUrl.
-        if self.is_playable:
-            Logger.trace("Setting IsPlayable to True")
-            item.setProperty("IsPlayable", "true")
-
-        # specific items
-        Logger.trace("Setting InfoLabels: %s", info_labels)
-        if self.media_type in mediatype.AUDIO_TYPES:
-            item.setInfo(type="music", infoLabels=info_labels)
-        else:
-            item.setInfo(type="video", infoLabels=info_labels)
-
-        # now set all the art to prevent duplicate calls to Kodi
         art = {'thumb': self.thumb, 'icon': self.icon, 'landscape': self.thumb}
-        if self.fanart and not AddonSettings.hide_fanart():
+        if self.fanart and not hide_fanart:
             art['fanart'] = self.fanart
         if self.poster:
             art['poster'] = self.poster
-        item.setArt(art)
 
-        item.setContentLookup(False)
-        return item
+        return name, info_labels, art
 
     def get_resolved_kodi_item(self, bitrate, proxy=None):
         """ Retrieves a resolved kodi ListItem.
@@ -811,10 +1005,12 @@ class MediaItem:
 
         return title, description
 
-    def __get_title(self, name):
+    def __get_title(self, name, folder_prefix, show_folder_dates):
         """ Create the title based on the MediaItems name and type.
 
-        :param str name: the name to update.
+        :param str name:                the name to update.
+        :param str folder_prefix:       the prefix for folders.
+        :param bool show_folder_dates:  should the date be added to folders.
 
         :return: an updated name
         :rtype: str
@@ -829,12 +1025,10 @@ class MediaItem:
             name = "%s %s" % (LanguageHelper.get_localized_string(LanguageHelper.Page), name)
             Logger.debug("MediaItem.__get_title :: Adding Page Prefix")
 
-        elif self.__date != '' and not self.is_playable \
-                and not AddonSettings.is_min_version(AddonSettings.KodiLeia):
+        elif self.__date != '' and not self.is_playable and show_folder_dates:
             # not playable items should always show date
             name = "%s [COLOR=dimgray](%s)[/COLOR]" % (name, self.__date)
 
-        folder_prefix = AddonSettings.get_folder_prefix()
         if self.media_type in mediatype.FOLDER_TYPES and not folder_prefix == "":
             name = "%s %s" % (folder_prefix, name)
 
@@ -859,13 +1053,45 @@ class MediaItem:
         elif media_type == "video":
             media_type = mediatype.VIDEO
 
-        m = MediaItem(state["name"], state["url"], media_type=media_type, depickle=False)
-        self.__dict__ = m.__dict__
-        self.__dict__.update(state)
+        # Set the defaults for attributes that were added later and then apply the state.
+        MediaItem.__init__(self, state["name"], state["url"], media_type=media_type, depickle=True)
+        for name, value in state.items():
+            # Python 2 pickles of the old-style MediaItem can contain the display cache.
+            if name == "_MediaItem__display":
+                continue
+            setattr(self, name, value)
+
+        # Older pickles always had a guid, otherwise calculate it from the title and url.
+        if self.__guid is None:
+            self.__guid_source = (state["name"], state["url"])
 
         # Any modification/fixes for older version could be done here
         return
 
+    def __getstate__(self):
+        """ Returns the state for pickling. The state uses the attribute names of the non-slotted
+        MediaItem and leaves out the containers that were never used.
+
+        :return: The state of the item.
+        :rtype: dict[str,any]
+
+        """
+
+        state = dict(self.__dict__)
+        state["guid"] = self.guid
+        for slot in MediaItem.__slots__:
+            if slot == "__dict__" or slot == "__display" or slot.startswith("__guid"):
+                continue
+
+            attribute = "_MediaItem{}".format(slot) if slot.startswith("__") else slot
+            value = getattr(self, attribute)
+            if attribute in MediaItem.__lazy_state_names:
+                if value is None:
+                    continue
+                attribute = MediaItem.__lazy_state_names[attribute]
+            state[attribute] = value
+        return state
+
     # Because this happens at pickle-time, it could still lead to issues if the __init__() would
     # change. The result for __reduce__() will be the same as with the __setstate_() solution.
     # def __reduce__(self):
@@ -18,7 +18,9 @@ from resources.lib.logger import Logger
 Logger.create_logger(os.path.join(Config.profileDir, Config.logFileNameAddon),
                      Config.appName,
                      append=True,
-                     dual_logger=lambda x, y=4: xbmc.log(x, y))
+                     dual_logger=lambda x, y=4: xbmc.log(x, y),
+                     max_size=Config.logMaxSize,
+                     generations=Config.logGenerations)
 
 from resources.lib.helpers.htmlentityhelper import HtmlEntityHelper
 from resources.lib.addonsettings import AddonSettings, LOCAL
@@ -10,6 +10,8 @@ else:
 import os
 import io
 import sys
+import time
+import struct
 import base64
 from functools import reduce
 
@@ -39,17 +41,23 @@ class Pickler:
 
     __store_separator = "--"
 
+    # The PickleStore files start with a header (magic, flags, index length) followed by a
+    # pickled index with the offset and length of each item and the separately pickled items.
+    # This allows a single item to be loaded without de-serialising all of its siblings.
+    __store_magic = b"RPS2"
+    __store_header = struct.Struct(">4sBI")
+    __store_flag_compressed = 1
+    __store_compress_threshold = 64 * 1024   # : Stores smaller than this are not compressed.
+
     def __init__(self, pickle_store_path=None):
         # store some vars for speed optimization
         self.__pickle_container = dict()  # : storage for pickled items to prevent duplicate pickling
         self.__depickle_container = dict()  # : storage for depickled items.
 
         self.__pickle_store_path = pickle_store_path
-        self.__compress = True
-        if self.__compress:
-            self.__ext = "store.z"
-        else:
-            self.__ext = "store"
+        self.__ext = "store.idx"
+        # Stores with all items in a single zlib compressed pickle (used in older versions)
+        self.__legacy_ext = "store.z"
 
     def de_pickle_child_items(self, hex_string):
         """ De-serializes a serialized mediaitem.
@@ -145,8 +153,7 @@ class Pickler:
         import glob
         import time
 
-        pickles_path = os.path.join(
-            self.__pickle_store_path, "pickles", "*", "*", "*.{}".format(self.__ext))
+        pickles_path = os.path.join(self.__pickle_store_path, "pickles", "*", "*", "*.store*")
 
         cache_time = age * 30 * 24 * 60 * 60
         for filename in glob.glob(pickles_path):
@@ -177,6 +184,7 @@ class Pickler:
             raise ValueError("No parent and not channel guid specified")
 
         children = children or []
+        start = time.time()
 
         # The path is constructed like this for abcdef01-xxxx-xxxx-xxxx-xxxxxxxxxxxx:
         # <storepath>/ab/cd/abcdef01-xxxx-xxxx-xxxx-xxxxxxxxxxxx
@@ -186,20 +194,39 @@ class Pickler:
         if not os.path.isdir(pickles_dir):
             os.makedirs(pickles_dir)
 
-        content = {
-            "parent": parent,
-            "children": {item.guid: item for item in children}
-        }
+        entries = [pickle.dumps(parent, protocol=pickle.HIGHEST_PROTOCOL)]
+        entries += [pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL) for item in children]
+        raw_size = sum(len(entry) for entry in entries)
 
-        if self.__compress:
-            pickle_content = pickle.dumps(content, protocol=pickle.HIGHEST_PROTOCOL)
+        flags = 0
+        if raw_size >= Pickler.__store_compress_threshold:
             import zlib
-            with io.open(pickles_path, 'wb+') as fp:
-                fp.write(zlib.compress(pickle_content, zlib.Z_BEST_COMPRESSION))
-        else:
-            with io.open(pickles_path, "wb+") as fp:
-                pickle.dump(content, fp, protocol=pickle.HIGHEST_PROTOCOL)
-
+            flags |= Pickler.__store_flag_compressed
+            entries = [zlib.compress(entry, zlib.Z_BEST_SPEED) for entry in entries]
+
+        # The index contains the (offset, length) of the parent and per child guid.
+        offsets = []
+        offset = 0
+        for entry in entries:
+            offsets.append((offset, len(entry)))
+            offset += len(entry)
+
+        index = {
+            "parent": offsets[0],
+            "children": [(item.guid, ) + entry_offset for item, entry_offset in zip(children, offsets[1:])]
+        }
+        index_bytes = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with io.open(pickles_path, "wb+") as fp:
+            fp.write(Pickler.__store_header.pack(Pickler.__store_magic, flags, len(index_bytes)))
+            fp.write(index_bytes)
+            for entry in entries:
+                fp.write(entry)
+
+        Logger.debug("PickleStore: Stored %d items (%d bytes, %s) in %.1f ms",
+                     len(children) + 1, Pickler.__store_header.size + len(index_bytes) + offset,
+                     "compressed from {} bytes".format(raw_size) if flags else "uncompressed",
+                     (time.time() - start) * 1000)
         return
 
     def is_pickle_store_id(self, pickle):
@@ -219,17 +246,35 @@ class Pickler:
             return items
 
         pickles_dir, pickles_path = self.__get_pickle_path(store_guid)
+        if not os.path.isfile(pickles_path):
+            return self.__retrieve_media_items_from_legacy_store(store_guid)
+
         Logger.debug("PickleStore: Reading items from '%s'", pickles_path)
+        start = time.time()
+        try:
+            with io.open(pickles_path, "rb") as fp:
+                flags, index, data_start = self.__read_store_index(fp)
+                parent = self.__read_store_entry(fp, flags, data_start, *index["parent"])
+                items = {}
+                for guid, offset, length in index["children"]:
+                    items[guid] = self.__read_store_entry(fp, flags, data_start, offset, length)
+        except:
+            Logger.error("Error opening '%s'", pickles_path, exc_info=True)
+            return None
+
+        Logger.debug("PickleStore: Read %d items in %.1f ms", len(items) + 1, (time.time() - start) * 1000)
+        self.__depickle_container[store_guid] = {"parent": parent, "children": items}
+        return items
+
+    def __retrieve_media_items_from_legacy_store(self, store_guid):
+        pickles_dir, pickles_path = self.__get_pickle_path(store_guid, self.__legacy_ext)
+        Logger.debug("PickleStore: Reading items from legacy store '%s'", pickles_path)
 
         try:
-            if self.__compress:
-                import zlib
-                with io.open(pickles_path, 'rb') as fp:
-                    pickle_bytes = zlib.decompress(fp.read())
-                    content = pickle.loads(pickle_bytes)
-            else:
-                with io.open(pickles_path, "rb") as fp:
-                    content = pickle.load(fp)
+            import zlib
+            with io.open(pickles_path, 'rb') as fp:
+                pickle_bytes = zlib.decompress(fp.read())
+                content = pickle.loads(pickle_bytes)
         except:
             Logger.error("Error opening '%s'", pickles_path, exc_info=True)
             return None
@@ -240,15 +285,78 @@ class Pickler:
 
     def __retrieve_media_item_from_store(self, storage_location):
         store_guid, item_guid = storage_location.split(Pickler.__store_separator)
-        items = self.__retrieve_media_items_from_store(store_guid)
 
-        item_pickle = items.get(item_guid)
-        return item_pickle
+        # If the full store was already loaded or only a legacy store exists, use all items.
+        pickles_dir, pickles_path = self.__get_pickle_path(store_guid)
+        if store_guid in self.__depickle_container or not os.path.isfile(pickles_path):
+            items = self.__retrieve_media_items_from_store(store_guid)
+            item_pickle = items.get(item_guid)
+            return item_pickle
+
+        # Otherwise only load the requested item using the index.
+        start = time.time()
+        try:
+            with io.open(pickles_path, "rb") as fp:
+                flags, index, data_start = self.__read_store_index(fp)
+                for guid, offset, length in index["children"]:
+                    if guid == item_guid:
+                        break
+                else:
+                    Logger.warning("PickleStore: Item '%s' not found in '%s'", item_guid, pickles_path)
+                    return None
+
+                item = self.__read_store_entry(fp, flags, data_start, offset, length)
+        except:
+            Logger.error("Error opening '%s'", pickles_path, exc_info=True)
+            return None
+
+        Logger.debug("PickleStore: Read item '%s' of %d items in %.1f ms",
+                     item_guid, len(index["children"]), (time.time() - start) * 1000)
+        return item
+
+    def __read_store_index(self, fp):
+        """ Reads the header and index of a PickleStore file.
+
+        :param io.BufferedReader fp:    The opened PickleStore file.
+
+        :return: The flags, the index and the start position of the entries.
+        :rtype: tuple[int,dict,int]
+
+        """
+
+        header = fp.read(Pickler.__store_header.size)
+        magic, flags, index_length = Pickler.__store_header.unpack(header)
+        if magic != Pickler.__store_magic:
+            raise ValueError("Invalid PickleStore file")
+
+        index = pickle.loads(fp.read(index_length))
+        return flags, index, Pickler.__store_header.size + index_length
+
+    def __read_store_entry(self, fp, flags, data_start, offset, length):
+        """ Reads and de-serialises a single entry from a PickleStore file.
+
+        :param io.BufferedReader fp:    The opened PickleStore file.
+        :param int flags:               The flags from the store header.
+        :param int data_start:          The start position of the entries.
+        :param int offset:              The offset of the entry.
+        :param int length:              The length of the entry.
+
+        :return: The de-serialised item.
+        :rtype: MediaItem
+
+        """
+
+        fp.seek(data_start + offset)
+        entry = fp.read(length)
+        if flags & Pickler.__store_flag_compressed:
+            import zlib
+            entry = zlib.decompress(entry)
+        return pickle.loads(entry)
 
-    def __get_pickle_path(self, store_guid):
+    def __get_pickle_path(self, store_guid, ext=None):
         # file storage is always lower case
         store_guid = store_guid.lower()
-        pickles_file = "{}.{}".format(store_guid, self.__ext)
+        pickles_file = "{}.{}".format(store_guid, ext or self.__ext)
 
         pickles_dir = os.path.join(
             self.__pickle_store_path, "pickles", store_guid[0:2], store_guid[2:4])
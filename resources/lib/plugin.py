@@ -1,12 +1,10 @@
 # coding=utf-8  # NOSONAR
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from resources.lib import envcontroller
 from resources.lib.logger import Logger
 from resources.lib.addonsettings import AddonSettings
 from resources.lib.retroconfig import Config
 from resources.lib.xbmcwrapper import XbmcWrapper
-from resources.lib.helpers.channelimporter import ChannelIndex
 from resources.lib.helpers.languagehelper import LanguageHelper
 from resources.lib.helpers.sessionhelper import SessionHelper
 from resources.lib.actions.actionparser import ActionParser
@@ -40,13 +38,14 @@ class Plugin(ActionParser):
         # are we in session?
         session_active = SessionHelper.is_session_active(Logger.instance())
 
-        # fetch some environment settings
-        env_ctrl = envcontroller.EnvController(Logger.instance())
-
         if not session_active:
             # do add-on start stuff
             Logger.info("Add-On start detected. Performing startup actions.")
 
+            # fetch some environment settings
+            from resources.lib.envcontroller import EnvController
+            env_ctrl = EnvController(Logger.instance())
+
             # print the folder structure
             env_ctrl.print_retrospect_settings_and_folders(Config, AddonSettings)
 
@@ -57,8 +56,8 @@ class Plugin(ActionParser):
             # check for cache folder
             env_ctrl.cache_check()
 
-            # do some cache cleanup
-            env_ctrl.cache_clean_up(Config.cacheDir, Config.cacheValidTime)
+            # do some cache cleanup, the http cache (www) maintains its own size and age limits.
+            env_ctrl.cache_clean_up(Config.cacheDir, Config.cacheValidTime, skip_folders=["www"])
 
             # empty picklestore
             self.pickler.purge_store(Config.addonId)
@@ -89,6 +88,7 @@ class Plugin(ActionParser):
                              channel_url_id, channel_code)
 
                 # import the channel
+                from resources.lib.helpers.channelimporter import ChannelIndex
                 channel_register = ChannelIndex.get_register()
                 channel = channel_register.get_channel(channel_url_id, channel_code)
 
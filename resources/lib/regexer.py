@@ -1,6 +1,9 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import re
+import threading
+import time
+from collections import OrderedDict
 
 from resources.lib.logger import Logger
 
@@ -8,8 +11,13 @@ from resources.lib.logger import Logger
 class Regexer(object):
     """ Main regexer class """
 
-    __compiledRegexes = dict()
-    
+    # The maximum number of compiled regexes that are kept.
+    MAX_CACHE_SIZE = 250
+
+    __compiledRegexes = OrderedDict()   # : regex -> (compiled regex, is dictionary regex)
+    __statistics = dict()               # : regex -> [calls, seconds, results] (in debug mode)
+    __lock = threading.Lock()
+
     def __init__(self):
         raise Exception("Static only class")
 
@@ -27,6 +35,51 @@ class Regexer(object):
 
         return regex.replace("(?<", "(?P<")
 
+    @staticmethod
+    def precompile(regex):
+        """ Compiles one or more regexes before they are used, so errors in them are logged
+        when a channel registers them, instead of when they are first used.
+
+        :param list[str|unicode]|str|unicode regex:     The regex(es) to compile.
+
+        :return: Indication whether all regexes were valid.
+        :rtype: bool
+
+        """
+
+        valid = True
+        for r in regex if isinstance(regex, (tuple, list)) else [regex]:
+            try:
+                Regexer.__get_compiled_regex(r)
+            except re.error:
+                Logger.error("Invalid regex: %s", r, exc_info=True)
+                valid = False
+        return valid
+
+    @staticmethod
+    def log_report(logger, limit=10):
+        """ Writes the regexes that took the most time to the log and resets the counters.
+
+        :param Logger logger:   The logger to write to.
+        :param int limit:       The maximum number of regexes to report.
+
+        """
+
+        with Regexer.__lock:
+            statistics = Regexer.__statistics
+            Regexer.__statistics = dict()
+
+        if not statistics:
+            return
+
+        total_time = sum(seconds for _, seconds, _ in statistics.values())
+        slowest = sorted(statistics.items(), key=lambda s: s[1][1], reverse=True)[:limit]
+        lines = ["{0:>8.1f} ms {1:>5d} calls {2:>6d} results  {3}".format(
+            seconds * 1000, calls, results, regex[:100].replace("\n", "\\n"))
+            for regex, (calls, seconds, results) in slowest]
+        logger.debug("Performed %d regexes in %.1f ms. Slowest regexes:\n%s",
+                     len(statistics), total_time * 1000, "\n".join(lines))
+
     @staticmethod
     def do_regex(regex, data):
         """ Performs a regular expression and returns a list of matches that came from
@@ -41,6 +94,9 @@ class Regexer(object):
     
         Empty matches are included in the result.
 
+        If a list of regexes is used, the results of all regexes are returned, prefixed with
+        the index of the regex that found them.
+
         :param list[str|unicode]|str|unicode regex:     The regex to perform on the data.
         :param str|unicode data:                        The data to perform the regex on.
 
@@ -51,87 +107,117 @@ class Regexer(object):
                 
         try:
             if not isinstance(regex, (tuple, list)):
-                if "?P<" in regex:
-                    return Regexer.__do_dictionary_regex(regex, data)
-                else:
-                    return Regexer.__do_regex(regex, data)
+                return Regexer.__do_regex(regex, data)[0]
 
             # We got a list of Regexes
             Logger.debug("Performing multi-regex find on '%s'", regex)
             results = []
             count = 0
             for r in regex:
-                if "?P<" in r:
-                    regex_results = Regexer.__do_dictionary_regex(r, data)
+                regex_result, is_dictionary = Regexer.__do_regex(r, data)
+                if is_dictionary:
                     # add to the results with a count in front of the results
-                    results += [(count, x) for x in regex_results]
+                    results += [(count, x) for x in regex_result]
                 else:
-                    regex_results = Regexer.__do_regex(r, data)
-                    if len(regex_results) <= 0:
+                    if len(regex_result) <= 0:
                         continue
 
-                    if isinstance(regex_results[0], (tuple, list)):
+                    if isinstance(regex_result[0], (tuple, list)):
                         # is a tupe/list was returned, prepend it with the count
                         # noinspection PyTypeChecker
-                        results += [(count,) + x for x in regex_results]
+                        results += [(count,) + x for x in regex_result]
                     else:
                         # create a tuple with the results
-                        results += [(count, x) for x in regex_results]
+                        results += [(count, x) for x in regex_result]
                 # increase count
                 count += 1
             Logger.debug("Returning %s results", len(results))
-            return list(results)
+            return results
         except:
             Logger.critical('error regexing', exc_info=True)
             return []
 
     @staticmethod
     def __do_regex(regex, data):
-        """ does the actual regex for non-dictionary regexes 
-        
-        Arguments:
-        regex : string - the regex to perform on the data.
-        data  : string - the data to perform the regex on.
-        
-        Returns:
-        A list of matches that came from the regex.findall method.
-        :rtype: list[str]
-       
-        """
-        
-        compiled_regex = Regexer.__get_compiled_regex(regex)
-        return compiled_regex.findall(data)
-    
-    @staticmethod
-    def __do_dictionary_regex(regex, data):
-        """ Does the actual regex for dictionary regexes and returns a list of matches that
-        came from the regex.finditer method.
+        """ Does the actual regex. Dictionary regexes (with named groups) return a list of
+        dictionaries from the regex.finditer method, others the results of regex.findall.
 
-        :param regex:   The regex to perform on the data.
-        :param data:    The data to perform the regex on.
+        :param str|unicode regex:   The regex to perform on the data.
+        :param str|unicode data:    The data to perform the regex on.
 
-        :return: a list of matches that came from the regex.finditer method.
-        :rtype: list[dict[str|unicode,str|unicode]]
+        :return: A list of matches and whether they are dictionaries.
+        :rtype: tuple[list[str|tuple|dict[str|unicode,str|unicode]],bool]
 
         """
-        
-        compiled_regex = Regexer.__get_compiled_regex(regex)
-        it = compiled_regex.finditer(data)
-        return [x.groupdict() for x in it]
+
+        start = time.time()
+        compiled_regex, is_dictionary = Regexer.__get_compiled_regex(regex)
+        if is_dictionary:
+            results = [x.groupdict() for x in compiled_regex.finditer(data)]
+        else:
+            results = compiled_regex.findall(data)
+        if Regexer.__is_counting():
+            Regexer.__count(regex, time.time() - start, len(results))
+        return results, is_dictionary
 
     @staticmethod
     def __get_compiled_regex(regex):
+        """ Returns a compiled version of the regex. The most recently used regexes are kept in a
+        cache of at most MAX_CACHE_SIZE regexes.
+
+        :param str|unicode regex:   The input regex to fetch a compiled version from.
+
+        :return: The compiled regex and an indication whether it uses named groups.
+        :rtype: tuple[re.Pattern,bool]
+
         """
-        @param regex: The input regex to fetch a compiled version from
-        @return: a compiled regex
+
+        with Regexer.__lock:
+            compiled = Regexer.__compiledRegexes.pop(regex, None)
+            if compiled is not None:
+                # move it to the end, as it is the most recently used one
+                Regexer.__compiledRegexes[regex] = compiled
+                return compiled
+
+        Logger.trace("Compiling Regex object and storing in cache")
+        compiled = (re.compile(regex, re.DOTALL + re.IGNORECASE), "?P<" in regex)
+        with Regexer.__lock:
+            Regexer.__compiledRegexes[regex] = compiled
+            while len(Regexer.__compiledRegexes) > Regexer.MAX_CACHE_SIZE:
+                Regexer.__compiledRegexes.popitem(last=False)
+        return compiled
+
+    @staticmethod
+    def __is_counting():
+        """ The counters are only kept when debug logging is enabled, as they are only reported
+        then.
+
+        :rtype: bool
+
         """
 
-        if regex in Regexer.__compiledRegexes:
-            Logger.debug("Re-using cached Compiled Regex object")
-            compiled_regex = Regexer.__compiledRegexes[regex]
-        else:
-            Logger.trace("Compiling Regex object and storing in cache")
-            compiled_regex = re.compile(regex, re.DOTALL + re.IGNORECASE)
-            Regexer.__compiledRegexes[regex] = compiled_regex
+        return Logger.instance() is not None and Logger.instance().minLogLevel <= Logger.LVL_DEBUG
+
+    @staticmethod
+    def __count(regex, duration, results):
+        """ Adds the duration and number of results of a regex to its counters. At most
+        MAX_CACHE_SIZE regexes are counted: if there are more, the one that took the least time
+        is dropped.
+
+        :param str|unicode regex:   The regex.
+        :param float duration:      The time it took in seconds.
+        :param int results:         The number of results.
+
+        """
 
-        return compiled_regex
+        with Regexer.__lock:
+            statistics = Regexer.__statistics.get(regex)
+            if statistics is None:
+                if len(Regexer.__statistics) >= Regexer.MAX_CACHE_SIZE:
+                    fastest = min(Regexer.__statistics.items(), key=lambda s: s[1][1])[0]
+                    del Regexer.__statistics[fastest]
+                Regexer.__statistics[regex] = [1, duration, results]
+            else:
+                statistics[0] += 1
+                statistics[1] += duration
+                statistics[2] += results
@@ -67,9 +67,31 @@ class Config:
 
     appName = "Retrospect"                                   # : Name of the XOT application (could be overwritten from the addon.xml)
     cacheValidTime = 7 * 24 * 3600                           # : Time the cache files are valid in seconds.
+    httpPoolSize = 10                                        # : Maximum number of keep-alive connections per host.
+    httpIdleTimeout = 60                                     # : Close idle keep-alive connections after this number of seconds.
+    httpCacheMaxSize = 50                                    # : Maximum size of the http cache in MB.
+    httpMaxWorkers = 4                                       # : Maximum number of parallel requests for multi-page retrievals.
+    httpMaxAttempts = 3                                      # : Maximum number of attempts for failing (idempotent) requests.
+    httpBackoffFactor = 0.5                                  # : Base delay in seconds between retries (doubles for each retry).
+    httpConnectTimeout = 10                                  # : Timeout in seconds for setting up a connection.
+    httpReadTimeout = 30                                     # : Timeout in seconds for waiting on a response.
+    httpHedgeAfter = None                                    # : Send a second GET request after this number of seconds without response (None disables hedging).
+    requestMetricsFile = "requestmetrics.json"               # : Session aggregate of the HTTP request metrics in the profile folder.
+    folderStreaming = False                                  # : Send the items of a folder to Kodi while the data is still being parsed.
+    folderChunkSize = 50                                     # : Number of items per call to Kodi when streaming folder items.
+    cacheWarmingInterval = 6 * 3600                          # : Minimum time in seconds between two background cache warming runs.
+    cacheWarmingIdleTime = 15 * 60                           # : Kodi must be idle for this number of seconds before the cache is warmed.
+    cacheWarmingMaxFolders = 5                               # : Maximum number of first-level folders per channel that are warmed.
+    cacheWarmingMaxRequests = 200                            # : Maximum number of network requests per cache warming run.
+    cacheWarmingMaxBytes = 20 * 1024 * 1024                  # : Maximum number of downloaded bytes per cache warming run.
+    cacheWarmingMaxDuration = 15 * 60                        # : Maximum time in seconds that a cache warming run may be busy.
+    cacheWarmingDutyCycle = 0.25                             # : Fraction of the time the cache warming may be busy, it sleeps the rest.
 
     logLevel = 10                                            # : Minimum log level that is being logged. (from logger.py) Defaults to Debug
     logFileNameAddon = "retrospect.log"                      # : Filename of the log file of the plugin
+    logFileNameService = "retrospect.service.log"            # : Filename of the log file of the background service
+    logMaxSize = 5 * 1024 * 1024                             # : Size in bytes at which the log file is rotated.
+    logGenerations = 2                                       # : Number of gzip compressed old log files to keep.
 
     # must be single quotes for build script
     __addonXmlPath = os.path.join(rootDir, 'addon.xml')
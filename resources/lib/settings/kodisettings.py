@@ -1,9 +1,21 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import os
+import time
+from xml.etree import ElementTree
+
+import xbmc
 import xbmcaddon
+import xbmcvfs
 
 from . import settingsstore
 
+# Code to map the old translatePath
+try:
+    translatePath = xbmcvfs.translatePath
+except AttributeError:
+    translatePath = xbmc.translatePath
+
 
 class KodiSettings(settingsstore.SettingsStore):
     def __init__(self, logger, addon_id=None):
@@ -12,17 +24,23 @@ class KodiSettings(settingsstore.SettingsStore):
         self.__channel_setting_format = "channel_{0}_{1}"
         self.__addon_settings = xbmcaddon.Addon() if addon_id is None else xbmcaddon.Addon(addon_id)
 
+        # The user's settings are read from the settings.xml with a single read on first use.
+        # Settings that are not in there are retrieved from Kodi once and then kept as well.
+        self.__snapshot = None
+
     def set_setting(self, setting_id, setting_value, channel=None):
         setting_value = str(setting_value)
 
         if channel:
             channel_setting_id = self.__channel_setting_format.format(channel.guid, setting_id)
             self.__addon_settings.setSetting(channel_setting_id, str(setting_value))
+            self.__update_snapshot(channel_setting_id, setting_value)
             self._logger.trace("Kodi Channel Setting Updated: %s.%s(%s)='%s'",
                                channel.id, setting_id, channel_setting_id,
                                self._get_safe_print_value(setting_id, setting_value))
         else:
             self.__addon_settings.setSetting(setting_id, str(setting_value))
+            self.__update_snapshot(setting_id, setting_value)
             self._logger.trace("Kodi Setting Updated: %s='%s'", setting_id,
                                self._get_safe_print_value(setting_id, setting_value))
 
@@ -45,12 +63,12 @@ class KodiSettings(settingsstore.SettingsStore):
     def get_setting(self, setting_id, channel=None, default=None):
         if channel:
             channel_setting_id = self.__channel_setting_format.format(channel.guid, setting_id)
-            setting_value = self.__addon_settings.getSetting(channel_setting_id)
+            setting_value = self.__get_snapshot_value(channel_setting_id)
             self._logger.trace("Kodi Channel Setting: %s.%s(%s)='%s'",
                                channel.id, setting_id, channel_setting_id,
                                self._get_safe_print_value(setting_id, setting_value))
         else:
-            setting_value = self.__addon_settings.getSetting(setting_id)
+            setting_value = self.__get_snapshot_value(setting_id)
             self._logger.trace("Kodi Setting: %s='%s'", setting_id,
                                self._get_safe_print_value(setting_id, setting_value))
 
@@ -61,6 +79,75 @@ class KodiSettings(settingsstore.SettingsStore):
 
     def open_settings(self):
         self.__addon_settings.openSettings()
+        # the user might have changed the settings.
+        self.__snapshot = None
+
+    def __get_snapshot_value(self, setting_id):
+        """ Retrieves a setting value from the snapshot of the user's settings.
+
+        :param str setting_id:  The ID of the setting.
+
+        :return: The string value of the setting.
+        :rtype: str
+
+        """
+
+        if self.__snapshot is None:
+            self.__snapshot = self.__read_snapshot()
+
+        if setting_id in self.__snapshot:
+            return self.__snapshot[setting_id]
+
+        # Not stored by the user yet, so Kodi will return the default value.
+        setting_value = self.__addon_settings.getSetting(setting_id)
+        self.__snapshot[setting_id] = setting_value
+        return setting_value
+
+    def __update_snapshot(self, setting_id, setting_value):
+        if self.__snapshot is None:
+            self.__snapshot = self.__read_snapshot()
+        self.__snapshot[setting_id] = setting_value
+
+    def __read_snapshot(self):
+        """ Reads all the settings that the user stored from the settings.xml in the profile
+        folder of the add-on.
+
+        :return: The values of the stored settings.
+        :rtype: dict[str,str]
+
+        """
+
+        snapshot = {}
+        profile = translatePath(self.__addon_settings.getAddonInfo("profile"))
+        if isinstance(profile, bytes):
+            profile = profile.decode("utf-8")
+
+        settings_file = os.path.join(profile, "settings.xml")
+        if not os.path.isfile(settings_file):
+            self._logger.debug("No Kodi settings file found at '%s'", settings_file)
+            return snapshot
+
+        start = time.time()
+        try:
+            root = ElementTree.parse(settings_file).getroot()
+        except (ElementTree.ParseError, IOError):
+            self._logger.warning("Error reading Kodi settings file '%s'", settings_file, exc_info=True)
+            return snapshot
+
+        for element in root.iter("setting"):
+            setting_id = element.get("id")
+            if not setting_id:
+                continue
+
+            # Version 1 uses a 'value' attribute, version 2 the element text.
+            setting_value = element.get("value")
+            if setting_value is None:
+                setting_value = element.text or ""
+            snapshot[setting_id] = setting_value
+
+        self._logger.debug("Read %d Kodi settings from '%s' in %.2f ms",
+                           len(snapshot), settings_file, (time.time() - start) * 1000)
+        return snapshot
 
     # this really only works if no reference to the <store> object is kept somewhere.
     def __del__(self):
@@ -4,13 +4,17 @@ import os
 import io
 import json
 import shutil
+from contextlib import contextmanager
 
 from . import settingsstore
 from resources.lib.backtothefuture import PY2
+from resources.lib.connectivity.streamcache import replace_file, get_temp_file_name
 
 
 class LocalSettings(settingsstore.SettingsStore):
     __settings = None
+    __batch_depth = 0
+    __dirty = False
 
     __SETTINGS_KEY = "settings"
     __CHANNELS_KEY = "channels"
@@ -46,10 +50,32 @@ class LocalSettings(settingsstore.SettingsStore):
                                channel.id, setting_id,
                                self._get_safe_print_value(setting_id, setting_value))
 
-        # store the file
-        self.__store_settings()
+        # store the file, unless we are in a batch
+        if LocalSettings.__batch_depth:
+            LocalSettings.__dirty = True
+        else:
+            self.__store_settings()
         return setting_value
 
+    @contextmanager
+    def batch(self):
+        """ Groups several `set_setting` calls so the settings file is only written once, when
+        the outermost batch ends (also if it ends with an exception)::
+
+            with store.batch():
+                store.set_setting("a", 1)
+                store.set_setting("b", 2)
+
+        """
+
+        LocalSettings.__batch_depth += 1
+        try:
+            yield self
+        finally:
+            LocalSettings.__batch_depth -= 1
+            if not LocalSettings.__batch_depth and LocalSettings.__dirty:
+                self.__store_settings()
+
     def get_boolean_setting(self, setting_id, channel=None, default=None):
         return self.get_setting(setting_id, channel, default)
 
@@ -123,14 +149,22 @@ class LocalSettings(settingsstore.SettingsStore):
         if LocalSettings.__settings is None or not list(LocalSettings.__settings.keys()):
             raise ValueError("Empty settings object cannot save.")
 
+        LocalSettings.__dirty = False
+
+        # Write a compact version to a temporary file and replace the settings file with it, so
+        # a crash while writing can never leave a corrupt settings file behind.
+        temp_file = get_temp_file_name(self.local_settings_file)
+        content = json.dumps(LocalSettings.__settings, separators=(",", ":")).encode('utf-8')
+
         # open the file as binary file, as json.dumps will already encode as utf-8 bytes
-        with io.open(self.local_settings_file, mode='w+b') as fp:
-            content = json.dumps(LocalSettings.__settings, indent=4).encode('utf-8')
+        with io.open(temp_file, mode='w+b') as fp:
             fp.write(content)
 
             # Print the content might expose secret settings. See self._secure_setting_ids
             # self._logger.Debug("Storing settings: %s", content)
 
+        replace_file(temp_file, self.local_settings_file)
+
     def __empty_settings(self):
         return {
             LocalSettings.__SETTINGS_KEY: {},
@@ -1,5 +1,7 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+from contextlib import contextmanager
+
 from resources.lib.logger import Logger
 
 
@@ -88,6 +90,19 @@ class SettingsStore(object):
 
         pass
 
+    @contextmanager
+    def batch(self):
+        """ Groups several `set_setting` calls so stores that write to disk only do so once,
+        when the outermost batch ends::
+
+            with store.batch():
+                store.set_setting("a", 1)
+                store.set_setting("b", 2)
+
+        """
+
+        yield self
+
     def _get_safe_print_value(self, setting_id, setting_value):
         """ Makes sure we strip out the sensitive data while logging.
 
@@ -1,22 +1,25 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import os
+import threading
 import time
 
 from resources.lib.backtothefuture import PY2
 if PY2:
     # noinspection PyCompatibility,PyUnresolvedReferences
-    from cookielib import Cookie, CookieJar, MozillaCookieJar
+    from cookielib import Cookie, CookieJar
+    # noinspection PyUnresolvedReferences
+    from Queue import Queue, Empty
 else:
     # noinspection PyCompatibility
-    from http.cookiejar import Cookie, CookieJar, MozillaCookieJar
+    from http.cookiejar import Cookie, CookieJar
+    from queue import Queue, Empty
 from collections import namedtuple
 
-import requests
-import requests.cookies
-import requests.utils
-
-from resources.lib.connectivity.cachehttpadapter import CacheHTTPAdapter
+from resources.lib.connectivity.cachepolicy import CachePolicy
+from resources.lib.connectivity.cookiestore import CookieStore
+from resources.lib.connectivity.requestmetrics import RequestMetrics
+from resources.lib.connectivity.retrypolicy import RetryPolicy
 from resources.lib.connectivity.streamcache import StreamCache
 from resources.lib.logger import Logger
 from resources.lib.proxyinfo import ProxyInfo
@@ -36,14 +39,26 @@ class UriHandler(object):
 
     @staticmethod
     def create_uri_handler(cache_dir=None, web_time_out=30,
-                           cookie_jar=None, ignore_ssl_errors=False):
+                           cookie_jar=None, ignore_ssl_errors=False,
+                           pool_size=10, idle_timeout=60, cache_max_size=50,
+                           max_workers=4, retry_policy=None, store_cookies=True):
         """ Initialises the UriHandler class
 
         Keyword Arguments:
         :param str cache_dir:           A path for http caching. If specified, caching will be used.
         :param int web_time_out:        Timeout for requests in seconds.
         :param str|unicode cookie_jar:  The path to the cookie jar (in case of file storage).
+        :param bool store_cookies:      Write changed cookies back to the cookie jar file. If
+                                        not, the cookies are only read from it.
         :param bool ignore_ssl_errors:  Ignore any SSL certificate errors.
+        :param int pool_size:           The maximum number of keep-alive connections per host.
+        :param int idle_timeout:        Close pooled connections after being idle for this
+                                        number of seconds.
+        :param int cache_max_size:      The maximum size of the http cache in MB.
+        :param int max_workers:         The maximum number of parallel requests for
+                                        `open_multiple` and `open_pages`.
+        :param RetryPolicy retry_policy: The policy for retrying failed requests. If None is
+                                        specified, a default policy is used.
 
         :return: A new UriHandler object
         :rtype: _RequestsHandler
@@ -54,9 +69,14 @@ class UriHandler(object):
         if UriHandler.__handler is None or \
                 UriHandler.instance().ignoreSslErrors != ignore_ssl_errors:
 
+            if UriHandler.__handler is not None:
+                UriHandler.__handler.close()
+
             handler = _RequestsHandler(
                 cache_dir=cache_dir, web_time_out=web_time_out, cookie_jar=cookie_jar,
-                ignore_ssl_errors=ignore_ssl_errors
+                ignore_ssl_errors=ignore_ssl_errors, pool_size=pool_size, idle_timeout=idle_timeout,
+                cache_max_size=cache_max_size, max_workers=max_workers,
+                retry_policy=retry_policy, store_cookies=store_cookies
             )
 
             UriHandler.__handler = handler
@@ -126,6 +146,60 @@ class UriHandler(object):
         return UriHandler.instance().open(uri, proxy, params, data, json,
                                           referer, additional_headers, no_cache, force_text)
 
+    @staticmethod
+    def open_multiple(uris, proxy=None, referer=None, additional_headers=None,
+                      no_cache=False, force_text=False, max_workers=None):
+        """ Opens multiple URL's in parallel using a bounded number of worker threads. All
+        requests share the same cookies, sessions and cache.
+
+        :param list[str] uris:            The URI's to download.
+        :param ProxyInfo proxy:           The address and port (proxy.address.ext:port) of a
+                                          proxy server that should be used.
+        :param str referer:               The http referer to use.
+        :param dict additional_headers:   The optional headers.
+        :param bool no_cache:             Should cache be disabled.
+        :param bool force_text:           In case no content type is specified, force text.
+        :param int max_workers:           The maximum number of parallel requests (None for the
+                                          default of the UriHandler).
+
+        :return: The data that was retrieved from the URI's in the same order as the URI's.
+        :rtype: list[str|unicode]
+
+        """
+
+        return UriHandler.instance().open_multiple(uris, proxy, referer, additional_headers,
+                                                   no_cache, force_text, max_workers)
+
+    @staticmethod
+    def open_pages(url_format, first_page, last_page, step=1, proxy=None, referer=None,
+                   additional_headers=None, no_cache=False, force_text=False, max_workers=None):
+        """ Opens all pages of a paged API with a known number of pages in parallel.
+
+        The page URL's are created using `url_format.format(page)` for all pages from
+        `first_page` up to and including `last_page`.
+
+        :param str url_format:            The URL format with a {} placeholder for the page.
+        :param int first_page:            The first page to retrieve.
+        :param int last_page:             The last page to retrieve (inclusive).
+        :param int step:                  The increment between pages (or offsets).
+        :param ProxyInfo proxy:           The address and port (proxy.address.ext:port) of a
+                                          proxy server that should be used.
+        :param str referer:               The http referer to use.
+        :param dict additional_headers:   The optional headers.
+        :param bool no_cache:             Should cache be disabled.
+        :param bool force_text:           In case no content type is specified, force text.
+        :param int max_workers:           The maximum number of parallel requests (None for the
+                                          default of the UriHandler).
+
+        :return: The data of the pages in page order.
+        :rtype: list[str|unicode]
+
+        """
+
+        return UriHandler.instance().open_pages(url_format, first_page, last_page, step, proxy,
+                                                referer, additional_headers, no_cache,
+                                                force_text, max_workers)
+
     @staticmethod
     def header(uri, proxy=None, referer=None, additional_headers=None):
         """ Retrieves header information only.
@@ -296,25 +370,35 @@ class UriHandler(object):
 class _RequestsHandler(object):
 
     def __init__(self, cache_dir=None, web_time_out=30, cookie_jar=None,
-                 ignore_ssl_errors=False):
+                 ignore_ssl_errors=False, pool_size=10, idle_timeout=60,
+                 cache_max_size=50, max_workers=4, retry_policy=None, store_cookies=True):
         """ Initialises the UriHandler class
 
         Keyword Arguments:
         :param str cache_dir:         A path for http caching. If specified, caching will be used.
         :param int web_time_out:      Timeout for requests in seconds
         :param str cookie_jar:        The path to the cookie jar (in case of file storage)
+        :param bool store_cookies:    Write changed cookies back to the cookie jar file. If not,
+                                      the cookies are only read from it.
         :param ignore_ssl_errors:     Ignore any SSL certificate errors.
+        :param int pool_size:         The maximum number of keep-alive connections per host.
+        :param int idle_timeout:      Close pooled connections after being idle for this
+                                      number of seconds.
+        :param int cache_max_size:    The maximum size of the http cache in MB.
+        :param int max_workers:       The maximum number of parallel requests for
+                                      `open_multiple` and `open_pages`.
+        :param RetryPolicy retry_policy: The policy for retrying failed requests. If None is
+                                      specified, a default policy is used.
 
         """
 
         self.id = int(time.time())
 
+        # File based cookies are only written to disk when the handler is flushed.
         if cookie_jar:
-            self.cookieJar = MozillaCookieJar(cookie_jar)
-            if not os.path.isfile(cookie_jar):
-                self.cookieJar.save()
+            self.cookieJar = CookieStore(cookie_jar)
             self.cookieJar.load()
-            self.cookieJarFile = True
+            self.cookieJarFile = store_cookies
         else:
             self.cookieJar = CookieJar()
             self.cookieJarFile = False
@@ -322,17 +406,30 @@ class _RequestsHandler(object):
         self.cacheDir = cache_dir
         self.cacheStore = None
         if cache_dir:
-            self.cacheStore = StreamCache(cache_dir)
+            self.cacheStore = StreamCache(cache_dir, max_size_mb=cache_max_size)
             Logger.debug("Opened %s", self.cacheStore)
         else:
             Logger.debug("No cache-store provided. Cached disabled.")
 
         self.userAgent = "Mozilla/5.0 (Windows; U; Windows NT 6.1; en-GB; rv:1.9.2.13) Gecko/20101203 Firefox/3.6.13 (.NET CLR 3.5.30729)"
         self.webTimeOut = web_time_out                # max duration of request
+        self.retryPolicy = retry_policy or RetryPolicy(read_timeout=web_time_out)
         self.ignoreSslErrors = ignore_ssl_errors      # ignore SSL errors
         if self.ignoreSslErrors:
             Logger.warning("Ignoring all SSL errors in Python")
 
+        # keep-alive sessions that are shared between all calls. They are only created (and the
+        # Requests module is only imported) once the first request is made.
+        self.cachePolicy = CachePolicy()
+        self.poolSize = pool_size
+        self.idleTimeout = idle_timeout
+        self.__session_pool = None
+        self.__session_pool_lock = threading.Lock()
+        self.maxWorkers = max_workers
+
+        # timings and sizes of all requests
+        self.metrics = RequestMetrics()
+
         # status of the most recent call
         self.status = UriStatus(code=0, url=None, error=False, reason=None)
 
@@ -379,6 +476,7 @@ class _RequestsHandler(object):
                             no_cache=True, stream=True)
         if r is None:
             return ""
+        self.status = self.__get_status(r)
 
         retrieved_bytes = 0
         total_size = int(r.headers.get('Content-Length', '0').strip())
@@ -428,11 +526,26 @@ class _RequestsHandler(object):
         :rtype: str|unicode
 
         """
+
+        data, self.status = self.__open(uri, proxy=proxy, params=params, data=data, json=json,
+                                        referer=referer, additional_headers=additional_headers,
+                                        no_cache=no_cache, force_text=force_text)
+        return data
+
+    def __open(self, uri, proxy=None, params=None, data=None, json=None,
+               referer=None, additional_headers=None, no_cache=False, force_text=False):
+        """ Opens an URL without updating the status of the handler, so it can be used from
+        worker threads.
+
+        :return: The data that was retrieved from the URI and the status of the request.
+        :rtype: tuple[str|unicode,UriStatus]
+
+        """
+
         r = self.__requests(uri, proxy=proxy, params=params, data=data, json=json,
                             referer=referer, additional_headers=additional_headers,
                             no_cache=no_cache, stream=False)
-        if r is None:
-            return ""
+        status = self.__get_status(r)
 
         content_type = r.headers.get("content-type", "")
         if r.encoding == 'ISO-8859-1' and "text" in content_type:
@@ -450,9 +563,123 @@ class _RequestsHandler(object):
 
         # We might need a better mechanism here.
         if not r.encoding and content_type.lower() in ["application/json", "application/javascript"]:
-            return r.text
+            return r.text, status
+
+        return r.text if r.encoding else r.content, status
+
+    def open_multiple(self, uris, proxy=None, referer=None, additional_headers=None,
+                      no_cache=False, force_text=False, max_workers=None):
+        """ Opens multiple URL's in parallel using a bounded number of worker threads. All
+        requests share the same cookies, sessions and cache.
+
+        If any of the requests raises an exception, no new requests are started and the first
+        exception is re-raised once the running requests are done.
 
-        return r.text if r.encoding else r.content
+        Afterwards the `status` of the handler is that of the first failed request, or that of
+        the last URI if all requests succeeded.
+
+        :param list[str] uris:                  The URI's to download.
+        :param ProxyInfo proxy:                 The address and port (proxy.address.ext:port) of a
+                                                proxy server that should be used.
+        :param str referer:                     The http referer to use.
+        :param dict|None additional_headers:    The optional headers.
+        :param bool no_cache:                   Should cache be disabled.
+        :param bool force_text:                 In case no content type is specified, force text.
+        :param int|None max_workers:            The maximum number of parallel requests (None
+                                                for the handler default).
+
+        :return: The data that was retrieved from the URI's in the same order as the URI's.
+        :rtype: list[str|unicode]
+
+        """
+
+        uris = list(uris)
+        results = [""] * len(uris)
+        statuses = [None] * len(uris)
+        worker_count = min(max_workers or self.maxWorkers, len(uris))
+        if worker_count <= 1:
+            return [self.open(uri, proxy=proxy, referer=referer,
+                              additional_headers=additional_headers, no_cache=no_cache,
+                              force_text=force_text) for uri in uris]
+
+        Logger.debug("Retrieving %d URL's using %d workers", len(uris), worker_count)
+        start = time.time()
+        pending = iter(enumerate(uris))
+        errors = []
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                with lock:
+                    if errors:
+                        return
+                    try:
+                        index, uri = next(pending)
+                    except StopIteration:
+                        return
+
+                try:
+                    results[index], statuses[index] = self.__open(
+                        uri, proxy=proxy, referer=referer, additional_headers=additional_headers,
+                        no_cache=no_cache, force_text=force_text)
+                except Exception as ex:
+                    Logger.error("Error retrieving %s", uri, exc_info=True)
+                    with lock:
+                        errors.append(ex)
+
+        workers = []
+        for i in range(worker_count):
+            thread = threading.Thread(target=worker, name="UriHandler worker {}".format(i))
+            thread.daemon = True
+            thread.start()
+            workers.append(thread)
+
+        for thread in workers:
+            thread.join()
+
+        # only the calling thread updates the status
+        statuses = [status for status in statuses if status is not None]
+        failed = [status for status in statuses if status.error]
+        if failed:
+            self.status = failed[0]
+        elif statuses:
+            self.status = statuses[-1]
+
+        if errors:
+            raise errors[0]
+
+        Logger.debug("Retrieved %d URL's in %.3fs", len(uris), time.time() - start)
+        return results
+
+    def open_pages(self, url_format, first_page, last_page, step=1, proxy=None, referer=None,
+                   additional_headers=None, no_cache=False, force_text=False, max_workers=None):
+        """ Opens all pages of a paged API with a known number of pages in parallel.
+
+        The page URL's are created using `url_format.format(page)` for all pages from
+        `first_page` up to and including `last_page`.
+
+        :param str url_format:                  The URL format with a {} placeholder for the page.
+        :param int first_page:                  The first page to retrieve.
+        :param int last_page:                   The last page to retrieve (inclusive).
+        :param int step:                        The increment between pages (or offsets).
+        :param ProxyInfo proxy:                 The address and port (proxy.address.ext:port) of a
+                                                proxy server that should be used.
+        :param str referer:                     The http referer to use.
+        :param dict|None additional_headers:    The optional headers.
+        :param bool no_cache:                   Should cache be disabled.
+        :param bool force_text:                 In case no content type is specified, force text.
+        :param int|None max_workers:            The maximum number of parallel requests (None
+                                                for the handler default).
+
+        :return: The data of the pages in page order.
+        :rtype: list[str|unicode]
+
+        """
+
+        uris = [url_format.format(page) for page in range(first_page, last_page + 1, step)]
+        return self.open_multiple(uris, proxy=proxy, referer=referer,
+                                  additional_headers=additional_headers, no_cache=no_cache,
+                                  force_text=force_text, max_workers=max_workers)
 
     def header(self, uri, proxy=None, referer=None, additional_headers=None):
         """ Retrieves header information only.
@@ -468,84 +695,240 @@ class _RequestsHandler(object):
 
         """
 
-        with requests.session() as s:
-            s.cookies = self.cookieJar
-            s.verify = not self.ignoreSslErrors
+        proxies = self.__get_proxies(proxy, uri)
+        headers = self.__get_headers(referer, additional_headers)
+        s = self.sessionPool.get_session(uri, self.cookieJar, proxies=proxies,
+                                         verify=not self.ignoreSslErrors, use_cache=False)
+
+        Logger.info("Performing a HEAD for %s", uri)
+        r = self.__send(s, "HEAD", uri, proxies=proxies, headers=headers, allow_redirects=True)
 
-            proxies = self.__get_proxies(proxy, uri)
-            headers = self.__get_headers(referer, additional_headers)
+        content_type = r.headers.get("Content-Type", "")
+        real_url = r.url
 
-            Logger.info("Performing a HEAD for %s", uri)
-            r = s.head(uri, proxies=proxies, headers=headers, allow_redirects=True,
-                       timeout=self.webTimeOut)
+        self.status = UriStatus(code=r.status_code, url=uri, error=not r.ok, reason=r.reason)
 
-            content_type = r.headers.get("Content-Type", "")
-            real_url = r.url
+        if r.ok:
+            Logger.info("%s resulted in '%s %s' (%s) for %s [%s]",
+                        r.request.method, r.status_code, r.reason, r.elapsed, r.url,
+                        self.__get_connection_info())
+            return content_type, real_url
+        else:
+            Logger.error("%s failed with in '%s %s' (%s) for %s [%s]",
+                         r.request.method, r.status_code, r.reason, r.elapsed, r.url,
+                         self.__get_connection_info())
+            return "", ""
 
-            self.status = UriStatus(code=r.status_code, url=uri, error=not r.ok, reason=r.reason)
-            if self.cookieJarFile:
-                # noinspection PyUnresolvedReferences
-                self.cookieJar.save()
+    @property
+    def sessionPool(self):
+        """ The pool of keep-alive sessions that is shared between all calls.
 
-            if r.ok:
-                Logger.info("%s resulted in '%s %s' (%s) for %s",
-                            r.request.method, r.status_code, r.reason, r.elapsed, r.url)
-                return content_type, real_url
-            else:
-                Logger.error("%s failed with in '%s %s' (%s) for %s",
-                             r.request.method, r.status_code, r.reason, r.elapsed, r.url)
-                return "", ""
+        :rtype: SessionPool
+
+        """
+
+        with self.__session_pool_lock:
+            if self.__session_pool is None:
+                from resources.lib.connectivity.sessionpool import SessionPool
+                self.__session_pool = SessionPool(self.cacheStore, pool_size=self.poolSize,
+                                                  idle_timeout=self.idleTimeout,
+                                                  cache_policy=self.cachePolicy)
+            return self.__session_pool
+
+    def flush(self):
+        """ Writes the changed cookies and the cache index to disk. """
+
+        if self.cookieJarFile:
+            # noinspection PyUnresolvedReferences
+            self.cookieJar.save()
+        if self.cacheStore:
+            self.cacheStore.flush()
+
+    def close(self):
+        """ Closes all pooled connections of this handler and persists the cookies and the
+        cache index. """
+
+        if self.__session_pool is not None:
+            Logger.info("Closing %s", self.__session_pool)
+            self.__session_pool.close()
+        self.flush()
 
     # noinspection PyUnusedLocal
     def __requests(self, uri, proxy, params, data, json, referer,
                    additional_headers, no_cache, stream):
 
-        with requests.session() as s:
-            s.cookies = self.cookieJar
-            s.verify = not self.ignoreSslErrors
-            if self.cacheStore and not no_cache:
-                Logger.trace("Adding the %s to the request", self.cacheStore)
-                s.mount("https://", CacheHTTPAdapter(self.cacheStore))
-                s.mount("http://", CacheHTTPAdapter(self.cacheStore))
-
-            proxies = self.__get_proxies(proxy, uri)
-
-            headers = self.__get_headers(referer, additional_headers)
-
-            if params is not None:
-                # Old UriHandler behaviour. Set form header to keep compatible
-                if "content-type" not in headers:
-                    headers["content-type"] = "application/x-www-form-urlencoded"
-
-                Logger.info("Performing a POST with '%s' for %s", headers["content-type"], uri)
-                r = s.post(uri, data=params, proxies=proxies, headers=headers,
-                           stream=stream, timeout=self.webTimeOut)
-            elif data is not None:
-                # Normal Requests compatible data object
-                Logger.info("Performing a POST with '%s' for %s", headers.get("content-type", "<No Content-Type>"), uri)
-                r = s.post(uri, data=data, proxies=proxies, headers=headers,
-                           stream=stream, timeout=self.webTimeOut)
-            elif json is not None:
-                Logger.info("Performing a json POST with '%s' for %s", headers.get("content-type", "<No Content-Type>"), uri)
-                r = s.post(uri, json=json, proxies=proxies, headers=headers,
-                           stream=stream, timeout=self.webTimeOut)
-            else:
-                Logger.info("Performing a GET for %s", uri)
-                r = s.get(uri, proxies=proxies, headers=headers,
-                          stream=stream, timeout=self.webTimeOut)
+        proxies = self.__get_proxies(proxy, uri)
+        headers = self.__get_headers(referer, additional_headers)
+        s = self.sessionPool.get_session(uri, self.cookieJar, proxies=proxies,
+                                         verify=not self.ignoreSslErrors, use_cache=not no_cache)
+
+        if params is not None:
+            # Old UriHandler behaviour. Set form header to keep compatible
+            if "content-type" not in headers:
+                headers["content-type"] = "application/x-www-form-urlencoded"
+
+            Logger.info("Performing a POST with '%s' for %s", headers["content-type"], uri)
+            r = self.__send(s, "POST", uri, data=params, proxies=proxies, headers=headers,
+                            stream=stream)
+        elif data is not None:
+            # Normal Requests compatible data object
+            Logger.info("Performing a POST with '%s' for %s", headers.get("content-type", "<No Content-Type>"), uri)
+            r = self.__send(s, "POST", uri, data=data, proxies=proxies, headers=headers,
+                            stream=stream)
+        elif json is not None:
+            Logger.info("Performing a json POST with '%s' for %s", headers.get("content-type", "<No Content-Type>"), uri)
+            r = self.__send(s, "POST", uri, json=json, proxies=proxies, headers=headers,
+                            stream=stream)
+        else:
+            Logger.info("Performing a GET for %s", uri)
+            r = self.__send(s, "GET", uri, proxies=proxies, headers=headers, stream=stream)
+
+        if r.ok:
+            Logger.info("%s resulted in '%s %s' (%s) for %s [%s]",
+                        r.request.method, r.status_code, r.reason, r.elapsed, r.url,
+                        self.__get_connection_info())
+        else:
+            Logger.error("%s failed with '%s %s' (%s) for %s [%s]",
+                         r.request.method, r.status_code, r.reason, r.elapsed, r.url,
+                         self.__get_connection_info())
+
+        return r
+
+    def __get_status(self, r):
+        """ Creates the status of a request.
+
+        :param requests.Response r:     The response of the request.
+
+        :rtype: UriStatus
 
-            if r.ok:
-                Logger.info("%s resulted in '%s %s' (%s) for %s",
-                            r.request.method, r.status_code, r.reason, r.elapsed, r.url)
+        """
+
+        return UriStatus(code=r.status_code, url=r.url, error=not r.ok, reason=r.reason)
+
+    def __send(self, session, method, uri, **kwargs):
+        """ Sends a request and retries it according to the RetryPolicy for the URI.
+
+        :param requests.Session session:    The session to use.
+        :param str method:                  The HTTP method.
+        :param str uri:                     The URI to request.
+        :param kwargs:                      The arguments for `requests.Session.request`.
+
+        :return: The response of the last attempt.
+        :rtype: requests.Response
+
+        """
+
+        policy = self.retryPolicy.get_policy(uri)
+        kwargs["timeout"] = policy.get_timeout()
+        stream = kwargs.get("stream", False)
+        hedge = policy.can_hedge(method, stream)
+
+        start = time.time()
+        attempt = 0
+        r = None
+        error = None
+        try:
+            while True:
+                attempt += 1
+                r = self.__send_attempt(session, method, uri, policy, hedge, attempt, kwargs)
+                if r is not None:
+                    return r
+        except Exception as ex:
+            error = type(ex).__name__
+            raise
+        finally:
+            self.metrics.record(method, uri, r, time.time() - start, attempts=attempt,
+                                error=error, stream=stream)
+
+    def __send_attempt(self, session, method, uri, policy, hedge, attempt, kwargs):
+        """ Performs a single attempt of a request. If the attempt should be retried, it waits
+        for the backoff and returns None.
+
+        :param requests.Session session:    The session to use.
+        :param str method:                  The HTTP method.
+        :param str uri:                     The URI to request.
+        :param RetryPolicy policy:          The policy for the URI.
+        :param bool hedge:                  Should the request be hedged?
+        :param int attempt:                 The number of this attempt.
+        :param dict kwargs:                 The arguments for `requests.Session.request`.
+
+        :return: The final response or None if the request should be retried.
+        :rtype: requests.Response|None
+
+        """
+
+        from requests.exceptions import ConnectionError as RequestsConnectionError, \
+            ConnectTimeout, Timeout
+
+        try:
+            if hedge:
+                r = self.__send_hedged(session, method, uri, policy.hedgeAfter, kwargs)
             else:
-                Logger.error("%s failed with '%s %s' (%s) for %s",
-                             r.request.method, r.status_code, r.reason, r.elapsed, r.url)
+                r = session.request(method, uri, **kwargs)
+        except (RequestsConnectionError, Timeout) as ex:
+            if not policy.should_retry_error(method, attempt, isinstance(ex, ConnectTimeout)):
+                raise
+            backoff = policy.get_backoff(attempt)
+            Logger.warning("%s for %s failed (attempt %d of %d): %s. Retrying in %.2fs.",
+                           method, uri, attempt, policy.maxAttempts, ex, backoff)
+        else:
+            if not policy.should_retry_status(method, r.status_code, attempt):
+                return r
+            backoff = policy.get_backoff(attempt, r.headers.get("Retry-After"))
+            Logger.warning("%s for %s resulted in '%s %s' (attempt %d of %d). Retrying in %.2fs.",
+                           method, uri, r.status_code, r.reason, attempt, policy.maxAttempts,
+                           backoff)
+            r.close()
+
+        time.sleep(backoff)
+        return None
+
+    def __send_hedged(self, session, method, uri, hedge_after, kwargs):
+        """ Sends a request and, if there is no response in time, sends an identical second
+        request. The response that is received first is used. The responses are not streamed,
+        so the late response releases its connection by itself. If the second request was sent,
+        the response is marked as `hedged`.
 
-            self.status = UriStatus(code=r.status_code, url=r.url, error=not r.ok, reason=r.reason)
-            if self.cookieJarFile:
-                # noinspection PyUnresolvedReferences
-                self.cookieJar.save()
-            return r
+        :param requests.Session session:    The session to use.
+        :param str method:                  The HTTP method.
+        :param str uri:                     The URI to request.
+        :param float hedge_after:           The number of seconds to wait for the first request.
+        :param dict kwargs:                 The arguments for `requests.Session.request`.
+
+        :return: The first response that was received.
+        :rtype: requests.Response
+
+        """
+
+        responses = Queue()
+
+        def send():
+            try:
+                responses.put((session.request(method, uri, **kwargs), None))
+            except Exception as ex:
+                responses.put((None, ex))
+
+        def start(name):
+            thread = threading.Thread(target=send, name=name)
+            thread.daemon = True
+            thread.start()
+
+        start("UriHandler request")
+        try:
+            r, error = responses.get(timeout=hedge_after)
+        except Empty:
+            Logger.debug("No response after %ss. Sending a hedged %s for %s", hedge_after, method, uri)
+            start("UriHandler hedged request")
+            r, error = responses.get()
+            if error is not None:
+                # The other request might still succeed.
+                r, error = responses.get()
+            if r is not None:
+                r.hedged = True
+
+        if error is not None:
+            raise error
+        return r
 
     def __get_headers(self, referer, additional_headers):
         headers = {}
@@ -624,9 +1007,15 @@ class _RequestsHandler(object):
             # cancel the download
             return True
 
+    def __get_connection_info(self):
+        new_connections, reused_connections = self.sessionPool.get_connection_counts()
+        return "connections: {0} new, {1} reused".format(new_connections, reused_connections)
+
     def __is_text_content_type(self, content_type):
         return content_type.lower() in ["application/vnd.apple.mpegurl", "application/x-mpegurl"]
 
     def __str__(self):
-        return "UriHandler [id={0}, useCaching={1}, ignoreSslErrors={2}]"\
-            .format(self.id, self.cacheStore, self.ignoreSslErrors)
+        # Don't create the session pool just for logging purposes
+        pool = self.__session_pool or "<not started, poolSize={0}>".format(self.poolSize)
+        return "UriHandler [id={0}, useCaching={1}, ignoreSslErrors={2}, pool={3}]"\
+            .format(self.id, self.cacheStore, self.ignoreSslErrors, pool)
@@ -1,8 +1,15 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import os.path
+import time
+
 import xbmc
 import xbmcaddon
 
+# setup the paths in Python
+from resources.lib.initializer import Initializer  # nopep8
+Initializer.set_unicode()
+
 
 def autorun_retrospect():
     if xbmcaddon.Addon().getSetting("auto_run") == "true":
@@ -10,4 +17,120 @@ def autorun_retrospect():
     return
 
 
-autorun_retrospect()
+def warm_cache(monitor, player):
+    """ Warms the HTTP cache for the enabled channels and the favourites.
+
+    The UriHandler only reads the cookie jar, so the cookies that the plugin stores while the
+    cache is warmed are not overwritten. It is flushed after each run, which merges its changes
+    into the cache index on disk. The request metrics of the run are only logged.
+
+    :param xbmc.Monitor monitor:    The monitor that indicates whether Kodi is shutting down.
+    :param xbmc.Player player:      The player that indicates whether media is playing.
+
+    :return: False if the run was interrupted.
+    :rtype: bool
+
+    """
+
+    from resources.lib.retroconfig import Config
+    from resources.lib.logger import Logger
+
+    log_file = Logger.create_logger(os.path.join(Config.profileDir, Config.logFileNameService),
+                                    Config.appName,
+                                    append=True,
+                                    dual_logger=lambda x, y=4: xbmc.log(x, y),
+                                    max_size=Config.logMaxSize,
+                                    generations=Config.logGenerations)
+    uri_handler = None
+
+    try:
+        from resources.lib.urihandler import UriHandler
+        from resources.lib.connectivity.retrypolicy import RetryPolicy
+        from resources.lib.addonsettings import AddonSettings
+        from resources.lib.textures import TextureHandler
+        from resources.lib.helpers.channelimporter import ChannelIndex
+        from resources.lib.favourites import Favourites
+        from resources.lib.cachewarmer import CacheWarmer
+
+        # update the loglevel
+        Logger.instance().minLogLevel = AddonSettings.get_log_level()
+
+        if not AddonSettings.cache_http_responses():
+            Logger.info("HTTP caching is disabled, not warming the cache.")
+            return True
+
+        retry_policy = RetryPolicy(max_attempts=Config.httpMaxAttempts,
+                                   backoff_factor=Config.httpBackoffFactor,
+                                   connect_timeout=Config.httpConnectTimeout,
+                                   read_timeout=Config.httpReadTimeout)
+        uri_handler = UriHandler.create_uri_handler(
+            cache_dir=Config.cacheDir,
+            cookie_jar=os.path.join(Config.profileDir, "cookiejar.dat"),
+            ignore_ssl_errors=AddonSettings.ignore_ssl_errors(),
+            pool_size=Config.httpPoolSize,
+            idle_timeout=Config.httpIdleTimeout,
+            cache_max_size=Config.httpCacheMaxSize,
+            max_workers=1,
+            retry_policy=retry_policy,
+            store_cookies=False)
+        TextureHandler.set_texture_handler(Config, Logger.instance(), uri_handler)
+
+        warmer = CacheWarmer(
+            ChannelIndex.get_register().get_channels(),
+            favourites=Favourites(Config.favouriteDir).list,
+            metrics=uri_handler.metrics,
+            is_idle=lambda: xbmc.getGlobalIdleTime() >= Config.cacheWarmingIdleTime,
+            is_playing=player.isPlaying,
+            wait=monitor.waitForAbort,
+            max_folders=Config.cacheWarmingMaxFolders,
+            max_requests=Config.cacheWarmingMaxRequests,
+            max_bytes=Config.cacheWarmingMaxBytes,
+            max_duration=Config.cacheWarmingMaxDuration,
+            duty_cycle=Config.cacheWarmingDutyCycle)
+        return warmer.run()
+
+    except:
+        log_file.critical("Error warming the cache", exc_info=True)
+        return True
+
+    finally:
+        if uri_handler is not None:
+            try:
+                # the service runs for weeks, so do not keep the records of all runs
+                uri_handler.metrics.clear()
+                uri_handler.close()
+            except:
+                log_file.error("Error closing the UriHandler", exc_info=True)
+
+        from resources.lib.addonsettings import AddonSettings
+        AddonSettings.clear_cached_addon_settings_object()
+        log_file.close_log()
+
+
+def run_service():
+    """ Runs the background service: it starts Retrospect if needed and warms the HTTP cache
+    while Kodi is idle. """
+
+    autorun_retrospect()
+
+    from resources.lib.retroconfig import Config
+
+    monitor = xbmc.Monitor()
+    player = xbmc.Player()
+    last_run = 0
+
+    while not monitor.waitForAbort(60):
+        if xbmcaddon.Addon().getSetting("cache_warming") != "true":
+            continue
+
+        if time.time() - last_run < Config.cacheWarmingInterval \
+                or xbmc.getGlobalIdleTime() < Config.cacheWarmingIdleTime \
+                or player.isPlaying():
+            continue
+
+        # an interrupted run is retried the next time Kodi is idle
+        if warm_cache(monitor, player):
+            last_run = time.time()
+
+
+run_service()
@@ -3,6 +3,11 @@
 __all__ = ["test_version", "test_urihandler", "test_datehelper", "test_jsonhelper", "test_logger",
            "test_cloaker", "test_templatehelper", "test_youtube", "test_kodilibs", "test_logsender",
            "test_localsettings", "test_subtitlehelper", "test_channelimporter",
-           "test_htmlentityhelper"]
+           "test_htmlentityhelper", "test_streamcache", "test_cachepolicy", "test_pickler",
+           "test_actionparser", "test_mediaitem", "test_cookiestore",
+           "test_retrypolicy", "test_requestmetrics",
+           "test_kodisettings", "test_dataparserindex", "test_jsonstream",
+           "test_regexer", "test_listpipeline",
+           "test_chn_class", "test_cachewarmer"]
 import os
 os.environ["KODI_STUB_RPC_RESPONSES"] = os.path.join(os.path.dirname(__file__), "data", "jsonrcpcommands")
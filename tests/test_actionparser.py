@@ -0,0 +1,43 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import unittest
+
+from resources.lib.logger import Logger
+
+
+class TestActionParser(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Logger.create_logger(None, str(cls), min_log_level=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        from resources.lib.addonsettings import AddonSettings
+        AddonSettings.clear_cached_addon_settings_object()
+        Logger.instance().close_log()
+
+    def setUp(self):
+        from resources.lib.actions.actionparser import ActionParser
+        from resources.lib.mediaitem import MediaItem
+
+        self.parser = ActionParser("plugin://plugin.video.retrospect/", 1, "")
+        self.item = MediaItem("Item", "https://example.com/item")
+
+    def test_store_reference_url(self):
+        from resources.lib.actions import action
+
+        url = self.parser.create_action_url(None, action.LIST_FOLDER, self.item, store_id="store")
+        self.assertEqual(
+            "plugin://plugin.video.retrospect/?action=listfolder&pickle=store--{}".format(self.item.guid),
+            url)
+
+    def test_pickled_url(self):
+        from resources.lib.actions import action
+        from resources.lib.actions.actionparser import ActionParser
+
+        url = self.parser.create_action_url(None, action.LIST_FOLDER, self.item)
+        self.assertNotIn("None--", url)
+
+        parser = ActionParser("plugin://plugin.video.retrospect/", 1, url.split("?", 1)[1])
+        self.assertEqual(self.item, parser.media_item)
+        self.assertEqual(self.item.name, parser.media_item.name)
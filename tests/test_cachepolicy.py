@@ -0,0 +1,85 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import unittest
+
+from resources.lib.logger import Logger
+from resources.lib.connectivity.cachepolicy import CachePolicy
+
+
+class TestCachePolicy(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Logger.create_logger(None, str(cls), min_log_level=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        Logger.instance().close_log()
+
+    def setUp(self):
+        self.policy = CachePolicy(default_ttl=3600)
+
+    def test_max_age(self):
+        cache_data = self.policy.extract_cache_data({"cache-control": "public, max-age=300"})
+        self.assertEqual(300, self.policy.get_freshness_lifetime("https://example.com", cache_data))
+
+    def test_max_age_with_age(self):
+        cache_data = self.policy.extract_cache_data({"cache-control": "max-age=300", "age": "100"})
+        self.assertEqual(200, self.policy.get_freshness_lifetime("https://example.com", cache_data))
+
+    def test_s_maxage(self):
+        cache_data = self.policy.extract_cache_data({"cache-control": "max-age=60, s-maxage=300"})
+        self.assertEqual(60, self.policy.get_freshness_lifetime("https://example.com", cache_data))
+
+        shared_policy = CachePolicy(shared=True)
+        self.assertEqual(300, shared_policy.get_freshness_lifetime("https://example.com", cache_data))
+
+    def test_expires(self):
+        cache_data = self.policy.extract_cache_data({
+            "date": "Sat, 17 Oct 2020 10:00:00 GMT",
+            "expires": "Sat, 17 Oct 2020 10:10:00 GMT"
+        })
+        self.assertEqual(600, self.policy.get_freshness_lifetime("https://example.com", cache_data))
+
+    def test_invalid_expires(self):
+        cache_data = self.policy.extract_cache_data({
+            "date": "Sat, 17 Oct 2020 10:00:00 GMT",
+            "expires": "0"
+        })
+        self.assertEqual(0, self.policy.get_freshness_lifetime("https://example.com", cache_data))
+
+    def test_last_modified_heuristic(self):
+        cache_data = self.policy.extract_cache_data({
+            "date": "Sat, 17 Oct 2020 10:00:00 GMT",
+            "last-modified": "Sat, 17 Oct 2020 09:00:00 GMT"
+        })
+        self.assertEqual(360, self.policy.get_freshness_lifetime("https://example.com", cache_data))
+        self.assertTrue(self.policy.can_revalidate(cache_data))
+
+        headers = {}
+        self.policy.add_validators(headers, cache_data)
+        self.assertEqual("Sat, 17 Oct 2020 09:00:00 GMT", headers["If-Modified-Since"])
+
+    def test_default(self):
+        self.assertEqual(3600, self.policy.get_freshness_lifetime("https://example.com", {}))
+
+    def test_stale_directives(self):
+        cache_data = self.policy.extract_cache_data(
+            {"cache-control": "max-age=1, stale-while-revalidate=30, stale-if-error=600"})
+        self.assertEqual(30, self.policy.get_stale_while_revalidate(cache_data))
+        self.assertEqual(600, self.policy.get_stale_if_error(cache_data))
+
+        cache_data["must-revalidate"] = True
+        self.assertEqual(0, self.policy.get_stale_while_revalidate(cache_data))
+        self.assertEqual(0, self.policy.get_stale_if_error(cache_data))
+
+    def test_ttl_override(self):
+        self.policy.add_ttl_override(r"^https://api\.example\.com/epg", 60)
+        cache_data = self.policy.extract_cache_data({"cache-control": "max-age=3000"})
+        self.assertEqual(60, self.policy.get_freshness_lifetime("https://api.example.com/epg/today", cache_data))
+        self.assertEqual(3000, self.policy.get_freshness_lifetime("https://api.example.com/shows", cache_data))
+
+    def test_vary(self):
+        cache_data = self.policy.extract_cache_data({"vary": "Accept-Language, X-Device"})
+        self.assertEqual(["accept-language", "x-device"], cache_data["vary"])
+        values = self.policy.get_vary_values({"accept-language": "nl"}, cache_data)
+        self.assertEqual({"accept-language": "nl", "x-device": None}, values)
@@ -0,0 +1,138 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import unittest
+
+from resources.lib import mediatype
+from resources.lib.logger import Logger
+
+
+class FakeMetrics(object):
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+
+    def get_totals(self):
+        return {"requests": self.requests, "cached": 0, "bytes": self.bytes}
+
+
+class FakeChannel(object):
+    def __init__(self, name, metrics, folders, log_on_urls=()):
+        self.name = name
+        self.metrics = metrics
+        self.folders = folders
+        self.logOnUrls = log_on_urls
+        self.warmed = []
+
+    def get_channel(self):
+        return self
+
+    def init_channel(self):
+        pass
+
+    def requires_log_on(self, item=None):
+        return (item.url if item else None) in self.logOnUrls
+
+    def process_folder_list(self, item=None):
+        self.warmed.append(item.url if item else None)
+        self.metrics.requests += 1
+        self.metrics.bytes += 1000
+        return self.folders if item is None else []
+
+    def __str__(self):
+        return self.name
+
+
+class TestCacheWarmer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Logger.create_logger(None, str(cls), min_log_level=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        from resources.lib.addonsettings import AddonSettings
+        AddonSettings.clear_cached_addon_settings_object()
+        Logger.instance().close_log()
+
+    def setUp(self):
+        self.metrics = FakeMetrics()
+        self.waits = []
+
+    def test_warm(self):
+        folders = self.__create_items(["a", "b", "c", "d"])
+        folders.append(self.__create_item("live", is_live=True))
+        folders.append(self.__create_item("video", media_type=mediatype.EPISODE))
+        folders.append(self.__create_item("#keyword"))
+        channel = FakeChannel("test", self.metrics, folders, log_on_urls=["https://example.com/b"])
+        favourites = self.__create_items(["c", "fav"])
+
+        warmer = self.__create_warmer([channel], favourites=lambda c: favourites, max_folders=3)
+        self.assertTrue(warmer.run())
+        self.assertEqual([None, "https://example.com/a", "https://example.com/c",
+                          "https://example.com/d", "https://example.com/fav"], channel.warmed)
+        self.assertEqual(5, warmer.folders)
+        self.assertEqual(5, warmer.requests)
+        self.assertEqual(5000, warmer.bytes)
+
+    def test_log_on(self):
+        channel = FakeChannel("test", self.metrics, self.__create_items(["a"]), log_on_urls=[None])
+        warmer = self.__create_warmer([channel])
+        self.assertTrue(warmer.run())
+        self.assertEqual([], channel.warmed)
+
+    def test_budget(self):
+        channel = FakeChannel("test", self.metrics, self.__create_items(["a", "b", "c"]))
+        other = FakeChannel("other", self.metrics, self.__create_items(["a"]))
+        # requests of before the run do not count
+        self.metrics.requests = 10
+
+        warmer = self.__create_warmer([channel, other], max_requests=3)
+        self.assertTrue(warmer.run())
+        self.assertEqual(3, len(channel.warmed))
+        self.assertEqual([], other.warmed)
+        self.assertEqual(3, warmer.requests)
+
+    def test_not_idle(self):
+        channel = FakeChannel("test", self.metrics, self.__create_items(["a", "b"]))
+        idle = [True, True]
+
+        warmer = self.__create_warmer([channel], is_idle=lambda: idle.pop(0) if idle else False)
+        self.assertFalse(warmer.run())
+        self.assertEqual([None, "https://example.com/a"], channel.warmed)
+
+    def test_backoff_while_playing(self):
+        channel = FakeChannel("test", self.metrics, self.__create_items(["a"]))
+        playing = [True, True, True]
+
+        warmer = self.__create_warmer([channel], is_playing=lambda: playing.pop(0) if playing else False,
+                                      backoff=10, max_backoff=30)
+        self.assertTrue(warmer.run())
+        self.assertEqual([10, 20, 30], self.waits[:3])
+        self.assertEqual(2, len(channel.warmed))
+        # the duty cycle pause after the main list
+        self.assertEqual(1, len(self.waits[3:]))
+
+    def test_abort(self):
+        channel = FakeChannel("test", self.metrics, self.__create_items(["a"]))
+        warmer = self.__create_warmer([channel], is_playing=lambda: True, wait=lambda s: True)
+        self.assertFalse(warmer.run())
+        self.assertEqual([], channel.warmed)
+
+    def __create_warmer(self, channels, **kwargs):
+        from resources.lib.cachewarmer import CacheWarmer
+
+        kwargs.setdefault("wait", self.__wait)
+        return CacheWarmer(channels, metrics=self.metrics, **kwargs)
+
+    def __wait(self, seconds):
+        self.waits.append(seconds)
+        return False
+
+    def __create_items(self, names):
+        return [self.__create_item("https://example.com/{0}".format(name)) for name in names]
+
+    def __create_item(self, url, media_type=mediatype.FOLDER, is_live=False):
+        from resources.lib.mediaitem import MediaItem
+
+        item = MediaItem(url, url, media_type=media_type)
+        item.isLive = is_live
+        return item
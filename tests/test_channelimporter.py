@@ -84,3 +84,38 @@ class TestChannelImporter(unittest.TestCase):
         # Fetch a simple channel without channel code
         channel = instance.get_channel("channel.se.urplay", None)
         self.assertEqual("channel.se.urplay", channel.id)
+
+    def test_channel_index_stored(self):
+        from resources.lib.helpers.channelimporter import ChannelIndex
+        from resources.lib.retroconfig import Config
+        index_file = os.path.join(Config.profileDir, "channelindex.json")
+        if os.path.isfile(index_file):
+            os.remove(index_file)
+
+        channels = ChannelIndex().get_channels()
+        self.assertTrue(os.path.isfile(index_file))
+
+        # A new instance should use the stored index and find the same channels
+        indexed_channels = ChannelIndex().get_channels()
+        self.assertEqual([c.guid for c in channels], [c.guid for c in indexed_channels])
+
+        channel = ChannelIndex().get_channel("channel.se.svt", "svt", info_only=True)
+        self.assertEqual("channel.se.svt.svt", channel.id)
+
+    def test_channel_index_invalidated(self):
+        import json
+        from resources.lib.helpers.channelimporter import ChannelIndex
+        from resources.lib.retroconfig import Config
+        index_file = os.path.join(Config.profileDir, "channelindex.json")
+        ChannelIndex().get_channels()
+
+        with open(index_file) as fp:
+            index = json.load(fp)
+        index["addonVersion"] = "0.0.0"
+        with open(index_file, "w") as fp:
+            json.dump(index, fp)
+
+        ChannelIndex().get_channels()
+        with open(index_file) as fp:
+            index = json.load(fp)
+        self.assertEqual(str(Config.version), index["addonVersion"])
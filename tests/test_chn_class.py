@@ -0,0 +1,92 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import unittest
+
+from resources.lib import mediatype
+from resources.lib.logger import Logger
+
+
+class TestChannel(unittest.TestCase):
+    data = "a b c d e"
+
+    @classmethod
+    def setUpClass(cls):
+        Logger.create_logger(None, str(cls), min_log_level=0)
+
+        from resources.lib.urihandler import UriHandler
+        from resources.lib.textures import TextureHandler
+        from resources.lib.textures.local import Local
+
+        UriHandler.create_uri_handler(ignore_ssl_errors=False)
+        TextureHandler._TextureHandler__TextureHandler = Local(Logger.instance())
+
+    @classmethod
+    def tearDownClass(cls):
+        from resources.lib.addonsettings import AddonSettings
+        AddonSettings.clear_cached_addon_settings_object()
+        Logger.instance().close_log()
+
+    def setUp(self):
+        from resources.lib.helpers.channelimporter import ChannelIndex
+
+        channel_infos = ChannelIndex.get_register().get_channels(include_disabled=True)
+        channel_info = [ci for ci in channel_infos if ci.id == "channel.nos.nos2010.uzgjson"][0]
+        self.channel = channel_info.get_channel()
+        self.created = []
+
+    def test_generator_creator(self):
+        self.channel._add_data_parser("#test", preprocessor=self.__pre_process,
+                                      parser="(\\w)", creator=self.__create_videos)
+
+        items = self.channel.process_folder_list(self.__create_parent("#test"))
+        self.assertEqual(10, len(items))
+        self.assertEqual(["a-0", "a-1", "b-0"], [i.name for i in items[:3]])
+
+    def test_stream(self):
+        self.channel._add_data_parser("#test", preprocessor=self.__pre_process,
+                                      parser="(\\w)", creator=self.__create_videos)
+
+        items = self.channel.stream_folder_list(self.__create_parent("#test"))
+        first = next(items)
+        self.assertEqual("a-0", first.name)
+        # the rest of the data was not yet parsed
+        self.assertEqual(["a"], self.created)
+
+        self.assertEqual(9, len(list(items)))
+        streamed = self.channel.stream_folder_list(self.__create_parent("#test"))
+        processed = self.channel.process_folder_list(self.__create_parent("#test"))
+        self.assertEqual([i.name for i in processed], [i.name for i in streamed])
+
+    def test_stream_with_post_processor(self):
+        self.channel._add_data_parser("#test", preprocessor=self.__pre_process,
+                                      parser="(\\w)", creator=self.__create_videos,
+                                      postprocessor=lambda data, items: items[::-1])
+
+        items = self.channel.stream_folder_list(self.__create_parent("#test"))
+        self.assertEqual("e-1", next(items).name)
+        # the post-processor needed all items
+        self.assertEqual(list(self.data.replace(" ", "")), self.created)
+
+    def test_requires_log_on(self):
+        self.channel._add_data_parser("#test", preprocessor=self.__pre_process,
+                                      parser="(\\w)", creator=self.__create_videos)
+        self.channel._add_data_parser("#logon", preprocessor=self.__pre_process, requires_logon=True,
+                                      parser="(\\w)", creator=self.__create_videos)
+
+        self.assertFalse(self.channel.requires_log_on(self.__create_parent("#test")))
+        self.assertTrue(self.channel.requires_log_on(self.__create_parent("#logon")))
+
+    def __pre_process(self, data):
+        return self.data, []
+
+    def __create_videos(self, result_set):
+        from resources.lib.mediaitem import MediaItem
+
+        self.created.append(result_set)
+        for i in range(0, 2):
+            yield MediaItem("{0}-{1}".format(result_set, i), "https://example.com/{0}/{1}".format(result_set, i),
+                            media_type=mediatype.EPISODE)
+
+    def __create_parent(self, url):
+        from resources.lib.mediaitem import FolderItem
+        return FolderItem("Parent", url, content_type="videos")
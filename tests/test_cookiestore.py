@@ -0,0 +1,132 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from resources.lib.backtothefuture import PY2
+if PY2:
+    # noinspection PyCompatibility,PyUnresolvedReferences
+    from cookielib import Cookie, MozillaCookieJar
+else:
+    # noinspection PyCompatibility
+    from http.cookiejar import Cookie, MozillaCookieJar
+
+from resources.lib.logger import Logger
+from resources.lib.connectivity.cookiestore import CookieStore
+
+
+class TestCookieStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Logger.create_logger(None, str(cls), min_log_level=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        Logger.instance().close_log()
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="retro_test_")
+        self.path = os.path.join(self.folder, "cookiejar.dat")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_save_only_when_changed(self):
+        store = CookieStore(self.path)
+        store.save()
+        self.assertFalse(os.path.isfile(self.path))
+
+        store.set_cookie(self.__create_cookie("name", "value"))
+        self.assertTrue(store.dirty)
+        store.save()
+        self.assertFalse(store.dirty)
+        self.assertTrue(os.path.isfile(self.path))
+
+        # setting the same value again should not require a new write
+        store.set_cookie(self.__create_cookie("name", "value"))
+        self.assertFalse(store.dirty)
+        store.set_cookie(self.__create_cookie("name", "other"))
+        self.assertTrue(store.dirty)
+
+    def test_persist(self):
+        store = CookieStore(self.path)
+        store.set_cookie(self.__create_cookie("name", "value"))
+        store.set_cookie(self.__create_cookie("session", "value", expires=None, discard=True))
+        store.set_cookie(self.__create_cookie("expired", "value", expires=int(time.time()) - 10))
+        store.save()
+
+        loaded = CookieStore(self.path)
+        loaded.load()
+        self.assertFalse(loaded.dirty)
+        self.assertEqual(["name"], [c.name for c in loaded])
+        self.assertEqual("value", loaded._cookies["example.com"]["/"]["name"].value)
+
+    def test_legacy_file(self):
+        legacy_jar = MozillaCookieJar(self.path)
+        legacy_jar.set_cookie(self.__create_cookie("name", "value"))
+        legacy_jar.save()
+
+        store = CookieStore(self.path)
+        store.load()
+        self.assertEqual(["name"], [c.name for c in store])
+        self.assertTrue(store.dirty)
+
+        store.save()
+        with io.open(self.path, "rb") as fp:
+            self.assertFalse(fp.read().startswith(b"# Netscape"))
+
+        loaded = CookieStore(self.path)
+        loaded.load()
+        self.assertEqual(["name"], [c.name for c in loaded])
+
+    def test_merge_concurrent_changes(self):
+        store = CookieStore(self.path)
+        store.set_cookie(self.__create_cookie("first", "value"))
+        store.set_cookie(self.__create_cookie("removed", "value"))
+        store.save()
+
+        first = CookieStore(self.path)
+        first.load()
+        second = CookieStore(self.path)
+        second.load()
+
+        second.set_cookie(self.__create_cookie("second", "value"))
+        second.save()
+        first.set_cookie(self.__create_cookie("session", "value", expires=None, discard=True))
+        first.clear("example.com", "/", "removed")
+        first.set_cookie(self.__create_cookie("first", "changed"))
+        first.save()
+
+        # the changes of both are on disk, and the first one also picked up the new cookie
+        loaded = CookieStore(self.path)
+        loaded.load()
+        self.assertEqual(["first", "second"], sorted(c.name for c in loaded))
+        self.assertEqual("changed", loaded._cookies["example.com"]["/"]["first"].value)
+        self.assertEqual(["first", "second", "session"], sorted(c.name for c in first))
+
+    def test_clear_all(self):
+        store = CookieStore(self.path)
+        store.set_cookie(self.__create_cookie("name", "value"))
+        store.save()
+
+        other = CookieStore(self.path)
+        other.set_cookie(self.__create_cookie("other", "value"))
+        other.save()
+
+        store.clear()
+        store.save()
+        loaded = CookieStore(self.path)
+        loaded.load()
+        self.assertEqual([], list(loaded))
+
+    def __create_cookie(self, name, value, expires=-1, discard=False):
+        if expires == -1:
+            expires = int(time.time()) + 3600
+        return Cookie(version=0, name=name, value=value, port=None, port_specified=False,
+                      domain="example.com", domain_specified=True, domain_initial_dot=False,
+                      path="/", path_specified=True, secure=False, expires=expires,
+                      discard=discard, comment=None, comment_url=None, rest={})
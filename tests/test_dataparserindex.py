@@ -0,0 +1,106 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import random
+import unittest
+
+from resources.lib.dataparserindex import DataParserIndex
+from resources.lib.logger import Logger
+from resources.lib.parserdata import ParserData
+
+
+class TestDataParserIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Logger.create_logger(None, str(cls), min_log_level=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        from resources.lib.addonsettings import AddonSettings
+        AddonSettings.clear_cached_addon_settings_object()
+        Logger.instance().close_log()
+
+    def test_longest_match(self):
+        data_parsers = self.__create_data_parsers([
+            ("https://site.com/", ParserData.MatchStart, "start"),
+            ("https://site.com/api/", ParserData.MatchStart, "api"),
+            ("/episodes", ParserData.MatchContains, "contains"),
+            ("https://site.com/api/program/", ParserData.MatchExact, "exact"),
+            (".m3u8", ParserData.MatchEnd, "end"),
+            ("https://site.com/api/\\w+/\\d+$", ParserData.MatchRegex, "regex"),
+            ("https://site.com/api/", ParserData.MatchStart, "api2"),
+        ])
+        index = DataParserIndex(data_parsers)
+
+        self.assertEqual(["start"], self.__find(index, "https://site.com/home"))
+        self.assertEqual(["api", "api2"], self.__find(index, "https://site.com/api/test"))
+        self.assertEqual(["regex"], self.__find(index, "https://site.com/api/program/1"))
+        self.assertEqual(["exact"], self.__find(index, "https://site.com/api/program/"))
+        self.assertEqual(["contains"], self.__find(index, "https://other.com/episodes"))
+        self.assertEqual(["end"], self.__find(index, "https://other.com/a.m3u8"))
+        self.assertEqual([], self.__find(index, "https://other.com/"))
+
+    def test_same_as_linear_search(self):
+        random.seed(42)
+        parts = ["https://", "site.com", "/api", "/v2", "/program", "?page=", "1", "#", "x"]
+        match_types = [ParserData.MatchStart, ParserData.MatchEnd, ParserData.MatchContains,
+                       ParserData.MatchExact, ParserData.MatchRegex]
+
+        for _ in range(0, 25):
+            definitions = []
+            for i in range(0, 20):
+                url = "".join(random.sample(parts, random.randint(1, 4)))
+                match_type = random.choice(match_types)
+                if match_type == ParserData.MatchRegex:
+                    url = url.replace("?", "\\?")
+                definitions.append((url, match_type, str(i)))
+
+            data_parsers = self.__create_data_parsers(definitions)
+            index = DataParserIndex(data_parsers)
+            for _ in range(0, 50):
+                url = "".join(random.sample(parts, random.randint(1, 6)))
+                self.assertEqual(self.__find_linear(data_parsers, url), index.find(url), url)
+
+    def test_channels(self):
+        from resources.lib.urihandler import UriHandler
+        from resources.lib.textures import TextureHandler
+        from resources.lib.textures.local import Local
+        from resources.lib.helpers.channelimporter import ChannelIndex
+
+        UriHandler.create_uri_handler(ignore_ssl_errors=False)
+        TextureHandler._TextureHandler__TextureHandler = Local(Logger.instance())
+
+        channel_infos = ChannelIndex.get_register().get_channels(include_disabled=True)
+        for channel_info in channel_infos:
+            channel = channel_info.get_channel()
+            if channel is None:
+                # some channels need the network to be created
+                continue
+
+            data_parsers = channel.dataParsers
+            index = DataParserIndex(data_parsers)
+            urls = [url for url in data_parsers.keys() if url != "*"]
+            urls += ["{0}/test?page=2".format(url) for url in urls]
+            for url in urls:
+                expected = self.__find_linear(data_parsers, url)
+                self.assertEqual(expected, index.find(url),
+                                 "{0} resolves '{1}' differently".format(channel, url))
+
+    def __create_data_parsers(self, definitions):
+        data_parsers = {}
+        for url, match_type, name in definitions:
+            data = ParserData(url)
+            data.Name = name
+            data.MatchType = match_type
+            data_parsers.setdefault(url, []).append(data)
+        return data_parsers
+
+    def __find(self, index, url):
+        return [d.Name for d in index.find(url)]
+
+    def __find_linear(self, data_parsers, url):
+        # the way the Channel used to find its data parsers.
+        for key in sorted(data_parsers.keys(), key=len, reverse=True):
+            matches = [d for d in data_parsers[key] if d.matches(url)]
+            if matches:
+                return matches
+        return []
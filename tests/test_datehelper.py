@@ -201,6 +201,64 @@ class TestDateHelper(unittest.TestCase):
         self.assertEqual(tz.zone, time_zone)
         self.__compareDates(date_value, date_time)
 
+    def test_get_date_from_string_same_as_strptime(self):
+        values = [
+            ("2016-1-1T23:21:1+00:00", "%Y-%m-%dT%H:%M:%S+00:00"),
+            ("01-02-2016  10:12", "%d-%m-%Y %H:%M"),
+            ("690101", "%y%m%d"),
+            ("700101", "%y%m%d"),
+            ("2020-02-29T10:00:00.123Z", "%Y-%m-%dT%H:%M:%S.%fZ"),
+            ("2016-12-31T23:59:61", "%Y-%m-%dT%H:%M:%S"),
+            ("%2020", "%%%Y"),
+            ("1 May 2019", "%d %B %Y"),
+        ]
+        for value, date_format in values:
+            self.assertEqual(time.strptime(value, date_format),
+                             DateHelper.get_date_from_string(value, date_format))
+
+    def test_get_date_from_invalid_string(self):
+        values = [
+            ("2016-13-01", "%Y-%m-%d"),
+            ("2015-02-29", "%Y-%m-%d"),
+            ("2016-01-01x", "%Y-%m-%d"),
+            ("", "%Y-%m-%d"),
+        ]
+        for value, date_format in values:
+            with self.assertRaises(ValueError):
+                DateHelper.get_date_from_string(value, date_format)
+
+    def test_get_datetimes_from_strings(self):
+        values = ["2016-01-01T23:21:20", "2016-07-01T23:21:20"]
+        date_times = DateHelper.get_datetimes_from_strings(values, time_zone="Europe/Amsterdam")
+        self.assertEqual(
+            [DateHelper.get_datetime_from_string(v, time_zone="Europe/Amsterdam") for v in values],
+            date_times)
+        self.assertEqual(datetime.timedelta(hours=2), date_times[1].utcoffset())
+
+    def test_get_datetime_with_fraction_from_string(self):
+        date_format = "%Y-%m-%dT%H:%M:%S.%fZ"
+        self.assertEqual(datetime.datetime(2020, 2, 29, 10, 0, 0, 123000),
+                         DateHelper.get_datetime_from_string("2020-02-29T10:00:00.123Z", date_format))
+        self.assertEqual([datetime.datetime(2020, 2, 29, 10, 0, 0, 1)],
+                         DateHelper.get_datetimes_from_strings(["2020-02-29T10:00:00.000001Z"], date_format))
+
+    def test_get_datetime_from_iso8601(self):
+        date_time = DateHelper.get_datetime_from_iso8601("2016-01-01T23:21:20.123+01:00")
+        self.assertEqual(datetime.datetime(2016, 1, 1, 22, 21, 20, 123000, tzinfo=pytz.utc),
+                         date_time)
+
+        date_time = DateHelper.get_datetime_from_iso8601("2016-01-01T23:21:20Z")
+        self.assertEqual(pytz.utc, date_time.tzinfo)
+
+        date_time = DateHelper.get_datetime_from_iso8601("2016-01-01T23:21:20-0530")
+        self.assertEqual(datetime.timedelta(hours=-5, minutes=-30), date_time.utcoffset())
+
+        date_time = DateHelper.get_datetime_from_iso8601("2016-01-01")
+        self.assertEqual(datetime.datetime(2016, 1, 1), date_time)
+
+        with self.assertRaises(ValueError):
+            DateHelper.get_datetime_from_iso8601("01-01-2016")
+
     def __compareDateAndTimeStruct(self, date_value, time_value, include_seconds=True):
         # type: (datetime.datetime, time.struct_time, bool) -> None
         """ Compares to datetime objects based on values.
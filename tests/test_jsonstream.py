@@ -0,0 +1,101 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import random
+import unittest
+
+from resources.lib.helpers.jsonhelper import JsonHelper
+from resources.lib.helpers.jsonstream import JsonStream
+from resources.lib.logger import Logger
+
+
+class TestJsonStream(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Logger.create_logger(None, str(cls), min_log_level=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        Logger.instance().close_log()
+
+    def test_path(self):
+        data = '{"data": {"programs": [{"id": 1, "type": "a"}, {"id": 2, "type": "b"}, ' \
+               '{"id": 3, "type": "a"}], "other": {"x": [1, 2]}}}'
+        self.__assert_path(data, ["data", "programs"], 3)
+        self.__assert_path(data, ["data", "programs", 1], 1)
+        self.__assert_path(data, ["data", "programs", -1], 1)
+        self.__assert_path(data, ["data", "programs", ("type", "a", None)], 2)
+        self.__assert_path(data, ["data", "programs", ("type", "a", 1), "id"], 1)
+        self.__assert_path(data, ["data", "programs", ("type", "c", None)], 0)
+        self.__assert_path(data, ["data", "missing"], 0)
+        self.__assert_path(data, ["data", "other", "x"], 2)
+        self.__assert_path(data, [], 1)
+
+    def test_empty_values(self):
+        data = '{"a": [], "b": {}, "c": null, "d": 0, "e": "", "f": [[]]}'
+        for key in "abcdef":
+            self.__assert_path(data, [key], 0 if key != "f" else 1)
+        self.__assert_path(data, ["f", 0], 0)
+        self.__assert_path("", ["a"], 0)
+
+    def test_wrapped(self):
+        data = 'jQuery183({"items": [1, 2, 3]});'
+        self.assertEqual([1, 2, 3], list(JsonStream(data).iter_path(["items"])))
+
+    def test_errors(self):
+        data = '{"items": [1, 2, 3]}'
+        with self.assertRaises(IndexError):
+            list(JsonStream(data).iter_path(["items", 3]))
+        with self.assertRaises(ValueError):
+            list(JsonStream('{"items": [1, 2 3]}').iter_path(["items"]))
+
+    def test_same_as_json(self):
+        random.seed(42)
+        keys = ["a", "b", "c", "items"]
+        for _ in range(0, 500):
+            document = self.__create_value(keys, 0)
+            if not isinstance(document, (dict, list)):
+                document = [document]
+            data = json.dumps(document, indent=random.choice([None, 1]))
+            for _ in range(0, 10):
+                path = self.__create_path(keys)
+                try:
+                    expected = JsonStream.select(JsonHelper(data).json, path)
+                except Exception as e:
+                    with self.assertRaises(type(e), msg=path):
+                        list(JsonStream(data).iter_path(path))
+                    continue
+                self.assertEqual(expected, list(JsonStream(data).iter_path(path)),
+                                 "{0} on {1}".format(path, data))
+
+    def __assert_path(self, data, path, count):
+        expected = JsonStream.select(JsonHelper(data).json, path)
+        results = list(JsonStream(data).iter_path(path))
+        self.assertEqual(expected, results)
+        self.assertEqual(count, len(results))
+
+    def __create_value(self, keys, depth):
+        value_type = random.randint(0, 5 if depth < 3 else 2)
+        if value_type == 0:
+            return random.choice([None, 0, 1, "", "x", u"é\\\"", True, False, 1.5])
+        if value_type == 1:
+            return random.choice(["a", "b"])
+        if value_type == 2:
+            return random.randint(-2, 2)
+        if value_type == 3:
+            return [self.__create_value(keys, depth + 1) for _ in range(0, random.randint(0, 4))]
+        return dict((k, self.__create_value(keys, depth + 1))
+                    for k in random.sample(keys, random.randint(0, len(keys))))
+
+    def __create_path(self, keys):
+        path = []
+        for _ in range(0, random.randint(0, 4)):
+            part_type = random.randint(0, 2)
+            if part_type == 0:
+                path.append(random.choice(keys))
+            elif part_type == 1:
+                path.append(random.randint(-2, 3))
+            else:
+                path.append((random.choice(keys), random.choice(["a", "b"]),
+                             random.choice([None, 0, 1, -1])))
+        return path
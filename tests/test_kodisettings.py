@@ -0,0 +1,74 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from resources.lib.logger import Logger
+from resources.lib.settings.kodisettings import KodiSettings
+
+
+class ProfileAddon(object):
+    def __init__(self, addon, profile):
+        """ Wraps a Kodi Addon with a different profile folder and counts the getSetting calls. """
+
+        self.addon = addon
+        self.profile = profile
+        self.calls = 0
+
+    def getSetting(self, setting_id):
+        self.calls += 1
+        return self.addon.getSetting(setting_id)
+
+    def getAddonInfo(self, info_id):
+        if info_id == "profile":
+            return self.profile
+        return self.addon.getAddonInfo(info_id)
+
+    def __getattr__(self, item):
+        return getattr(self.addon, item)
+
+
+class TestKodiSettings(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Logger.create_logger(None, str(cls), min_log_level=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        Logger.instance().close_log()
+
+    def setUp(self):
+        self.profile = tempfile.mkdtemp(prefix="retro_test_")
+        with io.open(os.path.join(self.profile, "settings.xml"), "w", encoding="utf-8") as fp:
+            fp.write(u'<settings version="2">\n'
+                     u'    <setting id="list_limit">7</setting>\n'
+                     u'    <setting id="folder_prefix" default="true" />\n'
+                     u'</settings>')
+
+        self.store = KodiSettings(Logger.instance())
+        self.addon = ProfileAddon(self.store._KodiSettings__addon_settings, self.profile)
+        self.store._KodiSettings__addon_settings = self.addon
+
+    def tearDown(self):
+        self.store = None
+        shutil.rmtree(self.profile)
+
+    def test_stored_setting(self):
+        self.assertEqual(7, self.store.get_integer_setting("list_limit"))
+        self.assertEqual(7, self.store.get_integer_setting("list_limit"))
+        self.assertEqual("", self.store.get_setting("folder_prefix", default=""))
+        self.assertEqual(0, self.addon.calls)
+
+    def test_default_setting(self):
+        expected = self.addon.addon.getSetting("hide_drm") == "true"
+        self.assertEqual(expected, self.store.get_boolean_setting("hide_drm"))
+        self.assertEqual(expected, self.store.get_boolean_setting("hide_drm"))
+        self.assertEqual(1, self.addon.calls)
+
+    def test_set_setting(self):
+        self.store.set_setting("list_limit", 10)
+        self.assertEqual(10, self.store.get_integer_setting("list_limit"))
+        self.assertEqual(0, self.addon.calls)
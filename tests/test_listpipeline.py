@@ -0,0 +1,71 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import unittest
+
+from resources.lib import mediatype
+from resources.lib.listpipeline import ListPipeline
+from resources.lib.logger import Logger
+
+
+class TestListPipeline(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Logger.create_logger(None, str(cls), min_log_level=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        from resources.lib.addonsettings import AddonSettings
+        AddonSettings.clear_cached_addon_settings_object()
+        Logger.instance().close_log()
+
+    def test_no_stages(self):
+        items = self.__create_items(["a", "b", "a", "c", "b"])
+        results = ListPipeline("test").process(items)
+        self.assertEqual(["a", "b", "c"], [i.name for i in results])
+        self.assertIs(items[0], results[0])
+
+    def test_filters(self):
+        items = self.__create_items(["a", "b", "c", "d", "a"])
+        items[0].isDrmProtected = True
+        items[2].isGeoLocked = True
+        items[2].isDrmProtected = True
+
+        pipeline = ListPipeline("test")
+        pipeline.add_filter("drm", lambda i: not i.isDrmProtected)
+        pipeline.add_filter("geo", lambda i: not i.isGeoLocked)
+        results = pipeline.process(items)
+
+        # the first 'a' is filtered, so the second one is used
+        self.assertEqual(["b", "d", "a"], [i.name for i in results])
+        self.assertIs(items[4], results[2])
+        self.assertEqual(2, pipeline.removed("drm"))
+        self.assertEqual(0, pipeline.removed("geo"))
+        self.assertEqual(0, pipeline.removed("dedupe"))
+
+    def test_actions(self):
+        items = self.__create_items(["a", "b", "a", "c"])
+        seen = []
+        pipeline = ListPipeline("test")
+        pipeline.add_filter("c", lambda i: i.name != "c")
+        pipeline.add_action("collect", seen.append)
+        results = pipeline.process(items)
+
+        # actions only see the unique items that passed the filters
+        self.assertEqual(results, seen)
+        self.assertEqual(1, pipeline.removed("dedupe"))
+        self.assertEqual(1, pipeline.removed("c"))
+
+    def test_untimed(self):
+        Logger.instance().minLogLevel = Logger.LVL_INFO
+        try:
+            items = self.__create_items(["a", "a"])
+            pipeline = ListPipeline("test").add_filter("none", lambda i: True)
+            self.assertEqual(1, len(pipeline.process(items)))
+        finally:
+            Logger.instance().minLogLevel = Logger.LVL_TRACE
+
+    def __create_items(self, names):
+        from resources.lib.mediaitem import MediaItem
+
+        return [MediaItem(name, "https://example.com/{0}".format(name), media_type=mediatype.FOLDER)
+                for name in names]
@@ -1,3 +1,4 @@
+import io
 import os
 import unittest
 
@@ -31,3 +32,22 @@ class TestLocalSettings(unittest.TestCase):
         store = LocalSettings(Config.profileDir, Logger.instance())
         result = store.get_setting(setting_to_store)
         self.assertEqual(value_to_store, result)
+
+    def test_batch(self):
+        store = LocalSettings(Config.profileDir, Logger.instance())
+        store.set_setting("first", 1)
+
+        with store.batch():
+            store.set_setting("second", 2)
+            with store.batch():
+                store.set_setting("third", 3)
+
+            # nothing was written yet
+            with io.open(store.local_settings_file, mode="rb") as fp:
+                self.assertNotIn(b"second", fp.read())
+
+        del store
+        store = LocalSettings(Config.profileDir, Logger.instance())
+        self.assertEqual(2, store.get_setting("second"))
+        self.assertEqual(3, store.get_setting("third"))
+        self.assertEqual([], [f for f in os.listdir(Config.profileDir) if f.endswith(".tmp")])
@@ -1,11 +1,14 @@
 # coding=utf-8  # NOSONAR
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import gzip
+import shutil
 import tempfile
 import unittest
 import os
 import io
 
+from resources.lib.backtothefuture import PY2
 from resources.lib.logger import Logger
 
 
@@ -135,3 +138,174 @@ class TestLogger(unittest.TestCase):
             content = fp.readlines()
             lines = len(content)
             self.assertEqual(6, lines)
+
+    def test_logger_change_level(self):
+        logger = Logger.create_logger(self.output_log_file, "test_logger_change_level",
+                                      min_log_level=Logger.LVL_INFO)
+        self.__logger = logger
+        Logger.debug("Debug 1")
+        logger.minLogLevel = Logger.LVL_DEBUG
+        Logger.debug("Debug 2")
+        logger.minLogLevel = Logger.LVL_ERROR
+        Logger.debug("Debug 3")
+        Logger.warning("Warning")
+        Logger.error("Error")
+        Logger.instance().close_log()
+        with io.open(self.output_log_file, 'r') as fp:
+            lines = fp.readlines()
+            self.assertEqual(2, len(lines))
+            self.assertTrue(lines[0].rstrip().endswith("Debug 2"))
+            self.assertTrue(lines[1].rstrip().endswith("Error"))
+
+        # without a logger all levels are bound again
+        self.assertEqual(Logger.__dict__["debug"], Logger._Logger__log_methods["debug"])
+
+    def test_logger_caller(self):
+        self.__logger = Logger.create_logger(self.output_log_file, "test_logger_caller",
+                                             min_log_level=Logger.LVL_TRACE)
+        for _ in range(2):
+            Logger.info("Line 1\nLine 2")
+        Logger.instance().close_log()
+        with io.open(self.output_log_file, 'r') as fp:
+            lines = fp.readlines()
+            self.assertEqual(5, len(lines))
+            for line in lines[:4]:
+                self.assertIn(" - test_logger.py ", line)
+            self.assertTrue(lines[0].rstrip().endswith("Line 1"))
+            self.assertTrue(lines[1].rstrip().endswith("Line 2"))
+
+    def test_logger_buffered(self):
+        logger = Logger.create_logger(self.output_log_file, "test_logger_buffered",
+                                      min_log_level=Logger.LVL_TRACE)
+        self.__logger = logger
+        Logger.info("Buffered")
+        with io.open(self.output_log_file, 'r') as fp:
+            self.assertEqual(0, len(fp.readlines()))
+
+        # errors are written immediately
+        Logger.error("Error")
+        with io.open(self.output_log_file, 'r') as fp:
+            self.assertEqual(2, len(fp.readlines()))
+
+        Logger.info("Buffered")
+        logger.flush()
+        with io.open(self.output_log_file, 'r') as fp:
+            self.assertEqual(3, len(fp.readlines()))
+
+        # and so is everything once the buffer is full
+        logger.flushSize = 100
+        Logger.info("Buffered " * 20)
+        with io.open(self.output_log_file, 'r') as fp:
+            self.assertEqual(4, len(fp.readlines()))
+
+    def test_logger_disabled_methods(self):
+        logger = Logger.create_logger(self.output_log_file, "test_logger_disabled_methods",
+                                      min_log_level=Logger.LVL_INFO)
+        self.__logger = logger
+
+        # the methods below the minimum level do nothing at all
+        # noinspection PyUnresolvedReferences
+        ignore = Logger._Logger__ignore
+        self.assertIs(ignore, Logger.trace)
+        self.assertIs(ignore, Logger.debug)
+        self.assertIsNot(ignore, Logger.info)
+        self.assertIsNot(ignore, Logger.error)
+
+        logger.minLogLevel = Logger.LVL_DEBUG
+        self.assertIsNot(ignore, Logger.debug)
+        self.assertIs(ignore, Logger.trace)
+
+    def test_logger_rotate(self):
+        log_dir = tempfile.mkdtemp(prefix="retro_test_")
+        log_file = os.path.join(log_dir, "retrospect.log")
+        try:
+            logger = Logger.create_logger(log_file, "test_logger_rotate",
+                                          max_size=10 * 1024, generations=2)
+            self.__logger = logger
+            for i in range(0, 1000):
+                Logger.info("Line %s", i)
+            logger.flush()
+
+            log_files = logger.get_log_files()
+            self.assertEqual(
+                [log_file, os.path.join(log_dir, "retrospect.1.log.gz"),
+                 os.path.join(log_dir, "retrospect.2.log.gz")], log_files)
+            self.assertEqual(3, len(os.listdir(log_dir)))
+            self.assertLess(os.path.getsize(log_file), 10 * 1024)
+
+            with gzip.open(log_files[1], "rb") as fp:
+                lines = fp.read().decode("utf-8").splitlines()
+            self.assertGreaterEqual(len("".join(lines)), 9 * 1024)
+            self.assertTrue(lines[-1].endswith("Line %s" % (int(lines[-2].split()[-1]) + 1)))
+        finally:
+            Logger.instance().close_log()
+            shutil.rmtree(log_dir)
+
+    def test_logger_rotate_error(self):
+        log_dir = tempfile.mkdtemp(prefix="retro_test_")
+        log_file = os.path.join(log_dir, "retrospect.log")
+        try:
+            logger = Logger.create_logger(log_file, "test_logger_rotate_error",
+                                          max_size=10 * 1024, generations=2)
+            self.__logger = logger
+
+            def fail():
+                raise OSError("The file is in use")
+
+            # the rotation fails, but the logging continues in the current file
+            logger._Logger__rotate_files = fail
+            for i in range(0, 500):
+                Logger.info("Line %s", i)
+            logger.flush()
+
+            self.assertEqual(["retrospect.log"], os.listdir(log_dir))
+            with io.open(log_file, "r", encoding="utf-8") as fp:
+                content = fp.read()
+            self.assertIn("Error rotating logfile", content)
+            self.assertIn("Line 499", content)
+
+            # and it is retried later
+            del logger._Logger__rotate_files
+            for i in range(0, 500):
+                Logger.info("Line %s", i)
+            self.assertTrue(os.path.isfile(os.path.join(log_dir, "retrospect.1.log.gz")))
+        finally:
+            Logger.instance().close_log()
+            shutil.rmtree(log_dir)
+
+    def test_logger_rotate_size_in_bytes(self):
+        log_dir = tempfile.mkdtemp(prefix="retro_test_")
+        log_file = os.path.join(log_dir, "retrospect.log")
+        try:
+            logger = Logger.create_logger(log_file, "test_logger_rotate_size_in_bytes",
+                                          max_size=10 * 1024, generations=1)
+            self.__logger = logger
+            # each euro sign takes 3 bytes
+            euros = u"\u20ac" * 100
+            if PY2:
+                euros = euros.encode("utf-8")
+            for i in range(0, 50):
+                Logger.info("Line %s: %s", i, euros)
+            logger.flush()
+
+            self.assertLess(os.path.getsize(log_file), 10 * 1024)
+        finally:
+            Logger.instance().close_log()
+            shutil.rmtree(log_dir)
+
+    def test_logger_clean_up_generations(self):
+        log_dir = tempfile.mkdtemp(prefix="retro_test_")
+        log_file = os.path.join(log_dir, "retrospect.log")
+        try:
+            with io.open(os.path.join(log_dir, "retrospect.old.log"), "w") as fp:
+                fp.write(u"Old")
+            for session in range(0, 3):
+                Logger.create_logger(log_file, "test_logger_clean_up_generations", generations=1)
+                Logger.info("Session %s", session)
+                Logger.instance().close_log()
+
+            self.assertEqual(["retrospect.1.log.gz", "retrospect.log"], sorted(os.listdir(log_dir)))
+            with gzip.open(os.path.join(log_dir, "retrospect.1.log.gz"), "rb") as fp:
+                self.assertIn("Session 1", fp.read().decode("utf-8"))
+        finally:
+            shutil.rmtree(log_dir)
@@ -2,6 +2,10 @@
 
 from future.utils import PY2
 
+import gzip
+import io
+import shutil
+import tempfile
 import unittest
 import sys
 import os
@@ -52,6 +56,42 @@ class TestLogSender(unittest.TestCase):
         with self.assertRaises(ValueError):
             log_sender.send("name", "")
 
+    def test_LogSender_ReadLargeFile(self):
+        log_sender = LogSender(self.__pastebin_key, logger=self.__logger, mode="pastebin")
+        log_file = os.path.join(os.path.dirname(__file__), "data", "largelogfile.log")
+        # noinspection PyUnresolvedReferences
+        code = log_sender._LogSender__read_files([log_file])
+        self.assertLessEqual(len(code), 475 * 1024)
+
+        with io.open(log_file, "r", encoding="utf-8") as fp:
+            content = fp.read()
+        self.assertTrue(code.startswith(content[:1024]))
+        self.assertTrue(code.endswith(content[-1024:]))
+
+    def test_LogSender_ReadGenerations(self):
+        log_dir = tempfile.mkdtemp(prefix="retro_test_")
+        try:
+            log_files = [os.path.join(log_dir, "retrospect.log"),
+                         os.path.join(log_dir, "retrospect.1.log.gz")]
+            with io.open(log_files[0], "wb") as fp:
+                fp.write(b"".join(b"Current %d\n" % (i, ) for i in range(0, 50)))
+            with gzip.open(log_files[1], "wb") as fp:
+                fp.write(b"".join(b"Old %d\n" % (i, ) for i in range(0, 50000)))
+
+            log_sender = LogSender(self.__hastebin_key, logger=self.__logger, mode="hastebin")
+            # noinspection PyUnresolvedReferences
+            log_sender._LogSender__maxCharCount = 2000
+            # noinspection PyUnresolvedReferences
+            code = log_sender._LogSender__read_files(log_files)
+            lines = code.splitlines()
+            self.assertLessEqual(len(code), 2000)
+            self.assertEqual("Current 49", lines[-1])
+            self.assertIn("Current 0", lines)
+            self.assertIn("Old 49999", lines)
+            self.assertTrue(lines[0].startswith("Old "))
+        finally:
+            shutil.rmtree(log_dir)
+
     @unittest.skip("Pastebin no longer used.")
     def test_LogSender_SendPlainText(self):
         log_sender = LogSender(self.__pastebin_key, logger=self.__logger, mode="pastebin")
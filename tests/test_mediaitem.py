@@ -0,0 +1,123 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import pickle
+import unittest
+
+from resources.lib.logger import Logger
+
+
+class TestMediaItem(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Logger.create_logger(None, str(cls), min_log_level=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        from resources.lib.addonsettings import AddonSettings
+        AddonSettings.clear_cached_addon_settings_object()
+        Logger.instance().close_log()
+
+    def test_guid_uses_initial_values(self):
+        from resources.lib.mediaitem import MediaItem
+
+        item = MediaItem("Title", "https://example.com/item")
+        guid = item.guid
+        item.url = "https://example.com/other"
+        self.assertEqual(guid, item.guid)
+        self.assertEqual(MediaItem("Title", "https://example.com/item"), item)
+
+    def test_pickle_round_trip(self):
+        from resources.lib.mediaitem import MediaItem, FolderItem
+
+        item = FolderItem("Title", "https://example.com/item", "videos")
+        item.set_info_label("Season", 2)
+        item.metaData["key"] = "value"
+        item.add_stream("https://example.com/stream", 1000)
+
+        depickled = pickle.loads(pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL))
+        self.assertIsInstance(depickled, FolderItem)
+        self.assertEqual(item.guid, depickled.guid)
+        self.assertEqual(item.guidValue, depickled.guidValue)
+        self.assertEqual("videos", depickled.content_type)
+        self.assertEqual(2, depickled.get_info_label("Season"))
+        self.assertEqual({"key": "value"}, depickled.metaData)
+        self.assertEqual(item.streams, depickled.streams)
+        self.assertEqual([], depickled.items)
+
+    def test_assigned_containers(self):
+        from resources.lib.mediaitem import MediaItem
+
+        item = MediaItem("Title", "https://example.com/item")
+        item.streams = []
+        item.add_stream("https://example.com/stream", 1000)
+        self.assertTrue(item.has_streams())
+
+        item.guid = "ABCDEF"
+        self.assertEqual(0xABCDEF, item.guidValue)
+        self.assertNotIn("streams", item.__dict__)
+        self.assertNotIn("guid", item.__dict__)
+
+    def test_unused_containers_not_pickled(self):
+        from resources.lib.mediaitem import MediaItem
+
+        state = MediaItem("Title", "https://example.com/item").__getstate__()
+        self.assertNotIn("items", state)
+        self.assertNotIn("streams", state)
+        self.assertIn("guid", state)
+
+    def test_legacy_state(self):
+        from resources.lib.mediaitem import MediaItem
+        from resources.lib import mediatype
+
+        state = {
+            "name": "Old", "url": "https://example.com/old", "type": "video",
+            "guid": "ABCDEF", "guidValue": 0xABCDEF,
+            "items": [], "HttpHeaders": {"Referer": "https://example.com"}, "metaData": {},
+            "streams": [], "_MediaItem__infoLabels": {"Episode": 3}, "_MediaItem__date": "2020-01-01",
+            "_MediaItem__display": ("key", ("Old", {}, {}))
+        }
+        item = MediaItem.__new__(MediaItem)
+        item.__setstate__(state)
+
+        self.assertEqual("ABCDEF", item.guid)
+        self.assertEqual(0xABCDEF, item.guidValue)
+        self.assertEqual(mediatype.VIDEO, item.media_type)
+        self.assertEqual({"Referer": "https://example.com"}, item.HttpHeaders)
+        self.assertEqual(3, item.get_info_label("Episode"))
+        self.assertEqual("2020-01-01", item.get_date())
+        self.assertFalse(item.has_streams())
+        self.assertEqual("Old", item.get_kodi_item().getLabel().strip())
+
+    def test_kodi_item_display_values(self):
+        from resources.lib.mediaitem import MediaItem
+        from resources.lib import mediatype
+
+        item = MediaItem("Title &amp; more", "https://example.com/item", media_type=mediatype.EPISODE)
+        display_settings = ("", False, False)
+        self.assertEqual("Title & more", item.get_kodi_item(display_settings=display_settings).getLabel().strip())
+
+        # the cached values are not used after relevant changes
+        item.isGeoLocked = True
+        self.assertIn("[COLOR aqua]", item.get_kodi_item(display_settings=display_settings).getLabel())
+
+        item.name = "Other"
+        self.assertTrue(item.get_kodi_item(display_settings=display_settings).getLabel().startswith("Other"))
+        self.assertTrue(item.get_kodi_item(name="Name", display_settings=display_settings).getLabel().startswith("Name"))
+
+        display_settings = ("*", False, False)
+        self.assertTrue(item.get_kodi_item(display_settings=display_settings).getLabel().startswith("Other"))
+        item.media_type = mediatype.FOLDER
+        self.assertTrue(item.get_kodi_item(display_settings=display_settings).getLabel().startswith("* Other"))
+
+    def test_kodi_item_cache(self):
+        from resources.lib.mediaitem import MediaItem
+
+        item = MediaItem("Title", "https://example.com/item")
+        item.get_kodi_item()
+        display = item._MediaItem__display
+        item.get_kodi_item()
+        self.assertIs(display, item._MediaItem__display)
+
+        item.set_info_label("Episode", 2)
+        self.assertIsNone(item._MediaItem__display)
+        self.assertNotIn("_MediaItem__display", item.__getstate__())
@@ -0,0 +1,92 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import io
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+import zlib
+
+from resources.lib.logger import Logger
+
+
+class TestPickler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Logger.create_logger(None, str(cls), min_log_level=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        from resources.lib.addonsettings import AddonSettings
+        AddonSettings.clear_cached_addon_settings_object()
+        Logger.instance().close_log()
+
+    def setUp(self):
+        from resources.lib.mediaitem import MediaItem
+
+        self.store_path = tempfile.mkdtemp(prefix="retro_test_")
+        self.parent = MediaItem("Parent", "https://example.com/parent")
+        self.children = [MediaItem("Child {}".format(i), "https://example.com/{}".format(i))
+                         for i in range(10)]
+
+    def tearDown(self):
+        shutil.rmtree(self.store_path)
+
+    def test_store_and_retrieve_item(self):
+        from resources.lib.pickler import Pickler
+        Pickler(self.store_path).store_media_items(self.parent.guid, self.parent, self.children)
+
+        child = self.children[4]
+        item = Pickler(self.store_path).de_pickle_media_item(
+            "{}--{}".format(self.parent.guid, child.guid))
+        self.assertEqual(child, item)
+        self.assertEqual(child.name, item.name)
+
+    def test_retrieve_children(self):
+        from resources.lib.pickler import Pickler
+        Pickler(self.store_path).store_media_items(self.parent.guid, self.parent, self.children)
+
+        store_guid, items = Pickler(self.store_path).de_pickle_child_items(
+            "{}--{}".format(self.parent.guid, self.children[0].guid))
+        self.assertEqual(self.parent.guid, store_guid)
+        self.assertEqual(sorted(c.guid for c in self.children), sorted(items.keys()))
+
+    def test_compressed_store(self):
+        from resources.lib.mediaitem import MediaItem
+        from resources.lib.pickler import Pickler
+
+        children = [MediaItem("Child {}".format(i), "https://example.com/{}".format(i))
+                    for i in range(500)]
+        for child in children:
+            child.description = "Description {} ".format(child.name) * 20
+
+        Pickler(self.store_path).store_media_items(self.parent.guid, self.parent, children)
+        item = Pickler(self.store_path).de_pickle_media_item(
+            "{}--{}".format(self.parent.guid, children[250].guid))
+        self.assertEqual(children[250].description, item.description)
+
+    def test_missing_item(self):
+        from resources.lib.pickler import Pickler
+        Pickler(self.store_path).store_media_items(self.parent.guid, self.parent, self.children)
+        item = Pickler(self.store_path).de_pickle_media_item(
+            "{}--{}".format(self.parent.guid, "unknown"))
+        self.assertIsNone(item)
+
+    def test_legacy_store(self):
+        from resources.lib.pickler import Pickler
+
+        store_guid = self.parent.guid.lower()
+        legacy_dir = os.path.join(self.store_path, "pickles", store_guid[0:2], store_guid[2:4])
+        os.makedirs(legacy_dir)
+        content = {
+            "parent": self.parent,
+            "children": {item.guid: item for item in self.children}
+        }
+        with io.open(os.path.join(legacy_dir, "{}.store.z".format(store_guid)), "wb") as fp:
+            fp.write(zlib.compress(pickle.dumps(content, protocol=pickle.HIGHEST_PROTOCOL)))
+
+        child = self.children[2]
+        item = Pickler(self.store_path).de_pickle_media_item(
+            "{}--{}".format(self.parent.guid, child.guid))
+        self.assertEqual(child, item)
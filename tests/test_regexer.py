@@ -0,0 +1,87 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import unittest
+
+from resources.lib.logger import Logger
+from resources.lib.regexer import Regexer
+
+
+class TestRegexer(unittest.TestCase):
+    data = '<a href="/show/1">Show 1</a><img src="1.jpg"><a href="/show/2">Show 2</a>' \
+           '<img src="2.jpg"><span class="date">2021-01-02</span>'
+
+    @classmethod
+    def setUpClass(cls):
+        Logger.create_logger(None, str(cls), min_log_level=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        Logger.instance().close_log()
+
+    def test_regex(self):
+        self.assertEqual(["/show/1", "/show/2"], Regexer.do_regex('href="([^"]+)"', self.data))
+        self.assertEqual([("/show/1", "Show 1"), ("/show/2", "Show 2")],
+                         Regexer.do_regex('<A href="([^"]+)">([^<]+)', self.data))
+        self.assertEqual([{"url": "1.jpg"}, {"url": "2.jpg"}],
+                         Regexer.do_regex('src="(?P<url>[^"]+)"', self.data))
+        self.assertEqual([], Regexer.do_regex('([', self.data))
+
+    def test_multi_regex(self):
+        regexes = ['<a href="(?P<url>[^"]+)">(?P<title>[^<]+)', 'nothing(\\d+)',
+                   'src="(?P<url>[^"]+)"', '<span class="(\\w+)">([^<]+)', 'img']
+        results = Regexer.do_regex(regexes, self.data)
+        self.assertEqual([
+            (0, {"url": "/show/1", "title": "Show 1"}), (0, {"url": "/show/2", "title": "Show 2"}),
+            (1, {"url": "1.jpg"}), (1, {"url": "2.jpg"}),
+            (2, "date", "2021-01-02"),
+            (3, "img"), (3, "img")
+        ], results)
+
+    def test_cache_size(self):
+        for i in range(0, Regexer.MAX_CACHE_SIZE + 10):
+            Regexer.do_regex("Show {0}".format(i), self.data)
+
+        # noinspection PyUnresolvedReferences
+        compiled_regexes = Regexer._Regexer__compiledRegexes
+        self.assertEqual(Regexer.MAX_CACHE_SIZE, len(compiled_regexes))
+        self.assertNotIn("Show 0", compiled_regexes)
+        self.assertIn("Show {0}".format(Regexer.MAX_CACHE_SIZE + 9), compiled_regexes)
+
+    def test_precompile(self):
+        self.assertTrue(Regexer.precompile(['href="([^"]+)"', 'src="([^"]+)"']))
+        self.assertFalse(Regexer.precompile(['href="([^"]+)"', '([']))
+
+    def test_statistics(self):
+        Regexer.log_report(Logger.instance())
+        Regexer.do_regex('href="([^"]+)"', self.data)
+        Regexer.do_regex('href="([^"]+)"', self.data)
+
+        # noinspection PyUnresolvedReferences
+        statistics = Regexer._Regexer__statistics
+        self.assertEqual(2, statistics['href="([^"]+)"'][0])
+        self.assertEqual(4, statistics['href="([^"]+)"'][2])
+
+        Regexer.log_report(Logger.instance())
+        # noinspection PyUnresolvedReferences
+        self.assertEqual({}, Regexer._Regexer__statistics)
+
+    def test_statistics(self):
+        # noinspection PyUnresolvedReferences
+        Regexer._Regexer__statistics.clear()
+        for i in range(0, Regexer.MAX_CACHE_SIZE + 10):
+            Regexer.do_regex("Show {0}".format(i), self.data)
+
+        # noinspection PyUnresolvedReferences
+        self.assertEqual(Regexer.MAX_CACHE_SIZE, len(Regexer._Regexer__statistics))
+
+    def test_no_statistics_without_debug(self):
+        # noinspection PyUnresolvedReferences
+        Regexer._Regexer__statistics.clear()
+        Logger.instance().minLogLevel = Logger.LVL_INFO
+        try:
+            Regexer.do_regex("Show", self.data)
+        finally:
+            Logger.instance().minLogLevel = Logger.LVL_TRACE
+
+        # noinspection PyUnresolvedReferences
+        self.assertEqual({}, Regexer._Regexer__statistics)
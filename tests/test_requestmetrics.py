@@ -0,0 +1,91 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import datetime
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from resources.lib.logger import Logger
+from resources.lib.connectivity.requestmetrics import RequestMetrics
+
+
+class FakeResponse(object):
+    def __init__(self, status_code=200, content=b"", elapsed=0.1, cache_status=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {"content-length": str(len(content))}
+        self.elapsed = datetime.timedelta(seconds=elapsed)
+        if cache_status:
+            self.cacheStatus = cache_status
+
+
+class TestRequestMetrics(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Logger.create_logger(None, str(cls), min_log_level=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        Logger.instance().close_log()
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="retro_test_")
+        self.path = os.path.join(self.folder, "requestmetrics.json")
+        self.metrics = RequestMetrics()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_record(self):
+        self.metrics.set_context("channel", "parser")
+        self.metrics.record("GET", "https://example.com/api?page=1",
+                            FakeResponse(content=b"12345", cache_status="miss"), 0.5)
+        self.metrics.record("GET", "https://example.com/api?page=2",
+                            FakeResponse(content=b"12345", cache_status="hit"), 0.01)
+        self.metrics.set_context()
+        self.metrics.record("POST", "https://other.com/login", None, 1.0, attempts=2,
+                            error="ConnectionError")
+
+        summary = self.metrics.get_summary()
+        self.assertEqual(3, summary["totals"]["requests"])
+        self.assertEqual(5, summary["totals"]["bytes"])
+        self.assertEqual(1, summary["totals"]["errors"])
+        self.assertEqual(1, summary["totals"]["retries"])
+        self.assertEqual({"miss": 1, "hit": 1, "uncached": 1}, summary["cache"])
+        self.assertEqual(2, summary["endpoints"]["example.com/api"]["requests"])
+        self.assertEqual(1, summary["channels"]["<none>"]["requests"])
+        self.assertEqual(1, summary["parsers"]["parser"]["cached"])
+        self.assertEqual("other.com", summary["slowest"][0]["host"])
+        self.assertEqual(summary["totals"], self.metrics.get_totals())
+
+    def test_clear(self):
+        self.metrics.record("GET", "https://example.com/", FakeResponse(content=b"1"), 0.5)
+        self.assertEqual(1, self.metrics.get_totals()["requests"])
+
+        self.metrics.clear()
+        self.assertEqual([], self.metrics.records)
+        self.assertEqual({}, self.metrics.get_totals())
+
+    def test_store(self):
+        self.metrics.record("GET", "https://example.com/", FakeResponse(content=b"1"), 0.5)
+        self.metrics.store(self.path, new_session=True)
+        self.assertEqual([], self.metrics.records)
+        self.assertEqual({}, self.metrics.get_totals())
+
+        self.metrics.record("GET", "https://example.com/", FakeResponse(content=b"1"), 0.5)
+        self.metrics.store(self.path)
+
+        with io.open(self.path, "rb") as fp:
+            session = json.loads(fp.read().decode("utf-8"))
+        self.assertEqual(2, session["calls"])
+        self.assertEqual(2, session["hosts"]["example.com"]["requests"])
+        self.assertEqual(1.0, session["totals"]["time"])
+
+        self.metrics.record("GET", "https://example.com/", FakeResponse(), 0.5)
+        self.metrics.store(self.path, new_session=True)
+        with io.open(self.path, "rb") as fp:
+            session = json.loads(fp.read().decode("utf-8"))
+        self.assertEqual(1, session["calls"])
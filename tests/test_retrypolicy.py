@@ -0,0 +1,59 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import unittest
+
+from resources.lib.logger import Logger
+from resources.lib.connectivity.retrypolicy import RetryPolicy
+
+
+class TestRetryPolicy(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Logger.create_logger(None, str(cls), min_log_level=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        Logger.instance().close_log()
+
+    def setUp(self):
+        self.policy = RetryPolicy(max_attempts=3, backoff_factor=1, backoff_max=3)
+
+    def test_retry_status(self):
+        self.assertTrue(self.policy.should_retry_status("GET", 503, 1))
+        self.assertTrue(self.policy.should_retry_status("GET", 503, 2))
+        self.assertFalse(self.policy.should_retry_status("GET", 503, 3))
+        self.assertFalse(self.policy.should_retry_status("GET", 404, 1))
+        self.assertFalse(self.policy.should_retry_status("POST", 503, 1))
+
+    def test_retry_error(self):
+        self.assertTrue(self.policy.should_retry_error("GET", 1, False))
+        self.assertFalse(self.policy.should_retry_error("POST", 1, False))
+        self.assertTrue(self.policy.should_retry_error("POST", 1, True))
+        self.assertFalse(self.policy.should_retry_error("GET", 3, True))
+
+    def test_backoff(self):
+        self.assertGreaterEqual(self.policy.get_backoff(1), 1)
+        self.assertLess(self.policy.get_backoff(1), 2)
+        self.assertGreaterEqual(self.policy.get_backoff(2), 2)
+        self.assertEqual(3, self.policy.get_backoff(5))
+        self.assertEqual(2, self.policy.get_backoff(1, retry_after="2"))
+        self.assertEqual(3, self.policy.get_backoff(1, retry_after="120"))
+
+    def test_timeout(self):
+        self.assertEqual((10, 30), RetryPolicy().get_timeout())
+        self.assertEqual(20, RetryPolicy(connect_timeout=None, read_timeout=20).get_timeout())
+
+    def test_hedging(self):
+        self.assertFalse(self.policy.can_hedge("GET", False))
+
+        policy = RetryPolicy(hedge_after=1.5)
+        self.assertTrue(policy.can_hedge("GET", False))
+        self.assertFalse(policy.can_hedge("GET", True))
+        self.assertFalse(policy.can_hedge("POST", False))
+
+    def test_override(self):
+        override = self.policy.add_override(r"^https://api\.example\.com/", hedge_after=2)
+        self.assertIs(override, self.policy.get_policy("https://api.example.com/shows"))
+        self.assertIs(self.policy, self.policy.get_policy("https://www.example.com/"))
+        self.assertEqual(2, override.hedgeAfter)
+        self.assertEqual(3, override.maxAttempts)
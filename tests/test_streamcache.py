@@ -0,0 +1,161 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from resources.lib.logger import Logger
+from resources.lib.connectivity.streamcache import StreamCache
+
+
+class TestStreamCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Logger.create_logger(None, str(cls), min_log_level=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        Logger.instance().close_log()
+
+    def setUp(self):
+        self.cache_folder = tempfile.mkdtemp(prefix="retro_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_folder)
+
+    def test_set_and_get(self):
+        store = StreamCache(self.cache_folder)
+        with store.set("key", {"status": 200}) as fp:
+            fp.write(b"body")
+
+        self.assertTrue(store.has_cache_key("key"))
+        meta, body = store.get("key")
+        self.assertEqual({"status": 200}, meta)
+        self.assertEqual(b"body", body.read())
+
+    def test_persisted_index(self):
+        store = StreamCache(self.cache_folder)
+        with store.set("key", {"status": 200}) as fp:
+            fp.write(b"body")
+        store.flush()
+
+        store = StreamCache(self.cache_folder)
+        self.assertTrue(store.has_cache_key("key"))
+        self.assertFalse(store.is_expired("key"))
+        _, body = store.get("key")
+        self.assertEqual(b"body", body.read())
+
+    def test_expired(self):
+        store = StreamCache(self.cache_folder)
+        with store.set("key", expires_in=-1) as fp:
+            fp.write(b"body")
+        self.assertTrue(store.is_expired("key"))
+
+    def test_failed_write(self):
+        store = StreamCache(self.cache_folder)
+        with self.assertRaises(ValueError):
+            with store.set("key") as fp:
+                fp.write(b"half a bo")
+                raise ValueError("Connection lost")
+
+        self.assertFalse(store.has_cache_key("key"))
+        self.assertEqual([], os.listdir(store.cachePath))
+
+    def test_lru_eviction(self):
+        store = StreamCache(self.cache_folder, max_size_mb=1)
+        body = b"0" * 400 * 1024
+        for key in ("first", "second"):
+            with store.set(key) as fp:
+                fp.write(body)
+
+        # access the first one so the second one becomes the least recently used.
+        store.get("first")
+        with store.set("third") as fp:
+            fp.write(body)
+
+        self.assertTrue(store.has_cache_key("first"))
+        self.assertFalse(store.has_cache_key("second"))
+        self.assertTrue(store.has_cache_key("third"))
+        self.assertFalse(os.path.isfile(os.path.join(store.cachePath, "second")))
+
+    def test_purge_without_index(self):
+        cache_path = os.path.join(self.cache_folder, "www")
+        os.makedirs(cache_path)
+        with open(os.path.join(cache_path, "old.body"), "wb") as fp:
+            fp.write(b"body")
+
+        store = StreamCache(self.cache_folder)
+        self.assertFalse(store.has_cache_key("old.body"))
+        self.assertEqual([], os.listdir(store.cachePath))
+
+    def test_compressed(self):
+        store = StreamCache(self.cache_folder)
+        body = b'{"items": []}' * 1000
+        with store.set("key", {"status": 200}, compress=True) as fp:
+            fp.write(body)
+
+        self.assertLess(os.path.getsize(os.path.join(store.cachePath, "key")), len(body))
+        meta, data = store.get("key")
+        self.assertEqual({"status": 200}, meta)
+        self.assertEqual(body, data.read())
+
+    def test_index_written_on_flush(self):
+        store = StreamCache(self.cache_folder)
+        with store.set("key") as fp:
+            fp.write(b"body")
+
+        self.assertFalse(os.path.isfile(store.indexPath))
+        store.flush()
+        self.assertTrue(os.path.isfile(store.indexPath))
+
+    def test_merge_concurrent_stores(self):
+        first = StreamCache(self.cache_folder)
+        second = StreamCache(self.cache_folder)
+        with first.set("first") as fp:
+            fp.write(b"body")
+        with second.set("second") as fp:
+            fp.write(b"body")
+        first.flush()
+        second.flush()
+
+        store = StreamCache(self.cache_folder)
+        self.assertTrue(store.has_cache_key("first"))
+        self.assertTrue(store.has_cache_key("second"))
+        # the second store also picked up the entry of the first one
+        self.assertTrue(second.has_cache_key("first"))
+
+    def test_merge_removed_entries(self):
+        first = StreamCache(self.cache_folder)
+        with first.set("removed") as fp:
+            fp.write(b"body")
+        first.flush()
+
+        second = StreamCache(self.cache_folder)
+        first.remove("removed")
+        first.flush()
+        with second.set("other") as fp:
+            fp.write(b"body")
+        second.flush()
+
+        store = StreamCache(self.cache_folder)
+        self.assertFalse(store.has_cache_key("removed"))
+        self.assertTrue(store.has_cache_key("other"))
+
+    def test_remove_orphans(self):
+        store = StreamCache(self.cache_folder)
+        with store.set("key") as fp:
+            fp.write(b"body")
+        store.flush()
+
+        old_file = os.path.join(store.cachePath, "old")
+        new_file = os.path.join(store.cachePath, "new")
+        for file_name in (old_file, new_file):
+            with open(file_name, "wb") as fp:
+                fp.write(b"body")
+        os.utime(old_file, (0, 0))
+
+        store = StreamCache(self.cache_folder)
+        self.assertTrue(store.has_cache_key("key"))
+        self.assertFalse(os.path.isfile(old_file))
+        self.assertTrue(os.path.isfile(new_file))
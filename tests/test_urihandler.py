@@ -14,15 +14,60 @@ import time
 if PY2:
     # noinspection PyUnresolvedReferences
     from urllib import quote
+    # noinspection PyUnresolvedReferences
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    # noinspection PyUnresolvedReferences
+    from SocketServer import ThreadingMixIn
 else:
     # noinspection PyUnresolvedReferences,PyCompatibility
     from urllib.parse import quote
+    # noinspection PyCompatibility
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    # noinspection PyCompatibility
+    from socketserver import ThreadingMixIn
+import threading
 
 from resources.lib.backtothefuture import basestring
 from resources.lib.urihandler import UriHandler
 from resources.lib.logger import Logger
 
 
+class SlowFirstRequestServer(ThreadingMixIn, HTTPServer):
+    """ A local server that only responds to the first request after a delay. """
+
+    daemon_threads = True
+
+    def __init__(self, delay):
+        HTTPServer.__init__(self, ("127.0.0.1", 0), SlowFirstRequestHandler)
+        self.delay = delay
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:{0}/".format(self.server_address[1])
+
+
+class SlowFirstRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+            request = self.server.requests
+
+        if request == 1:
+            time.sleep(self.server.delay)
+
+        body = "request {0}".format(request).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
 class TestUriHandler(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -53,6 +98,29 @@ class TestUriHandler(unittest.TestCase):
         self.assertEqual(data_object["headers"]["Host"], 'httpbin.org')
         self.assertEqual(200, UriHandler.instance().status.code)
 
+    def test_connection_reuse(self):
+        UriHandler.create_uri_handler()
+
+        url = "http://httpbin.org/get"
+        UriHandler.open(url)
+        UriHandler.open(url)
+        UriHandler.header(url)
+        new_connections, reused_connections = UriHandler.instance().sessionPool.get_connection_counts()
+        self.assertEqual(1, new_connections)
+        self.assertEqual(2, reused_connections)
+
+    def test_open_pages(self):
+        UriHandler.create_uri_handler(max_workers=3)
+
+        url_format = "http://httpbin.org/get?page={}"
+        pages = UriHandler.open_pages(url_format, 1, 5)
+        self.assertEqual(5, len(pages))
+        for page, data in enumerate(pages, start=1):
+            data_object = json.loads(data)
+            self.assertEqual(str(page), data_object["args"]["page"])
+        # the status is that of the last page, not of the last finished worker
+        self.assertEqual(url_format.format(5), UriHandler.instance().status.url)
+
     def test_post(self):
         UriHandler.create_uri_handler()
 
@@ -392,6 +460,24 @@ class TestUriHandler(unittest.TestCase):
         self.assertEqual(cookie.value.strip("\""), cookie_value)
 
     # cookies
+    def test_read_only_cookie_file(self):
+        cookie_jar = os.path.join(self.output_folder, "cookies.dat")
+        UriHandler.create_uri_handler(cookie_jar=cookie_jar)
+        UriHandler.set_cookie(name="stored", value="value", domain="example.com")
+        UriHandler.instance().flush()
+
+        UriHandler._UriHandler__handler = None
+        UriHandler.create_uri_handler(cookie_jar=cookie_jar, store_cookies=False)
+        self.assertIsNotNone(UriHandler.get_cookie("stored", "example.com"))
+        UriHandler.set_cookie(name="other", value="value", domain="example.com")
+        UriHandler.delete_cookie(domain="example.com")
+        UriHandler.instance().flush()
+
+        UriHandler._UriHandler__handler = None
+        UriHandler.create_uri_handler(cookie_jar=cookie_jar)
+        self.assertIsNotNone(UriHandler.get_cookie("stored", "example.com"))
+        self.assertIsNone(UriHandler.get_cookie("other", "example.com"))
+
     def test_set_cookie_file(self):
         cookie_name = "cookie_test"
         cookie_value = "test data"
@@ -480,6 +566,45 @@ class TestUriHandler(unittest.TestCase):
         self.assertEqual("", data)
         self.assertEqual(500, UriHandler.instance().status.code)
 
+    def test_hedged_request(self):
+        from resources.lib.connectivity.retrypolicy import RetryPolicy
+        handler = UriHandler.create_uri_handler(retry_policy=RetryPolicy(hedge_after=0.2))
+
+        server = SlowFirstRequestServer(delay=2)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            data = UriHandler.open(server.url, no_cache=True)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # the hedged second request responded before the first one
+        self.assertEqual("request 2", data)
+        self.assertEqual(2, server.requests)
+        self.assertEqual(200, handler.status.code)
+        self.assertTrue(handler.metrics.records[-1]["hedged"])
+        self.assertEqual(1, handler.metrics.get_summary()["totals"]["hedged"])
+
+    def test_not_hedged_request(self):
+        from resources.lib.connectivity.retrypolicy import RetryPolicy
+        handler = UriHandler.create_uri_handler(retry_policy=RetryPolicy(hedge_after=1))
+
+        server = SlowFirstRequestServer(delay=0)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            data = UriHandler.open(server.url, no_cache=True)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual("request 1", data)
+        self.assertEqual(1, server.requests)
+        self.assertFalse(handler.metrics.records[-1]["hedged"])
+
     def test_404(self):
         UriHandler.create_uri_handler()
 